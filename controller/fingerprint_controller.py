@@ -1,14 +1,22 @@
+import hashlib
+import json
 from typing import List, Optional, Union, Tuple
 
+import numpy as np
 from google.cloud.storage.client import Client
 from redis.client import Redis
 from sqlalchemy.orm import Session
 
 from controller.bucket_controller import create_bucket_and_save_samples_from_fingerprint
-from controller.characteristic_point_controller import parse_db_list_to_cp_list
+from controller.characteristic_point_controller import parse_db_list_to_cp_list, get_json_of_minutiae_list, \
+    get_json_of_core_points_list, from_json_get_minutiae_list_object, from_json_get_core_point_list_object
 from controller.general_controller import delete_fingerprint_auth_data
+from controller.identification_controller import stop_fingerprint_identification
 from controller.sign_up_controller import select_the_best_sample
 from db.cache.cache import is_the_same, batch_save
+from db.cache.template_cache import get_cached_template, save_template_in_cache, get_template_version
+from core.config import PACKED_TEMPLATES, MATCHING_MAX_EXPLORED_EDGES, MATCHING_TIME_BUDGET
+from core.process_pool import fingerprint_pool
 from core.utils import generate_random_string
 from db.models.fingerprints_db import DbFingerprint
 from db.orm.clients_orm import get_client_by_id_client
@@ -16,19 +24,23 @@ from db.orm.cores_orm import insert_list_of_core_points, get_core_points_by_id_f
 from db.orm.exceptions_orm import uncreated_bucked_exception, compile_exception, uncreated_fingerprint_exception, \
     NotFoundException, wrong_data_sent_exception, expired_cache_exception, expired_ticket_or_is_incorrect_exception, \
     cache_exception
-from db.orm.fingerprints_orm import create_fingerprint, get_fingerprints_by_id_client, get_main_fingerprint_of_client
+from db.orm.fingerprints_orm import create_fingerprint, get_fingerprints_by_id_client, get_main_fingerprint_of_client, \
+    set_fingerprint_template
 from db.orm.functions_orm import full_database_exceptions, multiple_attempts
 from db.orm.minutiae_orm import insert_list_of_minutiae, get_minutiae_by_id_fingerprint
 from fingerprint_process.description.fingerprint import Fingerprint
 from fingerprint_process.models.core_point import CorePoint
+from fingerprint_process.models.fingerprint_template import FingerprintTemplate
 from fingerprint_process.models.minutia import Minutiae
 from fingerprint_process.utils.error_message import ErrorMessage
-from fingerprint_process.utils.utils import get_description_fingerprint, match_index_and_base_fingerprints
+from fingerprint_process.utils.utils import get_description_fingerprint, match_index_and_base_fingerprints, \
+    get_data_fingerprint
 from schemas.fingerprint_base import FingerprintBase, FingerprintBasicDisplay, FingerprintRequest, ClientInner
 from schemas.fingerprint_complex import FingerprintFullRequest, FingerprintRegisterRequest
 from schemas.fingerprint_model import FingerprintSamples
 from schemas.type_user import TypeUser
 from secure.cipher_secure import cipher_data, decipher_data
+from web_utils.image_on_web import save_fingerprint_in_memory, get_image_from_base64
 
 
 async def register_fingerprint(
@@ -36,24 +48,14 @@ async def register_fingerprint(
         gcs: Client,
         fingerprint_request: FingerprintFullRequest,
         id_client: str,
-        data_summary: List[dict]
+        data_summary: List[dict],
+        described_fingerprint: Optional[Fingerprint] = None
 ) -> Optional[FingerprintBasicDisplay]:
-    # Get fingerprint's samples
-    fingerprints: FingerprintSamples = fingerprint_request.samples
-
-    # Get best sample
-    position_best_sample = select_the_best_sample(data_summary)
-    best_sample = fingerprints.fingerprints[position_best_sample]
-
-    # Describe sample of fingerprint
-    result = get_description_fingerprint(
-        name_fingerprint='example',
-        source='api',
-        data_fingerprint=best_sample,
-        mode='register',
-        show_result=False,
-        save_result=False
-    )
+    if described_fingerprint is not None:
+        # The best sample was already described during the pre-registration
+        result = described_fingerprint
+    else:
+        result = await describe_best_sample(fingerprint_request.samples, data_summary)
 
     # Check if there is an error
     if isinstance(result, int):
@@ -82,14 +84,40 @@ async def register_fingerprint(
             quality='good'  # We can be sure that quality of the sample is good
         )
 
+        # The identification gallery is loaded again with the new fingerprint
+        await stop_fingerprint_identification()
+
         return response
     else:
         raise uncreated_fingerprint_exception
 
 
+async def describe_best_sample(
+        fingerprints: FingerprintSamples,
+        data_summary: List[dict]
+) -> Union[Fingerprint, int]:
+    # Get best sample
+    position_best_sample = select_the_best_sample(data_summary)
+    best_sample = fingerprints.fingerprints[position_best_sample]
+
+    # Describe sample of fingerprint
+    result = await fingerprint_pool.run(
+        get_description_fingerprint,
+        name_fingerprint='example',
+        source='api',
+        data_fingerprint=best_sample,
+        mode='register',
+        show_result=False,
+        save_result=False
+    )
+
+    return result
+
+
 async def describe_fingerprint_from_sample(sample: Union[str, List[int]]) -> Fingerprint:
     # Describe sample of fingerprint
-    result = get_description_fingerprint(
+    result = await fingerprint_pool.run(
+        get_description_fingerprint,
         name_fingerprint='auth-fingerprint',
         source='api',
         data_fingerprint=sample,
@@ -115,6 +143,21 @@ async def get_minutiae_and_core_points_from_sample(sample: Union[str, List[int]]
     return fingerprint.get_minutiae_list(), fingerprint.get_core_point_list()
 
 
+def get_stored_template(fingerprint: Fingerprint) -> FingerprintTemplate:
+    """
+    Return the minutiae and core points of the fingerprint as they are saved in the database (angles rounded to
+    two decimals, without local structure)
+    """
+    template = fingerprint.get_template()
+    minutiae = template.get_minutiae().copy()
+    core_points = template.get_core_points().copy()
+    for points in (minutiae, core_points):
+        points['angle'] = np.round(points['angle'], 2)
+
+    return FingerprintTemplate(minutiae=minutiae, core_points=core_points,
+                               name_fingerprint=fingerprint.get_name_of_fingerprint())
+
+
 @multiple_attempts
 @full_database_exceptions
 def save_fingerprint_into_database(
@@ -164,6 +207,15 @@ def save_fingerprint_into_database(
         if not was_successful:
             raise compile_exception
 
+        # Packed copy of the points, written after them because every insertion of points clears it
+        if PACKED_TEMPLATES:
+            set_fingerprint_template(
+                db,
+                id_fingerprint=new_fingerprint.id_fingerprint,
+                template=get_stored_template(fingerprint).to_bytes(),
+                execute='wait'
+            )
+
         # Save all changes
         db.commit()
     except Exception as e:
@@ -206,7 +258,8 @@ def preregister_fingerprint(
         summary: list[dict],
         request: FingerprintFullRequest,
         r: Redis,
-        type_s: str = 'CLI'
+        type_s: str = 'CLI',
+        described_fingerprint: Optional[Fingerprint] = None
 ) -> str:
     register_model = FingerprintRegisterRequest(
         fingerprint_full_request=request,
@@ -223,6 +276,16 @@ def preregister_fingerprint(
         f'PRE-{type_s}-{id_client}': secure_data,
         f'TKT-{type_s}-{id_client}': ticket
     }
+
+    # Keep the description of the best sample, so it is not enhanced again when the fingerprint is registered
+    if isinstance(described_fingerprint, Fingerprint):
+        best_sample = request.samples.fingerprints[select_the_best_sample(summary)]
+        values_to_catching[f'DSC-{type_s}-{id_client}'] = cipher_data(
+            get_json_of_described_fingerprint(described_fingerprint, get_hash_of_sample(best_sample))
+        )
+    else:
+        # A description of previous samples must not be used with these ones
+        delete_preregistered_fingerprint(id_client, r, type_s)
     result = batch_save(r, values_to_catching, seconds=1800)
 
     if result.count(False) > 0:
@@ -254,6 +317,70 @@ def check_fingerprint_request(
         raise expired_cache_exception
 
 
+def get_hash_of_sample(sample: Union[str, List[int]]) -> str:
+    return hashlib.sha256(json.dumps(sample).encode('utf-8')).hexdigest()
+
+
+def get_json_of_described_fingerprint(fingerprint: Fingerprint, sample_hash: str) -> str:
+    enhance_fingerprint: bytes = save_fingerprint_in_memory(
+        image_fingerprint=fingerprint.get_fingerprint_image(),
+        return_format='base64'
+    )
+
+    return json.dumps({
+        'minutiae': get_json_of_minutiae_list(fingerprint.get_minutiae_list()),
+        'core_points': get_json_of_core_points_list(fingerprint.get_core_point_list()),
+        'spectral_index': float(fingerprint.get_spectral_index()),
+        'spatial_index': float(fingerprint.get_spatial_index()),
+        'enhance_fingerprint': enhance_fingerprint.decode('utf-8'),
+        'sample_hash': sample_hash
+    })
+
+
+def get_preregistered_fingerprint(
+        id_client: str,
+        register_request: FingerprintRegisterRequest,
+        r: Redis,
+        type_s: str = 'CLI'
+) -> Optional[Fingerprint]:
+    """
+    Rebuild the best sample described during the pre-registration from the cache.
+
+    :return: (Fingerprint, None) The described fingerprint or None when it is not in cache or it was described from
+    other samples, in that case the sample has to be described again
+    """
+    secure_data = r.get(f'DSC-{type_s}-{id_client}')
+    if secure_data is None:
+        return None
+
+    description = json.loads(decipher_data(secure_data.decode('utf-8')))
+
+    position_best_sample = select_the_best_sample(register_request.summary)
+    best_sample = register_request.fingerprint_full_request.samples.fingerprints[position_best_sample]
+    if description.get('sample_hash') != get_hash_of_sample(best_sample):
+        return None
+
+    fingerprint = Fingerprint(
+        characteritic_point_thresh=0.8,
+        name_fingerprint='example',
+        show_result=False,
+        save_result=False
+    )
+    raw_image = fingerprint.reconstruction_fingerprint(get_data_fingerprint('api', best_sample))
+    enhance_image = get_image_from_base64(description['enhance_fingerprint'])
+
+    fingerprint.set_fingerprint_images(raw_image, enhance_image)
+    fingerprint.set_indexes(description['spectral_index'], description['spatial_index'])
+    fingerprint.set_minutiae_list(from_json_get_minutiae_list_object(description['minutiae']))
+    fingerprint.set_core_points_list(from_json_get_core_point_list_object(description['core_points']))
+
+    return fingerprint
+
+
+def delete_preregistered_fingerprint(id_client: str, r: Redis, type_s: str = 'CLI') -> bool:
+    return r.delete(f'DSC-{type_s}-{id_client}') > 0
+
+
 def check_if_user_have_fingerprint_registered(db: Session, type_user: str, id_type: str) -> bool:
     if type_user == TypeUser.client.value:
         try:
@@ -280,7 +407,9 @@ async def validate_operation_by_fingerprints(
         mode='core',
         source='api',
         base_fingerprint=client_fingerprint,
-        input_fingerprint=auth_fingerprint
+        input_fingerprint=auth_fingerprint,
+        max_explored_edges=MATCHING_MAX_EXPLORED_EDGES,
+        time_budget=MATCHING_TIME_BUDGET
     )
     # In this point the fingerprint has been used
     r_delete_cp = delete_fingerprint_auth_data(r, type_s, identifier)
@@ -313,23 +442,52 @@ async def set_minutiae_and_core_points_to_a_fingerprint(
     return fingerprint
 
 
-async def get_client_fingerprint(db: Session, id_client: str) -> Fingerprint:
-    main_fingerprint = get_main_fingerprint_of_client(db, id_client)
+def get_template_from_database(db: Session, fingerprint: DbFingerprint) -> FingerprintTemplate:
+    """
+    Read the minutiae and core points of the fingerprint from its packed template (one lookup by primary key) or,
+    when it is NULL, from the minutiae and cores tables
+    """
+    if PACKED_TEMPLATES and fingerprint.template is not None:
+        try:
+            return FingerprintTemplate.from_bytes(fingerprint.template)
+        except ValueError:
+            pass
 
     try:
-        minutiae_db = get_minutiae_by_id_fingerprint(db, main_fingerprint.id_fingerprint)
+        minutiae_db = get_minutiae_by_id_fingerprint(db, fingerprint.id_fingerprint)
         minutiae_obj = parse_db_list_to_cp_list(minutiae_db, 'minutia')
     except NotFoundException:
         minutiae_obj = []
 
     try:
-        core_points_db = get_core_points_by_id_fingerprint(db, main_fingerprint.id_fingerprint)
+        core_points_db = get_core_points_by_id_fingerprint(db, fingerprint.id_fingerprint)
         core_points_obj = parse_db_list_to_cp_list(core_points_db, 'core')
     except NotFoundException:
         core_points_obj = []
 
-    return await set_minutiae_and_core_points_to_a_fingerprint(
-        minutiae=minutiae_obj,
-        core_points=core_points_obj,
-        name_fingerprint=main_fingerprint.alias_fingerprint
+    return FingerprintTemplate.from_points(minutiae_obj, core_points_obj, fingerprint.alias_fingerprint)
+
+
+async def get_client_fingerprint(db: Session, id_client: str, r: Optional[Redis] = None) -> Fingerprint:
+    """
+    Return the main fingerprint of the client. Its minutiae and core points are taken from the template cache
+    (see db/cache/template_cache.py) and only read from the database on a miss; when r is given the template is
+    also shared with the other workers through Redis.
+    """
+    main_fingerprint = get_main_fingerprint_of_client(db, id_client)
+    version = get_template_version(main_fingerprint)
+
+    template = get_cached_template(id_client, main_fingerprint.id_fingerprint, version, r)
+    if template is None:
+        template = get_template_from_database(db, main_fingerprint)
+        save_template_in_cache(id_client, main_fingerprint.id_fingerprint, version, template, r)
+
+    fingerprint = Fingerprint(
+        characteritic_point_thresh=0.8,
+        name_fingerprint=main_fingerprint.alias_fingerprint,
+        show_result=False,
+        save_result=False
     )
+    fingerprint.set_template(template)
+
+    return fingerprint
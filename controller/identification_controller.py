@@ -0,0 +1,124 @@
+import asyncio
+import time
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from core.config import IDENTIFICATION_MAX_CANDIDATES, IDENTIFICATION_TOP_K, IDENTIFICATION_WORKERS, \
+    IDENTIFICATION_GALLERY_TIME
+from db.orm.cores_orm import get_core_points_of_main_fingerprints
+from db.orm.minutiae_orm import get_minutiae_of_main_fingerprints
+from fingerprint_process.description.fingerprint import Fingerprint
+from fingerprint_process.matching.identification import FingerprintGallery, IdentificationEngine
+from fingerprint_process.models.fingerprint_template import FingerprintTemplate, POINT_DTYPE
+
+# Engine over the main fingerprints of all the clients, it is loaded with the first identification
+identification_engine: Optional[IdentificationEngine] = None
+# time.monotonic() when the gallery of the engine was loaded
+identification_loaded_at: float = 0.0
+# Only one request loads the gallery at once
+identification_lock = asyncio.Lock()
+
+
+def get_fingerprint_gallery(db: Session) -> FingerprintGallery:
+    """
+    Build the gallery of templates of the main fingerprint of every client with two queries, one for the minutiae
+    and one for the core points. The points are read as rows, so no Minutiae or CorePoint object is created.
+    """
+    points: Dict[str, Tuple[list, list]] = {}
+
+    for id_client, pos_x, pos_y, angle, type_minutia in get_minutiae_of_main_fingerprints(db):
+        points.setdefault(id_client, ([], []))[0].append((pos_y, pos_x, angle, type_minutia))
+
+    for id_client, pos_x, pos_y, angle, type_core in get_core_points_of_main_fingerprints(db):
+        points.setdefault(id_client, ([], []))[1].append((pos_y, pos_x, angle, type_core))
+
+    gallery = FingerprintGallery()
+    for id_client, (minutiae, core_points) in points.items():
+        gallery.add_template(id_client, FingerprintTemplate(
+            minutiae=np.array(minutiae, dtype=POINT_DTYPE),
+            core_points=np.array(core_points, dtype=POINT_DTYPE),
+            name_fingerprint=id_client
+        ))
+
+    return gallery
+
+
+def load_identification_engine(db: Session) -> IdentificationEngine:
+    """
+    Load the gallery and start the workers of a new engine. It blocks, so it runs out of the event loop.
+    """
+    engine = IdentificationEngine(
+        gallery=get_fingerprint_gallery(db),
+        workers=IDENTIFICATION_WORKERS,
+        max_candidates=IDENTIFICATION_MAX_CANDIDATES
+    )
+    engine.start()
+
+    return engine
+
+
+async def start_fingerprint_identification(db: Session) -> IdentificationEngine:
+    """
+    Return the current engine or load a new one when there is none or its gallery is older than
+    IDENTIFICATION_GALLERY_TIME; the gallery of each worker of the server is refreshed at least that often.
+    """
+    global identification_engine, identification_loaded_at
+
+    async with identification_lock:
+        engine = identification_engine
+        if engine is not None and time.monotonic() - identification_loaded_at < IDENTIFICATION_GALLERY_TIME:
+            return engine
+
+        loop = asyncio.get_running_loop()
+        new_engine = await loop.run_in_executor(None, load_identification_engine, db)
+
+        identification_engine = new_engine
+        identification_loaded_at = time.monotonic()
+
+    if engine is not None:
+        # The identifications in flight keep their engine, it is shut down when they finish
+        loop.run_in_executor(None, engine.shutdown)
+
+    return new_engine
+
+
+async def stop_fingerprint_identification(wait: bool = False) -> None:
+    """
+    Drop the engine, so the gallery is loaded again with the next identification. It is called whenever the main
+    fingerprint of a client changes (registration, change of main fingerprint or deletion).
+
+    :param wait: (bool) Wait until the engine is shut down; otherwise the identifications in flight finish in the
+        background and the request goes on
+    """
+    global identification_engine
+
+    # A gallery being loaded may not include the change, so it is dropped once it is ready
+    async with identification_lock:
+        engine = identification_engine
+        identification_engine = None
+
+    if engine is not None:
+        # shutdown waits for the identifications in flight, so it runs out of the event loop
+        shutdown = asyncio.get_running_loop().run_in_executor(None, engine.shutdown)
+        if wait:
+            await shutdown
+
+
+async def identify_client_by_fingerprint(
+        db: Session,
+        auth_fingerprint: Fingerprint,
+        top_k: int = IDENTIFICATION_TOP_K
+) -> List[Tuple[str, float]]:
+    """
+    Return the id of the top_k clients whose main fingerprint matches auth_fingerprint with their scores, the most
+    likely client first. It is used when the client does not give an id (e.g. a market without card).
+    """
+    engine = await start_fingerprint_identification(db)
+
+    # The engine waits for its workers, so it runs out of the event loop
+    loop = asyncio.get_running_loop()
+
+    return await loop.run_in_executor(None, partial(engine.identify, auth_fingerprint, top_k))
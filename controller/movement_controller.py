@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta
-from typing import List, Union, Optional
+from typing import List, Union, Optional, Iterator
 
 from fastapi import HTTPException
 from redis.client import Redis
@@ -27,15 +27,12 @@ from db.models.movements_db import DbMovement
 from db.models.payments_db import DbPayment
 from db.models.transfers_db import DbTransfer
 from db.models.withdraws_db import DbWithdraw
-from db.orm.deposits_orm import get_deposits_by_id_destination_credit, get_deposit_by_id_movement
+from db.orm.deposits_orm import get_deposit_by_id_movement
 from db.orm.exceptions_orm import NotFoundException, wrong_data_sent_exception, option_not_found_exception, \
     type_of_value_not_compatible, unexpected_error_exception, compile_exception, cache_exception, \
     operation_need_authorization_exception, not_values_sent_exception
-from db.orm.movements_orm import get_movements_by_id_credit_and_type, get_movement_by_id_movement, \
-    get_movements_by_id_requester_and_type, force_termination_movement
-from db.orm.payments_orm import get_payment_by_id_movement, get_payments_by_id_market
-from db.orm.transfers_orm import get_transfer_by_id_movement, get_transfers_by_id_destination_credit
-from db.orm.withdraws_orm import get_withdraw_by_id_movement
+from db.orm.movements_orm import get_movement_by_id_movement, force_termination_movement, \
+    get_movements_with_details_of_credit, get_payment_movements
 from schemas.fingerprint_model import FingerprintB64
 from schemas.movement_base import UserDataMovement, MovementTypeRequest
 from schemas.movement_complex import BasicExtraMovement, ExtraMovement, MovementExtraRequest
@@ -66,184 +63,103 @@ async def check_if_time_of_movement_is_valid(movement: DbMovement, minutes: int
         return False
 
 
-async def get_all_movements_of_credit(db: Session, id_credit: int) -> List[BasicExtraMovement]:
-    deposits = await get_deposit_movements_of_credit(db, id_credit)
-    payments = await get_payment_movements_of_credit(db, id_credit)
-    transfers = await get_transfer_movements_of_credit(db, id_credit)
-    withdraws = await get_withdraw_movements_of_credit(db, id_credit)
-
-    return deposits + payments + transfers + withdraws
-
-
-async def get_deposit_movements_of_credit(db: Session, id_credit: int) -> List[BasicExtraMovement]:
-    try:
-        deposits: List[DbDeposit] = get_deposits_by_id_destination_credit(db, id_credit)
-    except NotFoundException:
-        return []
-
-    if len(deposits) > 0:
-        movements = []
-        for deposit in deposits:
-            try:
-                movement: DbMovement = get_movement_by_id_movement(db, deposit.id_movement)
-            except NotFoundException:
-                pass
-            else:
-                extra_information = parse_DbDeposit_to_ExtraMovement(deposit)
-                extra_movement = parse_DbMovement_to_BasicExtraMovement(movement, extra_information)
-                movements.append(extra_movement)
-
-        return movements
-
-    return deposits
-
-
-async def get_payment_movements_of_credit(db: Session, id_credit: int) -> List[BasicExtraMovement]:
-    movements: List[DbMovement] = get_movements_by_id_credit_and_type(
-        db=db,
-        id_credit=id_credit,
-        type_movement=str(TypeMovement.payment.value)
-    )
-
-    if len(movements) > 0:
-        extra_movements = []
-        for movement in movements:
-            try:
-                payment: DbPayment = get_payment_by_id_movement(db, movement.id_movement)
-            except NotFoundException:
-                pass
-            else:
-                extra_information = parse_DbPayment_to_ExtraMovement(payment)
-                extra_movement = parse_DbMovement_to_BasicExtraMovement(movement, extra_information)
-                extra_movements.append(extra_movement)
-
-        return extra_movements
+async def get_all_movements_of_credit(
+        db: Session,
+        id_credit: int,
+        after_time: Optional[datetime] = None,
+        after_id_movement: Optional[int] = None,
+        limit: Optional[int] = None
+) -> List[BasicExtraMovement]:
+    """
+    Return the movements of the credit from the newest with a single query (see
+    get_movements_with_details_of_credit). A transfer between two accounts of the same credit is returned twice,
+    as income and as outgoings.
+    """
+    rows = get_movements_with_details_of_credit(db, id_credit, after_time, after_id_movement, limit)
+
+    movements = []
+    for movement, deposit, payment, transfer, withdraw in rows:
+        extra_information = []
+
+        if deposit is not None and deposit.id_destination_credit == id_credit:
+            extra_information.append(parse_DbDeposit_to_ExtraMovement(deposit))
+
+        if movement.id_credit == id_credit:
+            if payment is not None and movement.type_movement == TypeMovement.payment.value:
+                extra_information.append(parse_DbPayment_to_ExtraMovement(payment))
+            elif withdraw is not None and movement.type_movement == TypeMovement.withdraw.value:
+                extra_information.append(parse_DbWithdraw_to_ExtraMovement(withdraw))
+
+        if transfer is not None:
+            if transfer.id_destination_credit == id_credit:
+                extra_information.append(
+                    parse_DbTransfer_to_ExtraMovement(transfer, str(NatureMovement.income.value))
+                )
+            if movement.id_credit == id_credit and movement.type_movement == TypeMovement.transfer.value:
+                extra_information.append(
+                    parse_DbTransfer_to_ExtraMovement(transfer, str(NatureMovement.outgoings.value))
+                )
+
+        for extra in extra_information:
+            movements.append(parse_DbMovement_to_BasicExtraMovement(movement, extra))
 
     return movements
 
 
-def get_payments_of_client(db: Session, id_client: str) -> PaymentComplexList:
-    movements = get_movements_by_id_requester_and_type(db, id_client, str(TypeMovement.payment.value))
-
-    if len(movements) > 0:
-        extra_movements = []
-        for movement in movements:
-            try:
-                payment: DbPayment = get_payment_by_id_movement(db, movement.id_movement)
-            except NotFoundException:
-                pass
-            else:
-                extra_information = parse_DbPayment_to_ExtraMovement(payment)
-                extra_movement = parse_DbMovement_to_BasicExtraMovement(movement, extra_information)
-                extra_movements.append(extra_movement)
-
-    else:
-        extra_movements = movements
+def get_payments_of_client(
+        db: Session,
+        id_client: str,
+        after_time: Optional[datetime] = None,
+        after_id_movement: Optional[int] = None,
+        limit: Optional[int] = None
+) -> PaymentComplexList:
+    rows = get_payment_movements(db, id_requester=id_client, after_time=after_time,
+                                 after_id_movement=after_id_movement, limit=limit)
 
     return PaymentComplexList(
-        payments=extra_movements
+        payments=[parse_payment_row_to_BasicExtraMovement(row) for row in rows]
     )
 
 
-def get_payments_of_market(db: Session, id_market: str) -> PaymentComplexList:
-    payments = get_payments_by_id_market(db, id_market)
-
-    if len(payments) > 0:
-        extra_movements = []
-        for payment in payments:
-            try:
-                movement = get_movement_by_id_movement(db, payment.id_movement)
-            except NotFoundException:
-                pass
-            else:
-                extra_information = parse_DbPayment_to_ExtraMovement(payment, str(NatureMovement.income.value))
-                extra_movement = parse_DbMovement_to_BasicExtraMovement(movement, extra_information)
-                extra_movements.append(extra_movement)
-
-    else:
-        extra_movements = payments
+def get_payments_of_market(
+        db: Session,
+        id_market: str,
+        after_time: Optional[datetime] = None,
+        after_id_movement: Optional[int] = None,
+        limit: Optional[int] = None
+) -> PaymentComplexList:
+    rows = get_payment_movements(db, id_market=id_market, after_time=after_time,
+                                 after_id_movement=after_id_movement, limit=limit)
 
     return PaymentComplexList(
-        payments=extra_movements
+        payments=[parse_payment_row_to_BasicExtraMovement(row, str(NatureMovement.income.value)) for row in rows]
     )
 
 
-async def get_transfer_movements_of_credit(db: Session, id_credit: int) -> List[BasicExtraMovement]:
-    income_transfers = await get_income_transfers_of_credit(db, id_credit)
-    outgoings_transfers = await get_outgoings_transfers_of_credit(db, id_credit)
-
-    return income_transfers + outgoings_transfers
-
-
-async def get_income_transfers_of_credit(db: Session, id_credit: int) -> List[BasicExtraMovement]:
-    try:
-        transfers: List[DbTransfer] = get_transfers_by_id_destination_credit(db, id_credit)
-    except NotFoundException:
-        return []
-
-    if len(transfers) > 0:
-        extra_movements = []
-        for transfer in transfers:
-            try:
-                movement: DbMovement = get_movement_by_id_movement(db, transfer.id_movement)
-            except NotFoundException:
-                pass
-            else:
-                extra_information = parse_DbTransfer_to_ExtraMovement(transfer, str(NatureMovement.income.value))
-                extra_movement = parse_DbMovement_to_BasicExtraMovement(movement, extra_information)
-                extra_movements.append(extra_movement)
-
-        return extra_movements
-
-    return transfers
-
-
-async def get_outgoings_transfers_of_credit(db: Session, id_credit: int) -> List[BasicExtraMovement]:
-    movements: List[DbMovement] = get_movements_by_id_credit_and_type(
-        db=db,
-        id_credit=id_credit,
-        type_movement=str(TypeMovement.transfer.value)
-    )
-
-    if len(movements) > 0:
-        extra_movements = []
-        for movement in movements:
-            try:
-                transfer: DbTransfer = get_transfer_by_id_movement(db, movement.id_movement)
-            except NotFoundException:
-                pass
-            else:
-                extra_information = parse_DbTransfer_to_ExtraMovement(transfer, str(NatureMovement.outgoings.value))
-                extra_movement = parse_DbMovement_to_BasicExtraMovement(movement, extra_information)
-                extra_movements.append(extra_movement)
-
-        return extra_movements
-
-    return movements
-
-
-async def get_withdraw_movements_of_credit(db: Session, id_credit: int) -> List[BasicExtraMovement]:
-    movements: List[DbMovement] = get_movements_by_id_credit_and_type(
-        db=db,
-        id_credit=id_credit,
-        type_movement=str(TypeMovement.withdraw.value)
-    )
-
-    if len(movements) > 0:
-        extra_movements = []
-        for movement in movements:
-            try:
-                withdraw: DbWithdraw = get_withdraw_by_id_movement(db, movement.id_movement)
-            except NotFoundException:
-                pass
-            else:
-                extra_information = parse_DbWithdraw_to_ExtraMovement(withdraw)
-                extra_movement = parse_DbMovement_to_BasicExtraMovement(movement, extra_information)
-                extra_movements.append(extra_movement)
-
-        return extra_movements
+def stream_payments_of_user(
+        db: Session,
+        type_user: str,
+        id_type: str,
+        after_time: Optional[datetime] = None,
+        after_id_movement: Optional[int] = None,
+        limit: Optional[int] = None
+) -> Iterator[BasicExtraMovement]:
+    """
+    Return the payments of a client or a market as an iterator that reads them from a server-side cursor, so the
+    memory does not grow with the history
+    """
+    if type_user == TypeUser.client.value:
+        rows = get_payment_movements(db, id_requester=id_type, after_time=after_time,
+                                     after_id_movement=after_id_movement, limit=limit, stream=True)
+        nature_movement = str(NatureMovement.outgoings.value)
+    elif type_user == TypeUser.market.value or type_user == TypeUser.system.value:
+        rows = get_payment_movements(db, id_market=id_type, after_time=after_time,
+                                     after_id_movement=after_id_movement, limit=limit, stream=True)
+        nature_movement = str(NatureMovement.income.value)
+    else:
+        raise type_of_value_not_compatible
 
-    return movements
+    return (parse_payment_row_to_BasicExtraMovement(row, nature_movement) for row in rows)
 
 
 async def create_summary_of_movement(
@@ -742,6 +658,16 @@ def parse_DbMovement_to_BasicExtraMovement(
     )
 
 
+def parse_payment_row_to_BasicExtraMovement(
+        row: tuple,
+        nature_movement: str = NatureMovement.outgoings.value
+) -> BasicExtraMovement:
+    movement, payment = row
+    extra_information = parse_DbPayment_to_ExtraMovement(payment, nature_movement)
+
+    return parse_DbMovement_to_BasicExtraMovement(movement, extra_information)
+
+
 def parse_DbDeposit_to_ExtraMovement(deposit: DbDeposit) -> ExtraMovement:
     return ExtraMovement(
         id_detail=deposit.id_deposit,
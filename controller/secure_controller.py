@@ -1,4 +1,5 @@
-from typing import Union, Optional, List, Tuple
+from itertools import islice
+from typing import Union, Optional, List, Tuple, Iterable, Iterator, Callable
 
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
@@ -85,6 +86,26 @@ def cipher_response_message(
     return secure_base_response
 
 
+def cipher_response_in_batches(
+        items: Iterable[BaseModel],
+        pack: Callable[[list], BaseModel],
+        db: Session,
+        id_user: int,
+        batch_size: int = 200
+) -> Iterator[SecureBase]:
+    """
+    Cipher a stream of items in batches: every batch of batch_size items is packed with pack (e.g. into a
+    PaymentComplexList) and ciphered as one secure response. The public key of the user is read once.
+    """
+    public_key_pem = get_public_key_pem(db, id_user)
+
+    items = iter(items)
+    batch = list(islice(items, batch_size))
+    while batch:
+        yield cipher_response_message(response=pack(batch), without_auth=True, user_pem=public_key_pem)
+        batch = list(islice(items, batch_size))
+
+
 async def cipher_minutiae_and_core_points(minutiae: List[Minutiae], c_points: List[CorePoint]) -> Tuple[str, str]:
     minutiae_str = get_json_of_minutiae_list(minutiae)
     # print(len(fingerprint.get_minutiae_list()))
@@ -1,3 +1,4 @@
+import asyncio
 from typing import Union, Tuple, Optional, List
 
 from sqlalchemy.orm import Session
@@ -15,6 +16,7 @@ from db.orm.markets_orm import create_market, get_market_by_id_market
 from db.orm.outstanding_payments_orm import create_outstanding_payment
 from db.orm.users_orm import create_user
 from db.orm.exceptions_orm import type_of_value_not_compatible, wrong_data_sent_exception, option_not_found_exception
+from core.process_pool import fingerprint_pool
 from core.utils import check_email
 from fingerprint_process.utils.utils import get_quality_of_fingerprint
 from schemas.admin_complex import AdminFullRequest, AdminFullDisplay
@@ -245,19 +247,24 @@ async def check_quality_of_fingerprints(
     is_there_a_good_sample = False
     fingerprint_summary = []
     try:
-        count = 0
-        for sample in fingerprints.fingerprints:
-            fingerprint_name = 'Fingerprint-' + str(count)
-            fingerprint_data = get_quality_of_fingerprint(sample, fingerprint_name, return_data='full')
-
+        # All the samples are scored at the same time by the process pool
+        samples_data = await asyncio.gather(*[
+            fingerprint_pool.run(
+                get_quality_of_fingerprint,
+                sample,
+                'Fingerprint-' + str(count),
+                return_data='full'
+            )
+            for count, sample in enumerate(fingerprints.fingerprints)
+        ])
+
+        for count, fingerprint_data in enumerate(samples_data):
             if isinstance(fingerprint_data, dict):
                 if fingerprint_data['quality'] == 'good':
                     fingerprint_data['pos'] = count
                     fingerprint_summary.append(fingerprint_data)
                     is_there_a_good_sample = True
 
-            count = count + 1
-
     except Exception as e:
         print(e)
         raise e
@@ -11,6 +11,28 @@ from core.secret_manager import access_secret_version
 
 BOUND_TEST_ENTRYPOINTS: bool = False
 ON_CLOUD: bool = True
+PRECOMPUTE_FILTER_BANKS: bool = True
+# Process pool which describes fingerprints out of the event loop
+FINGERPRINT_WORKERS: int = 2
+FINGERPRINT_QUEUE_DEPTH: int = 8
+FINGERPRINT_JOB_TIMEOUT: float = 30.0
+# 1:N identification over the main fingerprints of all the clients
+IDENTIFICATION_WORKERS: int = 2
+IDENTIFICATION_MAX_CANDIDATES: int = 2000
+IDENTIFICATION_TOP_K: int = 5
+# Seconds after which the gallery is loaded again, it bounds how long another worker of the server uses an old one
+IDENTIFICATION_GALLERY_TIME: int = 300
+# Templates of the main fingerprint of the clients, kept in each worker (LRU) and optionally shared in Redis
+TEMPLATE_CACHE_SIZE: int = 1024
+TEMPLATE_CACHE_TIME: int = 600
+TEMPLATE_CACHE_REDIS: bool = True
+# Bounds of the MatchingTree search, once one is reached the biggest tree found so far is used
+MATCHING_MAX_EXPLORED_EDGES: int = 100000
+MATCHING_TIME_BUDGET: float = 2.0
+# Save and read the minutiae and core points of the fingerprints also packed in fingerprints.template. Turn it on
+# only once the column exists:
+#   ALTER TABLE fingerprints ADD COLUMN IF NOT EXISTS template BYTEA;
+PACKED_TEMPLATES: bool = False
 
 
 class Settings(object):
@@ -0,0 +1,124 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, Dict, Optional, Set
+
+from core.config import FINGERPRINT_JOB_TIMEOUT, FINGERPRINT_QUEUE_DEPTH, FINGERPRINT_WORKERS, \
+    PRECOMPUTE_FILTER_BANKS
+from db.orm.exceptions_orm import fingerprint_service_busy_exception, fingerprint_service_timeout_exception
+from fingerprint_process.preprocessing.gabor_filter_bank import precompute_gabor_filter_banks
+
+
+def _initialize_worker() -> None:
+    # Each worker has its own filter bank cache
+    if PRECOMPUTE_FILTER_BANKS:
+        precompute_gabor_filter_banks()
+
+
+def _run_in_worker(func: Callable, hold: float) -> tuple:
+    # The job keeps its worker busy for a moment, so the other jobs sent at the same time go to the other workers
+    result = func()
+    time.sleep(hold)
+
+    return os.getpid(), result
+
+
+class FingerprintProcessPool(object):
+    """
+    Bounded process pool used to describe fingerprints and compute their quality without blocking the event loop.
+    At most max_workers jobs run at the same time and queue_depth more can wait for a worker; any other job is
+    rejected with HTTP 503 until one of them finishes.
+    """
+
+    def __init__(
+            self,
+            max_workers: int = FINGERPRINT_WORKERS,
+            queue_depth: int = FINGERPRINT_QUEUE_DEPTH,
+            timeout: Optional[float] = FINGERPRINT_JOB_TIMEOUT
+    ):
+        self._max_workers = max_workers
+        self._queue_depth = queue_depth
+        self._timeout = timeout
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending_jobs: Set[Future] = set()
+
+    def start(self) -> None:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self._max_workers, initializer=_initialize_worker)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._pending_jobs.clear()
+
+    def restart(self, broken_executor: ProcessPoolExecutor) -> None:
+        """
+        Replace a pool whose worker died (e.g. out of memory) for the next requests. Every job of the broken pool
+        fails at once, so it is only replaced when it is still the current one.
+        """
+        if self._executor is broken_executor:
+            self.shutdown()
+            self.start()
+
+    def is_running(self) -> bool:
+        return self._executor is not None
+
+    def get_pending_jobs(self) -> int:
+        return len(self._pending_jobs)
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Execute func(*args, **kwargs) in a worker process and wait for its result. func and its arguments must be
+        picklable. When the pool has not been started (scripts and tests) the job runs in the current process.
+
+        :return: The value returned by func
+        """
+        if self._executor is None:
+            return func(*args, **kwargs)
+
+        if len(self._pending_jobs) >= self._max_workers + self._queue_depth:
+            raise fingerprint_service_busy_exception
+
+        executor = self._executor
+        try:
+            future = executor.submit(partial(func, *args, **kwargs))
+        except BrokenProcessPool:
+            self.restart(executor)
+            raise fingerprint_service_busy_exception
+
+        # A job keeps its place until the worker finishes it, even if the request stopped waiting
+        self._pending_jobs.add(future)
+        future.add_done_callback(self._pending_jobs.discard)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self._timeout)
+        except asyncio.TimeoutError:
+            raise fingerprint_service_timeout_exception
+        except BrokenProcessPool:
+            # The worker died while it ran this job or one of the jobs in the queue
+            self.restart(executor)
+            raise fingerprint_service_busy_exception
+
+
+    async def run_in_workers(self, func: Callable, hold: float = 0.2) -> Dict[int, Any]:
+        """
+        Execute func() once per worker (e.g. to read the caches of the workers). One job is sent per worker and each
+        of them holds its worker for hold seconds, so the idle workers take one job each; a worker that takes two
+        jobs is only reported once.
+
+        :return: (dict) The value returned by func in each worker that answered, by pid
+        """
+        if self._executor is None:
+            return {os.getpid(): func()}
+
+        results = await asyncio.gather(*(self.run(_run_in_worker, func, hold) for _ in range(self._max_workers)))
+
+        return dict(results)
+
+
+fingerprint_pool = FingerprintProcessPool()
@@ -0,0 +1,156 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional, Tuple
+
+from redis import Redis
+
+from core.config import TEMPLATE_CACHE_SIZE, TEMPLATE_CACHE_TIME, TEMPLATE_CACHE_REDIS
+from core.utils import cast_bytes_to_base64, cast_base64_to_bytes
+from db.cache.cache import item_get, item_save
+from db.models.fingerprints_db import DbFingerprint
+from fingerprint_process.models.fingerprint_template import FingerprintTemplate
+from secure.cipher_secure import cipher_data, decipher_data
+
+
+class TemplateCache(object):
+    """
+    In-process LRU cache of serialized templates, keyed by (id_client, id_fingerprint) and tagged with the version
+    of the fingerprint (see get_template_version). An entry of another version is never returned, an entry expires
+    `seconds` after it was saved and the least recently used one is dropped when the cache is full.
+    """
+
+    def __init__(self, max_size: int = TEMPLATE_CACHE_SIZE, seconds: int = TEMPLATE_CACHE_TIME):
+        super().__init__()
+        self._max_size = max_size
+        self._seconds = seconds
+        self._items: 'OrderedDict[Tuple[str, str], Tuple[float, str, bytes]]' = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, id_client: str, id_fingerprint: str, version: str) -> Optional[bytes]:
+        key = (id_client, id_fingerprint)
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+
+            expires_at, item_version, data = item
+            if expires_at <= time.monotonic() or item_version != version:
+                del self._items[key]
+                return None
+
+            self._items.move_to_end(key)
+
+            return data
+
+    def save(self, id_client: str, id_fingerprint: str, version: str, data: bytes) -> None:
+        key = (id_client, id_fingerprint)
+        with self._lock:
+            self._items[key] = (time.monotonic() + self._seconds, version, data)
+            self._items.move_to_end(key)
+
+            while len(self._items) > self._max_size:
+                self._items.popitem(last=False)
+
+    def invalidate(self, id_client: Optional[str] = None, id_fingerprint: Optional[str] = None) -> None:
+        """
+        Drop every template of the client, of the fingerprint or both
+        """
+        with self._lock:
+            for key in [key for key in self._items if key[0] == id_client or key[1] == id_fingerprint]:
+                del self._items[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def get_size(self) -> int:
+        return len(self._items)
+
+
+template_cache = TemplateCache()
+
+
+def get_template_version(fingerprint: DbFingerprint) -> str:
+    """
+    Return the version of the points of the fingerprint. updated_time is set in the same transaction as every
+    change of its minutiae or core points (see set_fingerprint_template), so a template saved before the change is
+    never read again, neither by this worker nor by the others.
+    """
+    changed_time = fingerprint.updated_time if fingerprint.updated_time is not None else fingerprint.created_time
+    if changed_time is None:
+        return '0'
+
+    return changed_time.strftime('%Y%m%d%H%M%S%f')
+
+
+def get_template_key(id_client: str, id_fingerprint: str, version: str) -> str:
+    return f'TPL-{id_client}-{id_fingerprint}-{version}'
+
+
+def get_cached_template(
+        id_client: str,
+        id_fingerprint: str,
+        version: str,
+        r: Optional[Redis] = None
+) -> Optional[FingerprintTemplate]:
+    """
+    Look for the template of that version in the cache of the worker and then, when r is given, in Redis. A
+    template found in Redis is also saved in the cache of the worker.
+    """
+    data = template_cache.get(id_client, id_fingerprint, version)
+
+    if data is None and r is not None and TEMPLATE_CACHE_REDIS:
+        template_secure = item_get(r, get_template_key(id_client, id_fingerprint, version))
+        if template_secure is not None:
+            data = cast_base64_to_bytes(decipher_data(template_secure))
+            template_cache.save(id_client, id_fingerprint, version, data)
+
+    if data is None:
+        return None
+
+    return FingerprintTemplate.from_bytes(data)
+
+
+def save_template_in_cache(
+        id_client: str,
+        id_fingerprint: str,
+        version: str,
+        template: FingerprintTemplate,
+        r: Optional[Redis] = None
+) -> None:
+    """
+    Save the template in the cache of the worker and, when r is given, ciphered in Redis
+    """
+    data = template.to_bytes()
+    template_cache.save(id_client, id_fingerprint, version, data)
+
+    if r is not None and TEMPLATE_CACHE_REDIS:
+        item_save(r, get_template_key(id_client, id_fingerprint, version), cipher_data(cast_bytes_to_base64(data)),
+                  TEMPLATE_CACHE_TIME)
+
+
+def delete_templates_in_redis(r: Optional[Redis], pattern: str) -> None:
+    if r is not None and TEMPLATE_CACHE_REDIS:
+        keys = list(r.scan_iter(match=pattern))
+        if keys:
+            r.delete(*keys)
+
+
+def invalidate_client_templates(id_client: str, r: Optional[Redis] = None) -> None:
+    """
+    Drop the templates of the client from the cache of the worker and, when r is given, from Redis. It must be
+    called once the change is committed. The caches of the other workers (and Redis when r is None) keep their
+    entries, but they are of an older version and expire with TEMPLATE_CACHE_TIME.
+    """
+    template_cache.invalidate(id_client=id_client)
+    delete_templates_in_redis(r, get_template_key(id_client, '*', '*'))
+
+
+def invalidate_fingerprint_template(id_fingerprint: str, r: Optional[Redis] = None) -> None:
+    """
+    Drop the templates of the fingerprint from the cache of the worker and, when r is given, from Redis. It must
+    be called once the change is committed.
+    """
+    template_cache.invalidate(id_fingerprint=id_fingerprint)
+    delete_templates_in_redis(r, get_template_key('*', id_fingerprint, '*'))
@@ -1,6 +1,6 @@
 from sqlalchemy import Column, ForeignKey
-from sqlalchemy.orm import relationship
-from sqlalchemy.sql.sqltypes import String, Float, Boolean, DateTime
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.sql.sqltypes import String, Float, Boolean, DateTime, LargeBinary
 
 from db.database import Base
 
@@ -19,6 +19,8 @@ class DbFingerprint(Base):
     created_time = Column('created_time', DateTime(timezone=False))
     updated_time = Column('updated_time', DateTime(timezone=False))
     dropped = Column('dropped', Boolean)
+    # Packed minutiae and core points (FingerprintTemplate.to_bytes), NULL when the rows must be read
+    template = deferred(Column('template', LargeBinary, nullable=True))
 
     client = relationship(
         "db.models.clients_db.DbClient",
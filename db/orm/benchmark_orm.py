@@ -0,0 +1,87 @@
+import sys
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from db.database import SessionLocal
+from db.models.cores_db import DbCores
+from db.models.minutiae_db import DbMinutiae
+from db.orm.cores_orm import insert_list_of_core_points
+from db.orm.functions_orm import multiple_attempts, full_database_exceptions
+from db.orm.minutiae_orm import insert_list_of_minutiae
+from fingerprint_process.models.fingerprint_template import FingerprintTemplate
+from fingerprint_process.utils.benchmark import describe_sample_fingerprint, show_results, time_function
+
+
+@multiple_attempts
+@full_database_exceptions
+def add_point_row(db: Session, point) -> None:
+    db.add(point)
+
+
+def insert_points_row_by_row(db: Session, template: FingerprintTemplate, id_fingerprint: str) -> None:
+    # Path used before the bulk insertion: one ORM object (and two decorators) per point, as create_minutia and
+    # create_core_point did before they also cleared the packed template
+    for minutia in template.get_minutiae_list():
+        add_point_row(db, DbMinutiae(
+            id_minutia=f"MNT-{minutia.get_minutiae_id()}",
+            id_fingerprint=id_fingerprint,
+            pos_x=minutia.get_posx(),
+            pos_y=minutia.get_posy(),
+            angle=round(minutia.get_angle(), 2),
+            type_minutia=minutia.get_point_type()
+        ))
+
+    for core_point in template.get_core_point_list():
+        add_point_row(db, DbCores(
+            id_core=f"COR-{core_point.get_minutiae_id()}",
+            id_fingerprint=id_fingerprint,
+            pos_x=core_point.get_posx(),
+            pos_y=core_point.get_posy(),
+            angle=round(core_point.get_angle(), 2),
+            type_core=core_point.get_point_type()
+        ))
+
+    db.flush()
+
+
+def insert_points_in_bulk(db: Session, template: FingerprintTemplate, id_fingerprint: str) -> None:
+    insert_list_of_minutiae(db, template.get_minutiae_list(), id_fingerprint, execute='wait')
+    insert_list_of_core_points(db, template.get_core_point_list(), id_fingerprint, execute='wait')
+
+
+def time_inside_savepoint(db: Session, func: Callable, repeat: int) -> float:
+    """
+    Time func inside a savepoint that is rolled back every time, so nothing is written in the database
+    """
+    def run():
+        savepoint = db.begin_nested()
+        try:
+            func()
+        finally:
+            savepoint.rollback()
+
+    return time_function(run, repeat=repeat)
+
+
+def benchmark_point_insertion(db: Session, id_fingerprint: str, repeat: int = 10) -> dict:
+    """
+    Insert the points of the described sample for an existing fingerprint with the row by row path and with the
+    bulk path. New ids are created on every run because get_minutiae_list creates new points.
+    """
+    template = describe_sample_fingerprint().get_template()
+
+    return {
+        'row by row': time_inside_savepoint(db, lambda: insert_points_row_by_row(db, template, id_fingerprint), repeat),
+        'bulk': time_inside_savepoint(db, lambda: insert_points_in_bulk(db, template, id_fingerprint), repeat)
+    }
+
+
+if __name__ == '__main__':
+    # python -m db.orm.benchmark_orm <id_fingerprint>
+    session = SessionLocal()
+    try:
+        show_results('Insertion of the points of the sample', benchmark_point_insertion(session, sys.argv[1]))
+    finally:
+        session.rollback()
+        session.close()
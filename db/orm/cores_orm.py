@@ -1,12 +1,16 @@
 from typing import List, Optional
 
 from fastapi import HTTPException
+from redis import Redis
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
+from db.cache.template_cache import invalidate_fingerprint_template
 from db.models.cores_db import DbCores
+from db.models.fingerprints_db import DbFingerprint
 from db.orm.exceptions_orm import element_not_found_exception, not_values_sent_exception, \
     option_not_found_exception, operation_need_a_precondition_exception
-from db.orm.fingerprints_orm import get_fingerprint_by_id
+from db.orm.fingerprints_orm import get_fingerprint_by_id, set_fingerprint_template
 from db.orm.functions_orm import multiple_attempts, full_database_exceptions
 from fingerprint_process.models.core_point import CorePoint
 from schemas.basic_response import BasicResponse
@@ -18,7 +22,8 @@ def create_core_point(
         db: Session,
         request: CorePoint,
         id_fingerprint: str,
-        execute: str = 'now'
+        execute: str = 'now',
+        r: Optional[Redis] = None
 ) -> bool:
     id_core = f"COR-{request.get_minutiae_id()}"
 
@@ -33,6 +38,7 @@ def create_core_point(
 
     try:
         db.add(new_core_point)
+        set_fingerprint_template(db, id_fingerprint, None, execute='wait')
         if execute == 'now':
             db.commit()
         elif execute == 'wait':
@@ -47,23 +53,45 @@ def create_core_point(
         print(e)
         raise e
 
+    if execute == 'now':
+        invalidate_fingerprint_template(id_fingerprint, r)
+
     return True
 
 
+def get_core_point_rows(points: List[CorePoint], id_fingerprint: str) -> List[dict]:
+    return [
+        {
+            'id_core': f"COR-{point.get_minutiae_id()}",
+            'id_fingerprint': id_fingerprint,
+            'pos_x': point.get_posx(),
+            'pos_y': point.get_posy(),
+            'angle': round(point.get_angle(), 2),
+            'type_core': point.get_point_type()
+        }
+        for point in points
+    ]
+
+
 @multiple_attempts
 @full_database_exceptions
 def insert_list_of_core_points(
         db: Session,
         core_points: List[CorePoint],
         id_fingerprint: str,
-        execute: str = 'now'
+        execute: str = 'now',
+        r: Optional[Redis] = None
 ) -> bool:
+    """
+    Insert all the core points of a fingerprint with a single INSERT ... VALUES statement, inside the
+    transaction of db
+    """
     if core_points is None or len(core_points) < 1:
         raise not_values_sent_exception
 
     try:
-        for core_point in core_points:
-            create_core_point(db, core_point, id_fingerprint, execute='wait')
+        db.execute(insert(DbCores).values(get_core_point_rows(core_points, id_fingerprint)))
+        set_fingerprint_template(db, id_fingerprint, None, execute='wait')
 
         if execute == 'now':
             db.commit()
@@ -77,6 +105,9 @@ def insert_list_of_core_points(
         print(e)
         raise e
 
+    if execute == 'now':
+        invalidate_fingerprint_template(id_fingerprint, r)
+
     return True
 
 
@@ -114,13 +145,39 @@ def get_core_points_by_id_fingerprint(db: Session, id_fingerprint: str) -> List[
     return core_points
 
 
+@multiple_attempts
+@full_database_exceptions
+def get_core_points_of_main_fingerprints(db: Session) -> List[tuple]:
+    """
+    Return the core points of the main fingerprint of every client as rows (id_client, pos_x, pos_y, angle,
+    type_core), sorted by id_client so the points of each client come together
+    """
+    try:
+        rows = db.query(
+            DbFingerprint.id_client, DbCores.pos_x, DbCores.pos_y, DbCores.angle, DbCores.type_core
+        ).join(
+            DbFingerprint, DbFingerprint.id_fingerprint == DbCores.id_fingerprint
+        ).where(
+            DbFingerprint.main_fingerprint == True,
+            DbFingerprint.dropped == False
+        ).order_by(
+            DbFingerprint.id_client
+        ).all()
+    except Exception as e:
+        print(e)
+        raise e
+
+    return rows
+
+
 @multiple_attempts
 @full_database_exceptions
 def delete_core_point(
         db: Session,
         id_core: Optional[str] = None,
         core_object: Optional[DbCores] = None,
-        execute: str = 'now'
+        execute: str = 'now',
+        r: Optional[Redis] = None
 ) -> BasicResponse:
     if core_object is None:
         if id_core is not None:
@@ -128,8 +185,11 @@ def delete_core_point(
         else:
             raise not_values_sent_exception
 
+    id_fingerprint = core_object.id_fingerprint
+
     try:
         db.delete(core_object)
+        set_fingerprint_template(db, id_fingerprint, None, execute='wait')
         if execute == 'now':
             db.commit()
         elif execute == 'wait':
@@ -144,6 +204,9 @@ def delete_core_point(
         print(e)
         raise e
 
+    if execute == 'now':
+        invalidate_fingerprint_template(id_fingerprint, r)
+
     return BasicResponse(
         operation="Delete",
         successful=True
@@ -271,6 +271,17 @@ bad_quality_fingerprint_exception = HTTPException(
     detail="All fingerprint samples are of low quality. Please capture new samples"
 )
 
+fingerprint_service_busy_exception = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Too many fingerprints are being processed. Please try later.",
+    headers={"Retry-After": "5"}
+)
+
+fingerprint_service_timeout_exception = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Fingerprint took too long to be processed. Please try later."
+)
+
 uncreated_fingerprint_exception = HTTPException(
     status_code=status.HTTP_418_IM_A_TEAPOT,
     detail=f"Fingerprint could not be created"
@@ -2,8 +2,11 @@ from datetime import datetime
 from typing import List, Optional
 import uuid
 
-from sqlalchemy.orm import Session
+from redis import Redis
+from sqlalchemy.orm import Session, undefer
 
+from core.config import PACKED_TEMPLATES
+from db.cache.template_cache import invalidate_client_templates, invalidate_fingerprint_template
 from db.models.addresses_db import DbAddress  # Don't erase because it is used by relationship
 from db.models.branches_db import DbBranch  # Don't erase because it is used by relationship
 from db.models.clients_db import DbClient  # Don't erase because it is used by relationship
@@ -20,7 +23,12 @@ from schemas.fingerprint_base import FingerprintRequest, FingerprintUpdateReques
 
 @multiple_attempts
 @full_database_exceptions
-def create_fingerprint(db: Session, request: FingerprintRequest, execute: str = 'now') -> DbFingerprint:
+def create_fingerprint(
+        db: Session,
+        request: FingerprintRequest,
+        execute: str = 'now',
+        r: Optional[Redis] = None
+) -> DbFingerprint:
     try:
         get_client_fingerprint_by_alias(db, request.id_client, request.alias_fingerprint)
     except NotFoundException:
@@ -63,6 +71,9 @@ def create_fingerprint(db: Session, request: FingerprintRequest, execute: str =
             print(e)
             raise e
 
+        if execute == 'now':
+            invalidate_client_templates(request.id_client, r)
+
         return new_fingerprint
 
     raise not_unique_alias_exception
@@ -121,7 +132,12 @@ def get_fingerprints_by_id_client(db: Session, id_client: str, mode: str = 'acti
 @full_database_exceptions
 def get_main_fingerprint_of_client(db: Session, id_client: str) -> DbFingerprint:
     try:
-        fingerprint = db.query(DbFingerprint).where(
+        query = db.query(DbFingerprint)
+        if PACKED_TEMPLATES:
+            # The packed template is read in the same query, it is what the main fingerprint is looked up for
+            query = query.options(undefer(DbFingerprint.template))
+
+        fingerprint = query.where(
             DbFingerprint.id_client == id_client,
             DbFingerprint.main_fingerprint == True,
             DbFingerprint.dropped == False
@@ -284,6 +300,49 @@ def light_update(
     return fingerprint
 
 
+@multiple_attempts
+@full_database_exceptions
+def set_fingerprint_template(
+        db: Session,
+        id_fingerprint: str,
+        template: Optional[bytes],
+        execute: str = 'now',
+        r: Optional[Redis] = None
+) -> bool:
+    """
+    Save the packed minutiae and core points of the fingerprint. It is set to None whenever its rows change, so
+    the packed column is either NULL or the same as the minutiae and cores tables. The column is only written with
+    PACKED_TEMPLATES on.
+
+    updated_time is changed in the same transaction, so the cached templates of the fingerprint (whose key holds
+    updated_time) are no longer read once it is committed. With execute='wait' the caller must invalidate the
+    template after its commit.
+    """
+    values = {DbFingerprint.updated_time: datetime.utcnow()}
+    if PACKED_TEMPLATES:
+        values[DbFingerprint.template] = template
+
+    db.query(DbFingerprint).where(
+        DbFingerprint.id_fingerprint == id_fingerprint
+    ).update(values, synchronize_session=False)
+
+    if execute == 'now':
+        try:
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(e)
+            raise e
+
+        invalidate_fingerprint_template(id_fingerprint, r)
+    elif execute == 'wait':
+        pass
+    else:
+        raise option_not_found_exception
+
+    return True
+
+
 @multiple_attempts
 @full_database_exceptions
 def change_main_fingerprint(
@@ -291,7 +350,8 @@ def change_main_fingerprint(
         change_main_to: bool,
         id_new_main_fingerprint: Optional[str] = None,
         new_main_fingerprint: Optional[DbFingerprint] = None,
-        execute: str = 'now'
+        execute: str = 'now',
+        r: Optional[Redis] = None
 ) -> bool:
 
     if new_main_fingerprint is None:
@@ -322,6 +382,9 @@ def change_main_fingerprint(
         print(e)
         raise e
 
+    if execute == 'now':
+        invalidate_client_templates(fingerprint.id_client, r)
+
     return True
 
 
@@ -368,7 +431,12 @@ def change_alias_fingerprint(
 
 @multiple_attempts
 @full_database_exceptions
-def delete_fingerprint(db: Session, id_fingerprint: str, execute: str = 'now') -> BasicResponse:
+def delete_fingerprint(
+        db: Session,
+        id_fingerprint: str,
+        execute: str = 'now',
+        r: Optional[Redis] = None
+) -> BasicResponse:
     fingerprint = get_fingerprint_by_id(db, id_fingerprint)
     if fingerprint.main_fingerprint:
         try:
@@ -393,6 +461,9 @@ def delete_fingerprint(db: Session, id_fingerprint: str, execute: str = 'now') -
         print(e)
         raise e
 
+    if execute == 'now':
+        invalidate_client_templates(fingerprint.id_client, r)
+
     return BasicResponse(
         operation="delete",
         successful=True
@@ -401,7 +472,12 @@ def delete_fingerprint(db: Session, id_fingerprint: str, execute: str = 'now') -
 
 @multiple_attempts
 @full_database_exceptions
-def delete_fingerprints_by_id_client(db: Session, id_client: str, execute: str = 'now') -> BasicResponse:
+def delete_fingerprints_by_id_client(
+        db: Session,
+        id_client: str,
+        execute: str = 'now',
+        r: Optional[Redis] = None
+) -> BasicResponse:
     client = get_client_by_id_client(db, id_client, mode='all')
     if not client.dropped:
         # It is necessary that the client is erased to drop all associated fingerprints
@@ -419,6 +495,8 @@ def delete_fingerprints_by_id_client(db: Session, id_client: str, execute: str =
             db.rollback()
             print(e)
             raise e
+
+        invalidate_client_templates(id_client, r)
     elif execute == 'wait':
         pass
     else:
@@ -1,11 +1,15 @@
 from typing import List, Optional
 
+from redis import Redis
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
+from db.cache.template_cache import invalidate_fingerprint_template
 from db.models.minutiae_db import DbMinutiae
+from db.models.fingerprints_db import DbFingerprint
 from db.orm.exceptions_orm import element_not_found_exception, not_values_sent_exception, \
     option_not_found_exception, operation_need_a_precondition_exception
-from db.orm.fingerprints_orm import get_fingerprint_by_id
+from db.orm.fingerprints_orm import get_fingerprint_by_id, set_fingerprint_template
 from db.orm.functions_orm import multiple_attempts, full_database_exceptions
 from fingerprint_process.models.minutia import Minutiae
 from schemas.basic_response import BasicResponse
@@ -17,7 +21,8 @@ def create_minutia(
         db: Session,
         request: Minutiae,
         id_fingerprint: str,
-        execute: str = 'now'
+        execute: str = 'now',
+        r: Optional[Redis] = None
 ) -> bool:
     id_minutia = f"MNT-{request.get_minutiae_id()}"
 
@@ -32,6 +37,7 @@ def create_minutia(
 
     try:
         db.add(new_minutia)
+        set_fingerprint_template(db, id_fingerprint, None, execute='wait')
         if execute == 'now':
             db.commit()
         elif execute == 'wait':
@@ -43,23 +49,45 @@ def create_minutia(
         print(e)
         raise e
 
+    if execute == 'now':
+        invalidate_fingerprint_template(id_fingerprint, r)
+
     return True
 
 
+def get_minutiae_rows(points: List[Minutiae], id_fingerprint: str) -> List[dict]:
+    return [
+        {
+            'id_minutia': f"MNT-{point.get_minutiae_id()}",
+            'id_fingerprint': id_fingerprint,
+            'pos_x': point.get_posx(),
+            'pos_y': point.get_posy(),
+            'angle': round(point.get_angle(), 2),
+            'type_minutia': point.get_point_type()
+        }
+        for point in points
+    ]
+
+
 @multiple_attempts
 @full_database_exceptions
 def insert_list_of_minutiae(
         db: Session,
         minutiae: List[Minutiae],
         id_fingerprint: str,
-        execute: str = 'now'
+        execute: str = 'now',
+        r: Optional[Redis] = None
 ) -> bool:
+    """
+    Insert all the minutiae of a fingerprint with a single INSERT ... VALUES statement, inside the
+    transaction of db
+    """
     if minutiae is None or len(minutiae) < 1:
         raise not_values_sent_exception
 
     try:
-        for minutia in minutiae:
-            create_minutia(db, minutia, id_fingerprint, execute='wait')
+        db.execute(insert(DbMinutiae).values(get_minutiae_rows(minutiae, id_fingerprint)))
+        set_fingerprint_template(db, id_fingerprint, None, execute='wait')
 
         if execute == 'now':
             db.commit()
@@ -72,8 +100,9 @@ def insert_list_of_minutiae(
         db.rollback()
         print(e)
         raise e
-    else:
-        db.commit()
+
+    if execute == 'now':
+        invalidate_fingerprint_template(id_fingerprint, r)
 
     return True
 
@@ -112,13 +141,39 @@ def get_minutiae_by_id_fingerprint(db: Session, id_fingerprint: str) -> List[DbM
     return minutiae
 
 
+@multiple_attempts
+@full_database_exceptions
+def get_minutiae_of_main_fingerprints(db: Session) -> List[tuple]:
+    """
+    Return the minutiae of the main fingerprint of every client as rows (id_client, pos_x, pos_y, angle,
+    type_minutia), sorted by id_client so the points of each client come together
+    """
+    try:
+        rows = db.query(
+            DbFingerprint.id_client, DbMinutiae.pos_x, DbMinutiae.pos_y, DbMinutiae.angle, DbMinutiae.type_minutia
+        ).join(
+            DbFingerprint, DbFingerprint.id_fingerprint == DbMinutiae.id_fingerprint
+        ).where(
+            DbFingerprint.main_fingerprint == True,
+            DbFingerprint.dropped == False
+        ).order_by(
+            DbFingerprint.id_client
+        ).all()
+    except Exception as e:
+        print(e)
+        raise e
+
+    return rows
+
+
 @multiple_attempts
 @full_database_exceptions
 def delete_minutia(
         db: Session,
         id_minutia: Optional[str] = None,
         minutia_object: Optional[DbMinutiae] = None,
-        execute: str = 'now'
+        execute: str = 'now',
+        r: Optional[Redis] = None
 ) -> BasicResponse:
     if minutia_object is None:
         if id_minutia is not None:
@@ -126,8 +181,11 @@ def delete_minutia(
         else:
             raise not_values_sent_exception
 
+    id_fingerprint = minutia_object.id_fingerprint
+
     try:
         db.delete(minutia_object)
+        set_fingerprint_template(db, id_fingerprint, None, execute='wait')
         if execute == 'now':
             db.commit()
         elif execute == 'wait':
@@ -139,6 +197,9 @@ def delete_minutia(
         print(e)
         raise e
 
+    if execute == 'now':
+        invalidate_fingerprint_template(id_fingerprint, r)
+
     return BasicResponse(
         operation="Delete",
         successful=True
@@ -1,21 +1,61 @@
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Union, Iterable
 
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_, tuple_
+from sqlalchemy.orm import Session, Query
 
+from db.models.deposits_db import DbDeposit
 from db.models.movements_db import DbMovement
+from db.models.payments_db import DbPayment
+from db.models.transfers_db import DbTransfer
+from db.models.withdraws_db import DbWithdraw
 from db.orm.clients_orm import get_client_by_id_client
 from db.orm.credits_orm import get_credit_by_id_credit
 from db.orm.exceptions_orm import wrong_data_sent_exception, not_identified_client_exception, \
     not_credit_of_client_exception, NotFoundException, option_not_found_exception, element_not_found_exception, \
     movement_in_process_exception, movement_finish_exception, movement_not_authorized_exception, \
-    type_of_value_not_compatible, movement_already_linked_exception
+    type_of_value_not_compatible, movement_already_linked_exception, not_values_sent_exception
 from db.orm.functions_orm import multiple_attempts, full_database_exceptions
 from db.orm.users_orm import get_user_by_id
 from schemas.movement_base import MovementRequest
 from schemas.type_movement import TypeMovement
 
+# Rows fetched on each round trip when a listing is streamed from a server-side cursor
+STREAM_BATCH_SIZE = 200
+
+
+def fetch_movements_page(
+        query: Query,
+        after_time: Optional[datetime] = None,
+        after_id_movement: Optional[int] = None,
+        limit: Optional[int] = None,
+        stream: bool = False
+) -> Union[List, Iterable]:
+    """
+    Sort the query of movements from the newest and keep the page after the movement given by its created_time and
+    id_movement (keyset pagination). When stream is True the rows are not fetched here: the returned query reads
+    them in batches of STREAM_BATCH_SIZE from a server-side cursor while it is iterated.
+
+    The cursor is made of both values, so wrong_data_sent_exception is raised when only one of them is sent.
+    """
+    if (after_time is None) != (after_id_movement is None):
+        raise wrong_data_sent_exception
+
+    if after_time is not None:
+        query = query.where(
+            tuple_(DbMovement.created_time, DbMovement.id_movement) < tuple_(after_time, after_id_movement)
+        )
+
+    query = query.order_by(DbMovement.created_time.desc(), DbMovement.id_movement.desc())
+    if limit is not None:
+        query = query.limit(limit)
+
+    if stream:
+        return query.yield_per(STREAM_BATCH_SIZE)
+
+    return query.all()
+
 
 @multiple_attempts
 @full_database_exceptions
@@ -114,28 +154,36 @@ def get_movements_by_id_credit(db: Session, id_credit: Optional[int]) -> List[Db
 
 @multiple_attempts
 @full_database_exceptions
-def get_movements_by_id_performer(db: Session, id_performer: int) -> List[DbMovement]:
-    movements = db.query(DbMovement).where(
+def get_movements_by_id_performer(
+        db: Session,
+        id_performer: int,
+        after_time: Optional[datetime] = None,
+        after_id_movement: Optional[int] = None,
+        limit: Optional[int] = None,
+        stream: bool = False
+) -> Union[List[DbMovement], Iterable[DbMovement]]:
+    query = db.query(DbMovement).where(
         DbMovement.id_performer == id_performer
-    ).all()
-
-    if movements is None:
-        return []
+    )
 
-    return movements
+    return fetch_movements_page(query, after_time, after_id_movement, limit, stream)
 
 
 @multiple_attempts
 @full_database_exceptions
-def get_movements_by_id_requester(db: Session, id_requester: Optional[str]) -> List[DbMovement]:
-    movements = db.query(DbMovement).where(
+def get_movements_by_id_requester(
+        db: Session,
+        id_requester: Optional[str],
+        after_time: Optional[datetime] = None,
+        after_id_movement: Optional[int] = None,
+        limit: Optional[int] = None,
+        stream: bool = False
+) -> Union[List[DbMovement], Iterable[DbMovement]]:
+    query = db.query(DbMovement).where(
         DbMovement.id_requester == id_requester
-    ).all()
-
-    if movements is None:
-        return []
+    )
 
-    return movements
+    return fetch_movements_page(query, after_time, after_id_movement, limit, stream)
 
 
 @multiple_attempts
@@ -175,6 +223,89 @@ def get_movements_by_id_credit_and_type(db: Session, id_credit: Optional[int], t
     return movements
 
 
+@multiple_attempts
+@full_database_exceptions
+def get_movements_with_details_of_credit(
+        db: Session,
+        id_credit: int,
+        after_time: Optional[datetime] = None,
+        after_id_movement: Optional[int] = None,
+        limit: Optional[int] = None
+) -> List[tuple]:
+    """
+    Return the movements of the credit joined with their deposit, payment, transfer and withdraw in a single query.
+    Each row is (DbMovement, DbDeposit, DbPayment, DbTransfer, DbWithdraw), where the tables that do not belong to
+    the movement are None.
+
+    The movements of the credit are its payments, transfers and withdraws, plus the deposits and transfers whose
+    destination is the credit. They are sorted from the newest, and the page after a movement is requested with
+    its created_time and id_movement (keyset pagination).
+    """
+    try:
+        query = db.query(DbMovement, DbDeposit, DbPayment, DbTransfer, DbWithdraw).outerjoin(
+            DbDeposit, DbDeposit.id_movement == DbMovement.id_movement
+        ).outerjoin(
+            DbPayment, DbPayment.id_movement == DbMovement.id_movement
+        ).outerjoin(
+            DbTransfer, DbTransfer.id_movement == DbMovement.id_movement
+        ).outerjoin(
+            DbWithdraw, DbWithdraw.id_movement == DbMovement.id_movement
+        ).where(
+            or_(
+                and_(
+                    DbMovement.id_credit == id_credit,
+                    DbMovement.type_movement.in_((
+                        str(TypeMovement.payment.value),
+                        str(TypeMovement.transfer.value),
+                        str(TypeMovement.withdraw.value)
+                    ))
+                ),
+                DbDeposit.id_destination_credit == id_credit,
+                DbTransfer.id_destination_credit == id_credit
+            )
+        )
+
+        rows = fetch_movements_page(query, after_time, after_id_movement, limit)
+    except Exception as e:
+        print(e)
+        raise e
+
+    return rows
+
+
+@multiple_attempts
+@full_database_exceptions
+def get_payment_movements(
+        db: Session,
+        id_requester: Optional[str] = None,
+        id_market: Optional[str] = None,
+        after_time: Optional[datetime] = None,
+        after_id_movement: Optional[int] = None,
+        limit: Optional[int] = None,
+        stream: bool = False
+) -> Union[List[tuple], Iterable[tuple]]:
+    """
+    Return the payments made by a client (id_requester) or received by a market (id_market) as rows
+    (DbMovement, DbPayment), joined in a single query and sorted from the newest (see fetch_movements_page)
+    """
+    if id_requester is None and id_market is None:
+        raise not_values_sent_exception
+
+    query = db.query(DbMovement, DbPayment).join(
+        DbPayment, DbPayment.id_movement == DbMovement.id_movement
+    ).where(
+        DbMovement.type_movement == str(TypeMovement.payment.value)
+    )
+
+    if id_requester is not None:
+        query = query.where(DbMovement.id_requester == id_requester)
+
+    if id_market is not None:
+        query = query.where(DbPayment.id_market == id_market)
+
+    return fetch_movements_page(query, after_time, after_id_movement, limit, stream)
+
+
 @multiple_attempts
 @full_database_exceptions
 def get_movements_by_id_requester_and_type(
@@ -8,6 +8,11 @@ from fingerprint_process.utils.error_message import ErrorMessage
 class Edge(ErrorMessage):
 
     def __init__(self, origin_minutiae, destination_minutiae, angle_tolerance=0.01) -> None:
+        """
+        :param origin_minutiae: (tuple) Position (posy, posx) of the origin minutia, other values after them (e.g.
+            the type) are ignored
+        :param destination_minutiae: (tuple) Position (posy, posx) of the destination minutia
+        """
         super().__init__()
         self.__origin_minutiae = origin_minutiae
         self.__destination_minutiae = destination_minutiae
@@ -34,10 +39,10 @@ class Edge(ErrorMessage):
         FOURTH_QUADRANT = 4
 
     def __obtain_pisition_of_minutiaes(self):
-        self.__origin_y_pos = self.__origin_minutiae.get_posy()
-        self.__origin_x_pos = self.__origin_minutiae.get_posx()
-        self.__destination_y_pos = self.__destination_minutiae.get_posy()
-        self.__destination_x_pos = self.__destination_minutiae.get_posx()
+        self.__origin_y_pos = self.__origin_minutiae[0]
+        self.__origin_x_pos = self.__origin_minutiae[1]
+        self.__destination_y_pos = self.__destination_minutiae[0]
+        self.__destination_x_pos = self.__destination_minutiae[1]
 
     def __euclidean_distance(self, origin_y_pos, origin_x_pos, destination_y_pos, destination_x_pos):
         return np.sqrt((destination_y_pos - origin_y_pos) ** 2 + (destination_x_pos - origin_x_pos) ** 2)
@@ -11,6 +11,8 @@ from numpy import ndarray
 from fingerprint_process.description.local_area import LocalArea
 from fingerprint_process.models.minutia import Minutiae
 from fingerprint_process.models.core_point import CorePoint
+from fingerprint_process.models.fingerprint_template import FingerprintTemplate
+from fingerprint_process.preprocessing.enhancement_pipeline import EnhancementPipeline, poor_spatial_quality
 from fingerprint_process.preprocessing.quality_image import QualityFingerprint
 from fingerprint_process.preprocessing.preprocessing_fingerprint import PreprocessingFingerprint
 from fingerprint_process.utils.error_message import ErrorMessage
@@ -78,33 +80,34 @@ class Fingerprint(ErrorMessage):
         self._ezquel_as_image = []
 
     def __reconstruction_fingerprint(self, data_fingerprint: Union[ndarray, list, str]):
+        pixels = np.asarray(data_fingerprint, dtype=np.float64).ravel()
+
         self._raw_image = np.zeros((self._fingerprint_rows, self._figerprint_columns))
-        x = 0
-        y = 0
-        for pixel in data_fingerprint:
-            self._raw_image[y][x] = pixel
-            if x == (self._figerprint_columns - 1):
-                y += 1
-                x = 0
-            else:
-                x += 1
+        self._raw_image.ravel()[:pixels.size] = pixels
 
-    def __fingerprint_enhance(self):
+    def __fingerprint_enhance(self, early_exit: bool = True):
         preprocessing_fp = PreprocessingFingerprint(
             name_fingerprint=self._name_fingerprint,
             address_output=self._address_image,
             ridge_segment_thresh=self._ridge_segment_thresh
         )
 
+        pipeline = EnhancementPipeline(preprocessing_fp)
+        stop_condition = poor_spatial_quality(self._authentication_image_score) if early_exit else None
+        if not pipeline.run(self._raw_image, stop_condition=stop_condition):
+            # The image is rejected by its spatial index, so the Gabor filtering and the skeleton are skipped
+            segment_outputs = preprocessing_fp.get_stage_outputs('ridge_segment')
+            self._varian_mask = segment_outputs['stddevim']
+            self._varian_index = segment_outputs['quality_avr']
+            return
+
         (
             self._ezquel_fingerprint,
             self._roi,
             self._angles,
             self._varian_mask,
             self._varian_index
-        ) = preprocessing_fp.enhance(
-            img=self._raw_image,
-            resize=False,
+        ) = pipeline.get_enhanced_fingerprint(
             return_as_image=False,
             show_fingerprints=self._show_result,
             save_fingerprints=self._save_result
@@ -117,7 +120,7 @@ class Fingerprint(ErrorMessage):
             number_filters=16,
             columns_image=self._figerprint_columns,
             rows_image=self._fingerprint_rows,
-            data_filters='dataFilter.txt',
+            data_filters='dataFilter.npy',
             show_graphs=self._show_result,
             address_output='./fingerprint_process/data/',
             name_fingerprint=self._name_fingerprint
@@ -126,16 +129,9 @@ class Fingerprint(ErrorMessage):
         self._quality_index = quality_image.getQualityFingerprint(self._raw_image, save_graphs=self._save_result)
 
     def __get_corepoints(self, angles_tolerance):
-        for i in range(3, len(self._angles) - 2):  # Y
-            for j in range(3, len(self._angles[i]) - 2):  # x
-                # mask any singularity outside the mask
-                mask_slice = self._roi[
-                                (i - 2) * self._size_window_core:(i + 3) * self._size_window_core,
-                                (j - 2) * self._size_window_core:(j + 3) * self._size_window_core
-                             ]
-                mask_flag = np.sum(mask_slice)
-                if mask_flag == (self._size_window_core * 5) ** 2:
-                    self.__poincare_index_at(i, j, angles_tolerance)
+        for j, i, point_type in self.__singular_points(angles_tolerance):
+            angle = round(degrees(self._angles[j][i]), 2)
+            self._list_core_points.append(CorePoint(posy=j, posx=i, angle=angle, point_type=point_type))
 
         colors = {'l': (0, 0, 255), 'd': (0, 128, 255), 'w': (255, 153, 255)}
         figure = 'rectangle'
@@ -143,9 +139,9 @@ class Fingerprint(ErrorMessage):
         self.__mark_characteristic_point(colors, figure, to_show)
 
     def __get_minutias(self):
-        for i in range(1, self._columns - self._size_window_minutiae // 2):
-            for j in range(1, self._rows - self._size_window_minutiae // 2):
-                self.__minutiae_at(j, i)
+        for j, i, point_type in self.__minutiae_candidates():
+            angle = round(degrees(self._angles[j][i]), 2)
+            self._list_minutias.append(Minutiae(posy=j, posx=i, angle=angle, point_type=point_type))
 
         colors = {'e': (150, 0, 0), 'b': (0, 150, 0)}
         figure = 'circle'
@@ -208,50 +204,58 @@ class Fingerprint(ErrorMessage):
                     #       (self._minutiae_map)
                     #     )
 
-    def __minutiae_at(self, j, i):
+    def __minutiae_candidates(self) -> List[Tuple[int, int, str]]:
         """
         https://airccj.org/CSCP/vol7/csit76809.pdf pg93
         Crossing number methods is a really simple way to detect ridge endings and ridge bifurcations.
-        Then the crossing number algorithm will look at 3x3 pixel blocks:
+        Then the crossing number algorithm will look at 3x3 (or 5x5) pixel blocks:
 
         if middle pixel is black (represents ridge):
         if pixel on boundary are crossed with the ridge once, then it is a possible ridge ending
         if pixel on boundary are crossed with the ridge three times, then it is a ridge bifurcation
 
-        :param i:
-        :param j:
-        :return:
+        The crossing number is computed for the whole skeleton at once: every position of the cell is an image
+        shifted with np.roll, so the indexes out of the left and top borders wrap around the image like the
+        negative indexes did when the skeleton was walked pixel by pixel. Ridge endings also need the four
+        points 15 px away (up, down, left and right) inside the ROI.
+
+        :return: A list of tuples (posy, posx, point_type) ordered by column and then by row
         """
+        skeleton = np.asarray(self._ezquel_fingerprint).astype('int16')
+        roi = np.asarray(self._roi).astype('int32')
+        half_window = self._size_window_minutiae // 2
+
+        # Rows and columns walked by the crossing number
+        in_range = np.zeros((self._rows, self._columns), dtype=bool)
+        in_range[1:self._rows - half_window, 1:self._columns - half_window] = True
+
         # if middle pixel is black (represents ridge)
-        if self._ezquel_fingerprint[j][i] == 1:
-            if self._varian_mask[j][i] > self._characteritic_point_thresh:
-                values = [self._ezquel_fingerprint[j + l][i + k] for k, l in self._minutiae_cell]
-                # values = np.asarray(values).astype('uint8')
-                # print(values)
-
-                non_border = 0
-                region = ((j - 15, i), (j + 15, i), (j, i - 15), (j, i + 15))
-                for _ in range(len(region)):
-                    if (region[_][0] >= self._rows) or (region[_][1] >= self._columns):
-                        non_border = 0
-                        break
-                    else:
-                        non_border += self._roi[region[_][0]][region[_][1]]
+        candidates = in_range & (skeleton == 1) & (np.asarray(self._varian_mask) > self._characteritic_point_thresh)
+
+        # count crossing how many times it goes from 0 to 1
+        values = [np.roll(skeleton, shift=(-l, -k), axis=(0, 1)) for k, l in self._minutiae_cell]
+        crossings = np.zeros((self._rows, self._columns), dtype='int16')
+        for k in range(0, len(values) - 1):
+            crossings += np.abs(values[k] - values[k + 1])
+        crossings //= 2
+
+        rows_index, columns_index = np.indices((self._rows, self._columns))
+        out_of_image = (rows_index + 15 >= self._rows) | (columns_index + 15 >= self._columns)
+        non_border = (np.roll(roi, 15, axis=0) + np.roll(roi, -15, axis=0) +
+                      np.roll(roi, 15, axis=1) + np.roll(roi, -15, axis=1))
+        non_border[out_of_image] = 0
+
+        endings = candidates & (crossings == 1) & (non_border >= 4)
+        bifurcations = candidates & (crossings == 3)
 
-                # count crossing how many times it goes from 0 to 1
-                crossings = 0
-                for k in range(0, len(values) - 1):
-                    crossings += abs(int(values[k]) - int(values[k + 1]))
-                crossings //= 2
+        point_types = np.full((self._rows, self._columns), '', dtype='<U1')
+        point_types[endings] = 'e'
+        point_types[bifurcations] = 'b'
 
-                if crossings == 1:
-                    if non_border >= 4:
-                        angle = round(degrees(self._angles[j][i]), 2)
-                        self._list_minutias.append(Minutiae(posy=j, posx=i, angle=angle, point_type='e'))
+        # Transposed so the points keep the column-major order of the original walk
+        columns_found, rows_found = np.nonzero((endings | bifurcations).T)
 
-                if crossings == 3:
-                    angle = round(degrees(self._angles[j][i]), 2)
-                    self._list_minutias.append(Minutiae(posy=j, posx=i, angle=angle, point_type='b'))
+        return [(int(j), int(i), str(point_types[j, i])) for i, j in zip(columns_found, rows_found)]
 
     def __get_cells(self):
         if self._size_window_minutiae == 3:
@@ -267,42 +271,68 @@ class Fingerprint(ErrorMessage):
                           (0, 1), (1, 1), (1, 0),  # p8    p4
                           (1, -1), (0, -1), (-1, -1)]  # p7 p6 p5
 
-    def __poincare_index_at(self, j, i, tolerance):
+    def __singular_points(self, tolerance) -> List[Tuple[int, int, str]]:
         """
         Compute the summation difference between the adjacent orientations such that the orientations is less than 90
         degrees
         https://books.google.pl/books?id=1Wpx25D8qOwC&lpg=PA120&ots=9wRY0Rosb7&dq=poincare%20index%20fingerprint&hl=pl&pg=PA120#v=onepage&q=poincare%20index%20fingerprint&f=false
-        :param i:
-        :param j:
-        :param tolerance:
-        :return:
+
+        The Poincaré index is obtained for the whole orientation field at once, every neighbour of the cell is a
+        shifted copy of the angles in degrees. Only the points whose 5x5 window (scaled by size_window_core) is
+        fully inside the ROI are kept, the window sums come from an integral image of the ROI.
+
+        :param tolerance: Degrees accepted around 180 (delta), -180 (loop) and 360 (whorl)
+        :return: A list of tuples (posy, posx, point_type) ordered by row and then by column
         """
-        if self._varian_mask[j][i] > self._characteritic_point_thresh:
-            angles_around_index = [degrees(self._angles[j - k][i - l]) for k, l in self._core_map]
-            index = 0
-            for k in range(0, 8):
-
-                # calculate the difference
-                difference = angles_around_index[k] - angles_around_index[k + 1]
-                if difference > 90:
-                    difference -= 180
-                elif difference < -90:
-                    difference += 180
-
-                index += difference
-
-            if 180 - tolerance <= index <= 180 + tolerance:
-                # delta
-                angle = round(degrees(self._angles[j][i]), 2)
-                self._list_core_points.append(CorePoint(posy=j, posx=i, angle=angle, point_type='d'))
-            if -180 - tolerance <= index <= -180 + tolerance:
-                # loop
-                angle = round(degrees(self._angles[j][i]), 2)
-                self._list_core_points.append(CorePoint(posy=j, posx=i, angle=angle, point_type='l'))
-            if 360 - tolerance <= index <= 360 + tolerance:
-                # whorl
-                angle = round(degrees(self._angles[j][i]), 2)
-                self._list_core_points.append(CorePoint(posy=j, posx=i, angle=angle, point_type='w'))
+        angles = np.asarray(self._angles)
+        rows, columns = angles.shape
+        window = self._size_window_core
+
+        # mask any singularity outside the mask
+        roi = np.asarray(self._roi).astype('int64')
+        integral_roi = np.zeros((roi.shape[0] + 1, roi.shape[1] + 1), dtype='int64')
+        integral_roi[1:, 1:] = roi.cumsum(axis=0).cumsum(axis=1)
+
+        rows_index = np.arange(3, rows - 2)
+        columns_index = np.arange(3, columns - 2)
+        top = np.minimum((rows_index - 2) * window, roi.shape[0])[:, np.newaxis]
+        bottom = np.minimum((rows_index + 3) * window, roi.shape[0])[:, np.newaxis]
+        left = np.minimum((columns_index - 2) * window, roi.shape[1])[np.newaxis, :]
+        right = np.minimum((columns_index + 3) * window, roi.shape[1])[np.newaxis, :]
+        mask_flag = (integral_roi[bottom, right] - integral_roi[top, right] -
+                     integral_roi[bottom, left] + integral_roi[top, left])
+
+        candidates = np.zeros((rows, columns), dtype=bool)
+        candidates[3:rows - 2, 3:columns - 2] = mask_flag == (window * 5) ** 2
+        candidates &= np.asarray(self._varian_mask) > self._characteritic_point_thresh
+
+        angles_degrees = np.degrees(angles)
+        angles_around_index = [np.roll(angles_degrees, shift=(k, l), axis=(0, 1)) for k, l in self._core_map]
+        index = np.zeros((rows, columns))
+        for k in range(0, 8):
+
+            # calculate the difference
+            difference = angles_around_index[k] - angles_around_index[k + 1]
+            difference = np.where(difference > 90, difference - 180,
+                                  np.where(difference < -90, difference + 180, difference))
+
+            index += difference
+
+        singularities = (
+            ('d', (180 - tolerance <= index) & (index <= 180 + tolerance)),
+            ('l', (-180 - tolerance <= index) & (index <= -180 + tolerance)),
+            ('w', (360 - tolerance <= index) & (index <= 360 + tolerance))
+        )
+
+        rows_found, columns_found = np.nonzero(candidates & (singularities[0][1] | singularities[1][1] |
+                                                             singularities[2][1]))
+        singular_points = []
+        for j, i in zip(rows_found, columns_found):
+            for point_type, found in singularities:
+                if found[j, i]:
+                    singular_points.append((int(j), int(i), point_type))
+
+        return singular_points
 
     def __ezquel_to_image(self):
         self._ezquel_fingerprint = self._ezquel_fingerprint.astype('uint8')
@@ -369,18 +399,33 @@ class Fingerprint(ErrorMessage):
     def set_minutiae_list(self, minutiae: List[Minutiae]):
         self._list_minutias = minutiae.copy()
 
+    def get_template(self) -> FingerprintTemplate:
+        return FingerprintTemplate.from_fingerprint(self)
+
+    def set_template(self, template: FingerprintTemplate):
+        self._list_minutias = template.get_minutiae_list()
+        self._list_core_points = template.get_core_point_list()
+
     def get_raw_fingerprint_image(self):
         return self._raw_image
 
     def get_fingerprint_image(self):
         return self._ezquel_as_image
 
+    def set_fingerprint_images(self, raw_image: ndarray, fingerprint_image: ndarray):
+        self._raw_image = np.asarray(raw_image)
+        self._ezquel_as_image = np.asarray(fingerprint_image)
+
     def get_spatial_index(self):
         return self._varian_index
 
     def get_spectral_index(self):
         return self._quality_index
 
+    def set_indexes(self, spectral_index: float, spatial_index: float):
+        self._quality_index = spectral_index
+        self._varian_index = spatial_index
+
     def reconstruction_fingerprint(self, data_fingerprint):
         self.__reconstruction_fingerprint(data_fingerprint)
         return self._raw_image
@@ -581,7 +626,8 @@ class Fingerprint(ErrorMessage):
             pass
 
         self._save_result = True
-        self.__fingerprint_enhance()
+        # Every sample is enhanced and saved to be evaluated, even the poor ones
+        self.__fingerprint_enhance(early_exit=False)
         spatial_index = self._varian_index
         if self._varian_index < self._authentication_image_score:
             valid_reg = 0
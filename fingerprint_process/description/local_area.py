@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 from math import ceil, floor, factorial, atan, degrees
+from typing import Optional
+
 import numpy as np
+from numpy import ndarray
 
 from fingerprint_process.models.tuple_fingerprint import TupleFingerprint
 from fingerprint_process.utils.error_message import ErrorMessage
@@ -28,17 +31,12 @@ class LocalArea(ErrorMessage):
 
         return (begin_list + end_list)
 
-    def __nearest_minutiaes_from_match(self, s_minutiae):
+    def __select_neighbording_minutiaes(self, distances, candidates):
         neighbording_minutiaes = [[self._list_minutiaes[index], self._max_distance] for index in
                                   range(self._number_neighbordings)]
-        j = s_minutiae.get_posy()
-        i = s_minutiae.get_posx()
-
-        for minutiea in self._list_minutiaes:
-            j2 = minutiea.get_posy()
-            i2 = minutiea.get_posx()
 
-            distance = round(self.__euclidian_distance(j, j2, i, i2), 2)
+        for index in candidates:
+            distance = distances[index]
 
             if self._number_neighbordings > 15:
                 (distance_flag, position) = self.__get_nearby_points(neighbording_minutiaes, distance, self._begin,
@@ -48,46 +46,66 @@ class LocalArea(ErrorMessage):
 
             if distance_flag:
                 neighbording_minutiaes = self.__update_neighbording_minutiaes(neighbording_minutiaes, position,
-                                                                              minutiea, distance)
+                                                                              self._list_minutiaes[index], distance)
 
         return neighbording_minutiaes
 
-    def __nearest_minutiaes(self, length_list, reference=0):
-        # nearest_distances = [self._max_distance for _ in range(self._number_neighbordings)]
-        neighbording_minutiaes = [[self._list_minutiaes[index], self._max_distance] for index in
-                                  range(self._number_neighbordings)]
+    def __nearest_candidates(self, distances, reference=None):
+        """
+        Return, in the original order, the minutiae whose distance is not greater than the distance of the k-th
+        nearest one. Farther minutiae can never stay in the neighbourhood, so the insertion of the neighbours only
+        has to run over these candidates (usually k, more when there are ties with the k-th distance).
+        """
+        if self._number_neighbordings > 15:
+            # The binary search insertion is run over every minutia
+            candidates = np.arange(len(distances))
+            return candidates if reference is None else candidates[candidates != reference]
+
+        if reference is None:
+            valid_distances = distances
+        else:
+            valid_distances = np.delete(distances, reference)
 
-        minutiae = self._list_minutiaes[reference]
-        j = minutiae.get_posy()
-        i = minutiae.get_posx()
+        kth_distance = np.partition(valid_distances, self._number_neighbordings - 1)[self._number_neighbordings - 1]
+        candidates = np.flatnonzero(distances <= kth_distance)
 
-        for index in range(length_list):
-            if (index != reference):
-                neighbording_minutia = self._list_minutiaes[index]
-                j2 = neighbording_minutia.get_posy()
-                i2 = neighbording_minutia.get_posx()
+        if reference is not None:
+            candidates = candidates[candidates != reference]
 
-                distance = round(self.__euclidian_distance(j, j2, i, i2), 2)
+        return candidates
 
-                if self._number_neighbordings > 15:
-                    (distance_flag, position) = self.__get_nearby_points(neighbording_minutiaes, distance, self._begin,
-                                                                         self._end, 'equal')
-                else:
-                    (distance_flag, position) = self.__simple_nearby_points(neighbording_minutiaes, distance)
-
-                if distance_flag:
-                    neighbording_minutiaes = self.__update_neighbording_minutiaes(neighbording_minutiaes, position,
-                                                                                  neighbording_minutia, distance)
-                    # #nearest_distances[position] = distance
-                    # neighbording_minutiaes[position][0] = neighbording_minutia
-                    # neighbording_minutiaes[position][1] = distance
-            else:
-                continue
+    def __nearest_minutiaes_from_match(self, distances):
+        candidates = self.__nearest_candidates(distances)
 
-        return neighbording_minutiaes
+        return self.__select_neighbording_minutiaes(distances, candidates)
+
+    def __nearest_minutiaes(self, distances, reference=0):
+        candidates = self.__nearest_candidates(distances, reference)
+
+        return self.__select_neighbording_minutiaes(distances, candidates)
+
+    @staticmethod
+    def __get_point(minutia) -> tuple:
+        """
+        Return (posy, posx, point_type) of a Minutiae object, a tuple is returned as it is
+        """
+        if isinstance(minutia, tuple):
+            return minutia
 
-    def __euclidian_distance(self, j1, j2, i1, i2):
-        return (np.sqrt(np.power((j2 - j1), 2) + np.power((i2 - i1), 2)))
+        return minutia.get_posy(), minutia.get_posx(), minutia.get_point_type()
+
+    def __distance_matrix(self, reference_minutiaes, list_minutiaes):
+        """
+        Euclidean distance, rounded to two decimals, between every minutia of reference_minutiaes (rows) and every
+        minutia of list_minutiaes (columns)
+        """
+        positions_reference = np.array([self.__get_point(minutia)[:2] for minutia in reference_minutiaes])
+        positions_list = np.array([self.__get_point(minutia)[:2] for minutia in list_minutiaes])
+
+        dy = positions_list[np.newaxis, :, 0] - positions_reference[:, np.newaxis, 0]
+        dx = positions_list[np.newaxis, :, 1] - positions_reference[:, np.newaxis, 1]
+
+        return np.round(np.sqrt(np.power(dy, 2) + np.power(dx, 2)), 2)
 
     def __get_nearby_points(self, neighbording_list, distance, begin, end, movement='equal'):
         if movement == 'up':
@@ -149,18 +167,9 @@ class LocalArea(ErrorMessage):
     def __angles_minutiaes(self, minutiae_reference, neighbording_minutiaes, first, second):
         m = [0, 0, 0]
         angles = [[0, False], [0, False], [0, False]]
-        j = minutiae_reference.get_posy()
-        i = minutiae_reference.get_posx()
-
-        first_minutiae = neighbording_minutiaes[first][0]
-        j1 = first_minutiae.get_posy()
-        i1 = first_minutiae.get_posx()
-        minutiae_type1 = first_minutiae.get_point_type()
-
-        second_minutiae = neighbording_minutiaes[second][0]
-        j2 = second_minutiae.get_posy()
-        i2 = second_minutiae.get_posx()
-        minutiae_type2 = second_minutiae.get_point_type()
+        j, i, _ = self.__get_point(minutiae_reference)
+        j1, i1, minutiae_type1 = self.__get_point(neighbording_minutiaes[first][0])
+        j2, i2, minutiae_type2 = self.__get_point(neighbording_minutiaes[second][0])
 
         points_triangle = ((j, i), (j1, i1), (j2, i2))
         number_slopes = len(m)
@@ -323,9 +332,11 @@ class LocalArea(ErrorMessage):
         self._list_minutiaes = list_minutiaes.copy()
         length_list = len(self._list_minutiaes)
         if length_list > self._number_neighbordings:
+            distances = self.__distance_matrix(self._list_minutiaes, self._list_minutiaes)
+
             for reference in range(length_list):
                 minutiae_reference = self._list_minutiaes[reference]
-                neighbording_minutiaes = self.__nearest_minutiaes(length_list, reference)
+                neighbording_minutiaes = self.__nearest_minutiaes(distances[reference], reference)
                 ratios_and_angles = self.__ratios_and_angles(neighbording_minutiaes, minutiae_reference)
                 tuple_fingerprint_list = self.__tuple_list(minutiae_reference, ratios_and_angles)
                 minutiae_reference.set_tuple_fingerprint_list(tuple_fingerprint_list)
@@ -338,9 +349,11 @@ class LocalArea(ErrorMessage):
         self._list_minutiaes = common_minutiaes.copy()
         length_common_list = len(common_minutiaes)
         if length_common_list >= self._number_neighbordings:
+            if len(spurious_minutias) > 0:
+                distances = self.__distance_matrix(spurious_minutias, self._list_minutiaes)
 
-            for minutia in spurious_minutias:
-                neighbording_minutiaes = self.__nearest_minutiaes_from_match(minutia)
+            for position, minutia in enumerate(spurious_minutias):
+                neighbording_minutiaes = self.__nearest_minutiaes_from_match(distances[position])
                 ratios_and_angles = self.__ratios_and_angles(neighbording_minutiaes, minutia)
                 tuple_fingerprint_list = self.__tuple_list(minutia, ratios_and_angles)
                 minutia.set_tuple_fingerprint_list(tuple_fingerprint_list)
@@ -348,3 +361,28 @@ class LocalArea(ErrorMessage):
             return self._FINGERPRINT_OK
         else:
             return self._FEW_MINUTIAES
+
+    def get_new_descriptors(self, common_minutiaes: list, spurious_minutias: list) -> Optional[ndarray]:
+        """
+        Same as get_new_neighborhood for minutiae given as tuples (posy, posx, point_type), e.g. the rows of a
+        FingerprintTemplate. The local structure of the spurious minutiae is returned instead of being set into
+        Minutiae objects.
+
+        :return: (ndarray, None) Descriptor matrix (len(spurious_minutias), tuple length, 4) with the same columns as
+            FingerprintTemplate.get_descriptor_matrix, or None when there are too few common minutiae
+        """
+        self._list_minutiaes = common_minutiaes.copy()
+        if len(common_minutiaes) < self._number_neighbordings:
+            return None
+
+        descriptors = np.empty((len(spurious_minutias), self._tuple_length, 4))
+        if len(spurious_minutias) > 0:
+            distances = self.__distance_matrix(spurious_minutias, self._list_minutiaes)
+
+        for position, minutia in enumerate(spurious_minutias):
+            neighbording_minutiaes = self.__nearest_minutiaes_from_match(distances[position])
+            ratios_and_angles = self.__ratios_and_angles(neighbording_minutiaes, minutia)
+            descriptors[position] = [(ratio, angle, ord(origin_type), ord(destination_type))
+                                     for ratio, angle, origin_type, destination_type in ratios_and_angles]
+
+        return descriptors
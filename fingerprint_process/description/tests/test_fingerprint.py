@@ -0,0 +1,195 @@
+import unittest
+from math import degrees
+
+import numpy as np
+
+from fingerprint_process.description.fingerprint import Fingerprint
+from fingerprint_process.description.local_area import LocalArea
+from fingerprint_process.models.fingerprint_template import FingerprintTemplate
+from fingerprint_process.utils.benchmark import load_sample_fingerprint
+
+
+def describe_sample(**kwargs) -> Fingerprint:
+    fingerprint = Fingerprint(show_result=False, save_result=False, **kwargs)
+    fingerprint.describe_fingerprint(from_image=True, fingerprint_image=load_sample_fingerprint(), mode='auth')
+
+    return fingerprint
+
+
+def reference_minutiae(fingerprint: Fingerprint) -> list:
+    # Pixel by pixel crossing number used before the vectorized extractor
+    skeleton = fingerprint._ezquel_fingerprint
+    roi = fingerprint._roi
+    rows, columns = fingerprint._rows, fingerprint._columns
+    minutiae = []
+
+    for i in range(1, columns - fingerprint._size_window_minutiae // 2):
+        for j in range(1, rows - fingerprint._size_window_minutiae // 2):
+            if skeleton[j][i] != 1 or fingerprint._varian_mask[j][i] <= fingerprint._characteritic_point_thresh:
+                continue
+
+            values = [skeleton[j + l][i + k] for k, l in fingerprint._minutiae_cell]
+
+            non_border = 0
+            for y, x in ((j - 15, i), (j + 15, i), (j, i - 15), (j, i + 15)):
+                if y >= rows or x >= columns:
+                    non_border = 0
+                    break
+                non_border += roi[y][x]
+
+            crossings = 0
+            for k in range(0, len(values) - 1):
+                crossings += abs(int(values[k]) - int(values[k + 1]))
+            crossings //= 2
+
+            angle = round(degrees(fingerprint._angles[j][i]), 2)
+            if crossings == 1 and non_border >= 4:
+                minutiae.append((j, i, angle, 'e'))
+            if crossings == 3:
+                minutiae.append((j, i, angle, 'b'))
+
+    return minutiae
+
+
+def reference_core_points(fingerprint: Fingerprint, tolerance: int = 1) -> list:
+    # Pixel by pixel Poincaré index used before the vectorized detector
+    angles = fingerprint._angles
+    window = fingerprint._size_window_core
+    cell = [(-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1)]
+    core_points = []
+
+    for j in range(3, len(angles) - 2):
+        for i in range(3, len(angles[j]) - 2):
+            mask_slice = fingerprint._roi[(j - 2) * window:(j + 3) * window, (i - 2) * window:(i + 3) * window]
+            if np.sum(mask_slice) != (window * 5) ** 2:
+                continue
+            if fingerprint._varian_mask[j][i] <= fingerprint._characteritic_point_thresh:
+                continue
+
+            angles_around_index = [degrees(angles[j - k][i - l]) for k, l in cell]
+            index = 0
+            for k in range(0, 8):
+                difference = angles_around_index[k] - angles_around_index[k + 1]
+                if difference > 90:
+                    difference -= 180
+                elif difference < -90:
+                    difference += 180
+
+                index += difference
+
+            angle = round(degrees(angles[j][i]), 2)
+            if 180 - tolerance <= index <= 180 + tolerance:
+                core_points.append((j, i, angle, 'd'))
+            if -180 - tolerance <= index <= -180 + tolerance:
+                core_points.append((j, i, angle, 'l'))
+            if 360 - tolerance <= index <= 360 + tolerance:
+                core_points.append((j, i, angle, 'w'))
+
+    return core_points
+
+
+def description_of(points: list) -> list:
+    return [(point.get_posy(), point.get_posx(), point.get_angle(), point.get_point_type()) for point in points]
+
+
+class TestMinutiaeExtraction(unittest.TestCase):
+
+    def test_crossing_number_with_3x3_cell(self):
+        fingerprint = describe_sample(size_window_minutiae=3)
+
+        self.assertEqual(reference_minutiae(fingerprint), description_of(fingerprint.get_minutiae_list()))
+
+    def test_crossing_number_with_5x5_cell(self):
+        fingerprint = describe_sample(size_window_minutiae=5)
+
+        self.assertEqual(reference_minutiae(fingerprint), description_of(fingerprint.get_minutiae_list()))
+
+
+class TestCorePointDetection(unittest.TestCase):
+
+    def test_poincare_index_matches_reference(self):
+        fingerprint = describe_sample()
+
+        self.assertEqual(reference_core_points(fingerprint), description_of(fingerprint.get_core_point_list()))
+
+    def test_poincare_index_with_wide_tolerance(self):
+        fingerprint = describe_sample()
+        fingerprint.set_core_points_list([])
+        # The cells are replaced by the marked image once the core points are drawn
+        fingerprint._Fingerprint__get_cells()
+        fingerprint._Fingerprint__get_corepoints(angles_tolerance=40)
+
+        self.assertEqual(
+            reference_core_points(fingerprint, tolerance=40),
+            description_of(fingerprint.get_core_point_list())
+        )
+
+
+class TestEnhancementEarlyExit(unittest.TestCase):
+
+    def test_poor_spatial_index_skips_the_skeleton(self):
+        fingerprint = Fingerprint(show_result=False, save_result=False, authentication_image_score=1.0)
+
+        process_message = fingerprint.describe_fingerprint(from_image=True, fingerprint_image=load_sample_fingerprint())
+
+        self.assertEqual(process_message, fingerprint.POOR_QUALITY)
+        self.assertGreater(fingerprint._varian_index, 0)
+        self.assertEqual(len(fingerprint._ezquel_fingerprint), 0)
+
+
+def describe_sample_with_local_structure() -> Fingerprint:
+    fingerprint = describe_sample()
+    LocalArea().get_local_structure(fingerprint.get_minutiae_list())
+
+    return fingerprint
+
+
+class TestFingerprintTemplate(unittest.TestCase):
+
+    def test_template_keeps_the_description(self):
+        fingerprint = describe_sample_with_local_structure()
+        template = fingerprint.get_template()
+
+        self.assertEqual(description_of(template.get_minutiae_list()), description_of(fingerprint.get_minutiae_list()))
+        self.assertEqual(
+            description_of(template.get_core_point_list()),
+            description_of(fingerprint.get_core_point_list())
+        )
+        self.assertEqual(
+            [[tuple_fingerprint.get_description()[2:] for tuple_fingerprint in minutia.get_tuple_fingerprint_list()]
+             for minutia in template.get_minutiae_list()],
+            [[tuple_fingerprint.get_description()[2:] for tuple_fingerprint in minutia.get_tuple_fingerprint_list()]
+             for minutia in fingerprint.get_minutiae_list()]
+        )
+
+    def test_set_template_creates_new_points(self):
+        fingerprint = describe_sample_with_local_structure()
+        template = fingerprint.get_template()
+
+        new_fingerprint = Fingerprint(show_result=False, save_result=False)
+        new_fingerprint.set_template(template)
+
+        self.assertEqual(
+            description_of(new_fingerprint.get_minutiae_list()),
+            description_of(fingerprint.get_minutiae_list())
+        )
+        self.assertIsNot(new_fingerprint.get_minutiae_list()[0], template.get_minutiae_list()[0])
+        self.assertEqual(template.get_size(), template.get_minutiae().nbytes + template.get_core_points().nbytes +
+                         template.get_descriptors().nbytes)
+
+    def test_template_bytes_round_trip(self):
+        template = describe_sample_with_local_structure().get_template()
+
+        new_template = FingerprintTemplate.from_bytes(template.to_bytes())
+
+        self.assertEqual(new_template.get_name_of_fingerprint(), template.get_name_of_fingerprint())
+        self.assertTrue(np.array_equal(new_template.get_minutiae(), template.get_minutiae()))
+        self.assertTrue(np.array_equal(new_template.get_core_points(), template.get_core_points()))
+        self.assertTrue(np.array_equal(new_template.get_descriptors(), template.get_descriptors()))
+        self.assertIsNone(FingerprintTemplate.from_bytes(FingerprintTemplate().to_bytes()).get_descriptors())
+
+    def test_template_bytes_of_another_version(self):
+        data = bytearray(FingerprintTemplate().to_bytes())
+        data[0] += 1
+
+        self.assertRaises(ValueError, FingerprintTemplate.from_bytes, bytes(data))
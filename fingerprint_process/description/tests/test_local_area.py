@@ -0,0 +1,99 @@
+import unittest
+
+import numpy as np
+
+from fingerprint_process.description.local_area import LocalArea
+from fingerprint_process.description.tests.test_fingerprint import describe_sample
+from fingerprint_process.models.minutia import Minutiae
+
+
+def reference_neighbours(local_area: LocalArea, minutiae: list, reference: Minutiae) -> list:
+    # Insertion over every minutia used before the distance matrix
+    k = local_area._number_neighbordings
+    neighbours = [[minutiae[index], local_area._max_distance] for index in range(k)]
+
+    for minutia in minutiae:
+        if minutia is reference:
+            continue
+
+        distance = round(np.sqrt(np.power(minutia.get_posy() - reference.get_posy(), 2) +
+                                 np.power(minutia.get_posx() - reference.get_posx(), 2)), 2)
+        if neighbours[k - 1][1] < distance:
+            continue
+
+        position = k - 1
+        for index in range(k - 1):
+            if neighbours[index][1] > distance:
+                position = index
+                break
+
+        neighbours = neighbours[:position] + [[minutia, distance]] + neighbours[position:k - 1]
+
+    return neighbours
+
+
+def reference_descriptions(minutiae: list, references: list) -> list:
+    local_area = LocalArea()
+    descriptions = []
+    for minutia in references:
+        neighbours = reference_neighbours(local_area, minutiae, minutia)
+        ratios_and_angles = local_area._LocalArea__ratios_and_angles(neighbours, minutia)
+        descriptions.append([tuple(values) for values in ratios_and_angles])
+
+    return descriptions
+
+
+def descriptions_of(minutiae: list) -> list:
+    return [[tuple_fingerprint.get_description()[2:] for tuple_fingerprint in minutia.get_tuple_fingerprint_list()]
+            for minutia in minutiae]
+
+
+def grid_minutiae() -> list:
+    # Many equal distances, so the ties with the k-th neighbour are exercised
+    return [Minutiae(posy=y, posx=x, angle=0.0, point_type='e' if (x + y) % 2 else 'b')
+            for y in range(0, 40, 8) for x in range(0, 40, 8)]
+
+
+class TestLocalStructure(unittest.TestCase):
+
+    def test_sample_matches_reference(self):
+        minutiae = describe_sample().get_minutiae_list()
+        expected = reference_descriptions(minutiae, minutiae)
+
+        LocalArea().get_local_structure(minutiae)
+
+        self.assertEqual(descriptions_of(minutiae), expected)
+
+    def test_ties_match_reference(self):
+        minutiae = grid_minutiae()
+        expected = reference_descriptions(minutiae, minutiae)
+
+        LocalArea().get_local_structure(minutiae)
+
+        self.assertEqual(descriptions_of(minutiae), expected)
+
+    def test_new_neighborhood_matches_reference(self):
+        common_minutiae = grid_minutiae()
+        spurious_minutiae = [Minutiae(posy=y, posx=x, angle=0.0, point_type='e')
+                             for y, x in ((4, 4), (16, 0), (12, 20), (39, 39))]
+        # The spurious minutiae are not part of the common list, so none of them is skipped
+        expected = reference_descriptions(common_minutiae, spurious_minutiae)
+
+        LocalArea().get_new_neighborhood(common_minutiae, spurious_minutiae)
+
+        self.assertEqual(descriptions_of(spurious_minutiae), expected)
+
+    def test_new_descriptors_match_new_neighborhood(self):
+        common_minutiae = grid_minutiae()
+        spurious_minutiae = [Minutiae(posy=y, posx=x, angle=0.0, point_type='e')
+                             for y, x in ((4, 4), (16, 0), (12, 20), (39, 39))]
+        to_point = lambda minutia: (minutia.get_posy(), minutia.get_posx(), minutia.get_point_type())
+
+        descriptors = LocalArea().get_new_descriptors([to_point(minutia) for minutia in common_minutiae],
+                                                      [to_point(minutia) for minutia in spurious_minutiae])
+        LocalArea().get_new_neighborhood(common_minutiae, spurious_minutiae)
+
+        expected = [[(ratio, angle, ord(origin_type), ord(destination_type))
+                     for ratio, angle, origin_type, destination_type in description]
+                    for description in descriptions_of(spurious_minutiae)]
+        self.assertEqual(descriptors.tolist(), [[list(values) for values in rows] for rows in expected])
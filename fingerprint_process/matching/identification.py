@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+from concurrent.futures import ProcessPoolExecutor
+from threading import Condition
+from typing import List, Optional, Tuple
+
+import numpy as np
+from numpy import ndarray
+
+from fingerprint_process.matching.matching_core import MatchingCore
+from fingerprint_process.models.fingerprint_template import FingerprintTemplate
+
+CORE_TYPES = 'ldw'
+IMAGE_SHAPE = (288, 256)
+GRID_SHAPE = (4, 4)
+CHUNKS_PER_WORKER = 4
+
+# Gallery of the worker processes, it is sent once when the pool starts
+_worker_gallery = None
+
+
+def get_core_histogram(core_points: ndarray) -> ndarray:
+    """
+    Count the core points of each type (l, d, w) that fall in every cell of a coarse grid over the image
+
+    :param core_points: (ndarray) Structured array of core points (see FingerprintTemplate)
+    :return: (ndarray) Int array (len(CORE_TYPES), cells of the grid)
+    """
+    histogram = np.zeros((len(CORE_TYPES), GRID_SHAPE[0] * GRID_SHAPE[1]), dtype=np.int32)
+
+    types = np.array([CORE_TYPES.find(point_type) for point_type in core_points['point_type']], dtype=int)
+    rows = np.clip(core_points['posy'] * GRID_SHAPE[0] // IMAGE_SHAPE[0], 0, GRID_SHAPE[0] - 1)
+    columns = np.clip(core_points['posx'] * GRID_SHAPE[1] // IMAGE_SHAPE[1], 0, GRID_SHAPE[1] - 1)
+
+    known = types >= 0
+    np.add.at(histogram, (types[known], rows[known] * GRID_SHAPE[1] + columns[known]), 1)
+
+    return histogram
+
+
+class FingerprintGallery(object):
+    """
+    In-memory gallery of enrolled fingerprints. Each entry is a key (e.g. the id of the client) and the
+    FingerprintTemplate of the fingerprint; the core histograms of all the entries are kept as one array for the
+    coarse filter.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._keys = []
+        self._templates = []
+        self._histograms = []
+        self._histogram_matrix = None
+
+    def add_template(self, key: str, template: FingerprintTemplate) -> None:
+        self._keys.append(key)
+        self._templates.append(template)
+        self._histograms.append(get_core_histogram(template.get_core_points()))
+        self._histogram_matrix = None
+
+    def get_size(self) -> int:
+        return len(self._keys)
+
+    def get_key(self, position: int) -> str:
+        return self._keys[position]
+
+    def get_template(self, position: int) -> FingerprintTemplate:
+        return self._templates[position]
+
+    def get_memory(self) -> int:
+        """
+        Return the bytes used by the templates and the histograms of the gallery
+        """
+        return sum(template.get_size() for template in self._templates) + self.get_histograms().nbytes
+
+    def get_histograms(self) -> ndarray:
+        """
+        Return the core histograms of the gallery as an int array (N, len(CORE_TYPES), cells of the grid)
+        """
+        if self._histogram_matrix is None:
+            shape = (0, len(CORE_TYPES), GRID_SHAPE[0] * GRID_SHAPE[1])
+            self._histogram_matrix = np.stack(self._histograms) if self._histograms else np.zeros(shape, np.int32)
+
+        return self._histogram_matrix
+
+    def get_candidates(self, probe: FingerprintTemplate, minimum_cores: int = 1,
+                       max_candidates: Optional[int] = None) -> ndarray:
+        """
+        Select the entries that can match the probe before the full MatchingCore pass.
+
+        MatchingCore needs minimum_cores cores of the same type in both fingerprints, so the entries with fewer
+        common cores per type are discarded. The others are sorted by the cores that also fall in the same cell
+        of the grid and, when max_candidates is given, only the best ones are kept.
+
+        :return: (ndarray) Positions of the candidates in the gallery, the most similar first
+        """
+        histograms = self.get_histograms()
+        probe_histogram = get_core_histogram(probe.get_core_points())
+
+        common_types = np.minimum(histograms.sum(axis=2), probe_histogram.sum(axis=1)).sum(axis=1)
+        common_cells = np.minimum(histograms, probe_histogram).sum(axis=(1, 2))
+
+        candidates = np.flatnonzero(common_types >= minimum_cores)
+        candidates = candidates[np.argsort(-common_cells[candidates], kind='stable')]
+
+        if max_candidates is not None:
+            candidates = candidates[:max_candidates]
+
+        return candidates
+
+
+def _initialize_worker(gallery: FingerprintGallery) -> None:
+    global _worker_gallery
+    _worker_gallery = gallery
+
+
+def score_candidates(probe: FingerprintTemplate, candidates: ndarray,
+                     gallery: Optional[FingerprintGallery] = None) -> List[Tuple[int, float]]:
+    """
+    Run MatchingCore between the probe and every candidate. The score of a match is the best translation score
+    divided by the number of minutiae of the bigger fingerprint.
+
+    :param gallery: The gallery of the candidates, the gallery of the worker process is used when it is None
+    :return: (list) Pairs (position, score) of the candidates that match the probe
+    """
+    if gallery is None:
+        gallery = _worker_gallery
+
+    matching = MatchingCore()
+    scores = []
+    for position in candidates:
+        template = gallery.get_template(position)
+        if matching.matching(template, probe) == matching.MATCH_FINGERPRINT:
+            number_minutiae = max(len(template.get_minutiae()), len(probe.get_minutiae()), 1)
+            scores.append((int(position), matching.get_best_score() / number_minutiae))
+
+    return scores
+
+
+class IdentificationEngine(object):
+    """
+    1:N identification over a FingerprintGallery. The candidates of the coarse filter are split in chunks and
+    matched in a process pool whose workers receive the gallery once, when the engine starts; when the engine has
+    not been started (or workers is 1) they are matched in the current process.
+
+    shutdown waits for the identifications that are running, and an identification that begins once the engine is
+    shut down is matched in the current process, so replacing the engine never breaks a request in flight.
+    """
+
+    def __init__(
+            self,
+            gallery: FingerprintGallery,
+            workers: int = 1,
+            minimum_cores: int = 1,
+            max_candidates: Optional[int] = None
+    ):
+        super().__init__()
+        self._gallery = gallery
+        self._workers = workers
+        self._minimum_cores = minimum_cores
+        self._max_candidates = max_candidates
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._running = 0
+        self._condition = Condition()
+
+    def start(self) -> None:
+        with self._condition:
+            if self._executor is None and self._workers > 1:
+                self._executor = ProcessPoolExecutor(max_workers=self._workers, initializer=_initialize_worker,
+                                                     initargs=(self._gallery,))
+
+    def shutdown(self) -> None:
+        with self._condition:
+            executor, self._executor = self._executor, None
+            self._condition.wait_for(lambda: self._running == 0)
+
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def get_gallery(self) -> FingerprintGallery:
+        return self._gallery
+
+    def identify(self, probe, top_k: int = 5) -> List[Tuple[str, float]]:
+        """
+        Return the keys of the top_k entries of the gallery that match the probe, the best score first
+
+        :param probe: (Fingerprint or FingerprintTemplate) Fingerprint to identify
+        :param top_k: (int) Greatest number of keys returned
+        """
+        probe = FingerprintTemplate.from_fingerprint(probe)
+        candidates = self._gallery.get_candidates(probe, self._minimum_cores, self._max_candidates)
+
+        with self._condition:
+            executor = self._executor
+            self._running += 1
+
+        try:
+            if executor is None or len(candidates) <= 1:
+                scores = score_candidates(probe, candidates, self._gallery)
+            else:
+                chunks = np.array_split(candidates, min(len(candidates), self._workers * CHUNKS_PER_WORKER))
+                futures = [executor.submit(score_candidates, probe, chunk) for chunk in chunks]
+                scores = [score for future in futures for score in future.result()]
+        finally:
+            with self._condition:
+                self._running -= 1
+                self._condition.notify_all()
+
+        scores.sort(key=lambda score: score[1], reverse=True)
+
+        return [(self._gallery.get_key(position), score) for position, score in scores[:top_k]]
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+from numpy import ndarray
+
+
+def find_possible_parents(
+        base_descriptors: ndarray,
+        input_descriptors: ndarray,
+        ratio_tolerance: float,
+        angle_tolerance: float
+) -> ndarray:
+    """
+    Compare the local structure of every pair of base and input minutiae in one broadcasted pass. A tuple of a base
+    minutia is found when some tuple of the input minutia has a near ratio and angle and the same origin and
+    destination types; the input minutia is a possible parent when at least two tuples are found.
+
+    :param base_descriptors: (ndarray) Descriptor matrix (N_base, T_base, 4)
+    :param input_descriptors: (ndarray) Descriptor matrix (N_input, T_input, 4)
+    :param ratio_tolerance: (float) Greatest difference between the ratios of two similar tuples
+    :param angle_tolerance: (float) Greatest difference between the angles of two similar tuples
+
+    :return: (ndarray) Boolean array (N_base, N_input)
+    """
+    # (N_base, N_input, T_base, T_input), one column of the descriptors at a time
+    base = base_descriptors[:, np.newaxis, :, np.newaxis, :]
+    candidate = input_descriptors[np.newaxis, :, np.newaxis, :, :]
+
+    is_similar = np.abs(base[..., 0] - candidate[..., 0]) <= ratio_tolerance
+    is_similar &= np.abs(base[..., 1] - candidate[..., 1]) <= angle_tolerance
+    is_similar &= base[..., 2] == candidate[..., 2]
+    is_similar &= base[..., 3] == candidate[..., 3]
+
+    count = np.count_nonzero(is_similar.any(axis=3), axis=2)
+
+    return count >= 2
+
+
+def find_common_points(
+        base_descriptors: ndarray,
+        input_descriptors: ndarray,
+        base_types: ndarray,
+        input_types: ndarray,
+        ratio_tolerance: float,
+        angle_tolerance: float
+) -> list:
+    """
+    Pair every base minutia with the first free input minutia of the same type whose local structure is similar,
+    following the order of the rows
+
+    :param base_descriptors: (ndarray) Descriptor matrix (N_base, T_base, 4) (see FingerprintTemplate)
+    :param input_descriptors: (ndarray) Descriptor matrix (N_input, T_input, 4)
+    :param base_types: (ndarray) Type of every base minutia (N_base,)
+    :param input_types: (ndarray) Type of every input minutia (N_input,)
+
+    :return: (list) For each base minutia, the position of its input minutia or None when it has not one
+    """
+    candidates = find_possible_parents(base_descriptors, input_descriptors, ratio_tolerance, angle_tolerance)
+    candidates &= base_types.reshape(-1, 1) == input_types.reshape(1, -1)
+
+    pairs = []
+    is_free = np.ones(len(input_types), dtype=bool)
+    for base_candidates in candidates:
+        free_candidates = np.flatnonzero(base_candidates & is_free)
+        if free_candidates.size > 0:
+            is_free[free_candidates[0]] = False
+            pairs.append(int(free_candidates[0]))
+        else:
+            pairs.append(None)
+
+    return pairs
@@ -2,15 +2,24 @@ from fingerprint_process.matching.matching_process import MatchingProcess
 from fingerprint_process.matching.matching_tree import MatchingTree
 from fingerprint_process.matching.matching_core import MatchingCore
 from fingerprint_process.description.fingerprint import Fingerprint
+from fingerprint_process.models.fingerprint_template import FingerprintTemplate
 
 
-def match(base_fingerprint, input_fingerprint, mode='original'):
-    base_fingerprint_is_ok = (base_fingerprint != True) and isinstance(base_fingerprint, Fingerprint)
-    index_fingerprint_is_ok = (input_fingerprint != True) and isinstance(input_fingerprint, Fingerprint)
+def match(base_fingerprint, input_fingerprint, mode='original', max_explored_edges=None, time_budget=None,
+          show_result=False):
+    """
+    :param max_explored_edges: (int) Edges that MatchingTree can compare before it stops, None means no limit
+    :param time_budget: (float) Seconds that MatchingTree can spend searching trees, None means no limit
+    :param show_result: (bool) Print the edges explored by MatchingTree
+    """
+    fingerprint_types = (Fingerprint, FingerprintTemplate)
+    base_fingerprint_is_ok = (base_fingerprint != True) and isinstance(base_fingerprint, fingerprint_types)
+    index_fingerprint_is_ok = (input_fingerprint != True) and isinstance(input_fingerprint, fingerprint_types)
 
     if (base_fingerprint_is_ok and index_fingerprint_is_ok):
         if mode.lower() == 'tree':
-            matching = MatchingTree(local_ratio_tolerance=.1, local_angle_tolerance=1)
+            matching = MatchingTree(local_ratio_tolerance=.1, local_angle_tolerance=1,
+                                    max_explored_edges=max_explored_edges, time_budget=time_budget)
             process_message = matching.matching(base_fingerprint=base_fingerprint, input_fingerprint=input_fingerprint)
         elif mode.lower() == 'original':
             matching = MatchingProcess()
@@ -23,11 +32,15 @@ def match(base_fingerprint, input_fingerprint, mode='original'):
             process_message = matching.matching(base_fingerprint=base_fingerprint, input_fingerprint=input_fingerprint)
 
             if process_message == matching.DONT_MATCH_FINGERPRINT:
-                matching = MatchingTree(local_ratio_tolerance=.1, local_angle_tolerance=1)
+                matching = MatchingTree(local_ratio_tolerance=.1, local_angle_tolerance=1,
+                                        max_explored_edges=max_explored_edges, time_budget=time_budget)
                 process_message = matching.matching(base_fingerprint=base_fingerprint,
                                                     input_fingerprint=input_fingerprint)
 
         matching.show_message(process_message)
+        if show_result and isinstance(matching, MatchingTree):
+            print('\tExplored edges: {}'.format(matching.get_explored_edges()))
+
         return process_message
 
     return True
@@ -2,6 +2,7 @@
 
 import numpy as np
 
+from fingerprint_process.models.fingerprint_template import FingerprintTemplate, POINT_DTYPE
 from fingerprint_process.utils.error_message import ErrorMessage
 
 
@@ -13,79 +14,54 @@ class MatchingCore(ErrorMessage):
         self._minimum_cores = minimum_cores
         self._neighborhood_area = neighborhood_area
 
-        self._base_cores = []
-        self._input_cores = []
-        self._base_minutiaes = []
-        self._input_minutiaes = []
+        self._base_cores = np.zeros(0, dtype=POINT_DTYPE)
+        self._input_cores = np.zeros(0, dtype=POINT_DTYPE)
+        self._base_minutiaes = np.zeros(0, dtype=POINT_DTYPE)
+        self._input_minutiaes = np.zeros(0, dtype=POINT_DTYPE)
+        self._best_score = 0
 
-    def __compute_translation(self, base_core, input_core):
-        base_pos_x = base_core.get_posx()
-        base_pos_y = base_core.get_posy()
-        input_pos_x = input_core.get_posx()
-        input_pos_y = input_core.get_posy()
-
-        trans_x = base_pos_x - input_pos_x
-        trans_y = base_pos_y - input_pos_y
-
-        return (trans_x, trans_y, base_pos_x, base_pos_y)
-
-    def __set_dictionary_key(self, trans_x, trans_y):
-        return (str(trans_x) + '-' + str(trans_y))
+    def __same_core_type(self):
+        # (N_input, N_base)
+        return self._input_cores['point_type'][:, np.newaxis] == self._base_cores['point_type'][np.newaxis, :]
 
     def __obtain_possible_align_value(self):
-        possibles_align_values = {}
+        """
+        Compute the translation (trans_x, trans_y, base_pos_x, base_pos_y) of every pair of input and base cores of
+        the same type. A repeated translation is kept once, in the place of its first pair (input major).
 
-        for input_core in self._input_cores:
-            for base_core in self._base_cores:
-                if base_core.get_point_type() == input_core.get_point_type():
-                    trans_x, trans_y, base_pos_x, base_pos_y = self.__compute_translation(base_core, input_core)
-                    key = self.__set_dictionary_key(trans_x, trans_y)
-                    try:
-                        possibles_align_values[key]
-                    except KeyError:
-                        possibles_align_values.update({key: (trans_x, trans_y, base_pos_x, base_pos_y)})
+        :return: (ndarray) Array (T, 4) of translations
+        """
+        base_positions = FingerprintTemplate.get_positions(self._base_cores)
+        input_positions = FingerprintTemplate.get_positions(self._input_cores)
 
-        return possibles_align_values
+        input_index, base_index = np.nonzero(self.__same_core_type())
 
-    def __check_match(self, map_tuple, base_point, tolerance):
-        pos_x = base_point.get_posx()
-        pos_y = base_point.get_posy()
-        c_type = base_point.get_point_type()
+        translations = np.concatenate(
+            (base_positions[base_index] - input_positions[input_index], base_positions[base_index]),
+            axis=1
+        ).reshape(-1, 4)
 
-        is_x_ok = abs(pos_x - map_tuple[0]) <= tolerance
-        is_y_ok = abs(pos_y - map_tuple[1]) <= tolerance
-        is_type_ok = c_type == map_tuple[2]
+        _, first_index = np.unique(translations[:, :2], axis=0, return_index=True)
 
-        return is_x_ok and is_y_ok and is_type_ok
+        return translations[np.sort(first_index)]
 
     def __align_cores(self, possibles_align_values):
-        map_input_cores = []
-        align_values = []
-
-        for translation in possibles_align_values.values():
-            for input_core in self._input_cores:
-                pos_x = (input_core.get_posx() + translation[0])
-                pos_y = (input_core.get_posy() + translation[1])
-                c_type = input_core.get_point_type()
-
-                map_input_cores.append((pos_x, pos_y, c_type))
+        """
+        Keep the translations that move at least minimum_cores input cores exactly onto a base core of the same type
+        """
+        base_positions = FingerprintTemplate.get_positions(self._base_cores)
+        input_positions = FingerprintTemplate.get_positions(self._input_cores)
 
-            count = 0
-            for map_tuple in map_input_cores:
-                for base_core in self._base_cores:
-                    if self.__check_match(map_tuple, base_core, 0):
-                        count += 1
-                        break
+        # (T, N_input, 2): position of every input core after each translation
+        map_input_cores = input_positions[np.newaxis, :, :] + possibles_align_values[:, np.newaxis, :2]
 
-            if count >= self._minimum_cores:
-                align_values.append(translation)
+        # (T, N_input, N_base)
+        same_position = np.all(map_input_cores[:, :, np.newaxis, :] == base_positions[np.newaxis, np.newaxis, :, :],
+                               axis=3)
+        is_match = same_position & self.__same_core_type()[np.newaxis, :, :]
+        counts = np.count_nonzero(is_match.any(axis=2), axis=1)
 
-            map_input_cores.clear()
-
-        return align_values
-
-    def __euclidean_distance(self, origin_y_pos, origin_x_pos, destination_y_pos, destination_x_pos):
-        return np.sqrt((destination_y_pos - origin_y_pos) ** 2 + (destination_x_pos - origin_x_pos) ** 2)
+        return possibles_align_values[counts >= self._minimum_cores]
 
     def __compute_tolerance(self, distance):
         return ((distance // self._neighborhood_area) + 1) * self._distance_tolerance
@@ -95,38 +71,68 @@ class MatchingCore(ErrorMessage):
 
         return score >= minimum_score
 
+    def __score_translations(self, align_values):
+        """
+        Score the translations one by one. The input minutiae are moved with the translation and the ones that fall
+        inside the tolerance of a base minutia of the same type are counted; the tolerance of a base minutia grows
+        with its distance to the base core of the translation.
+
+        The mapped minutiae of the previous translations are kept and counted again with the tolerance of the
+        current one, so the score of translation t adds the matches of the minutiae moved with translations 0..t.
+        The scores are yielded in order, so the caller can stop at the first one that is a match; at most
+        (t + 1, N_input, N_base) values are compared at once.
+
+        :return: (generator) The score of each translation, in the same order as align_values
+        """
+        base_positions = FingerprintTemplate.get_positions(self._base_minutiaes)
+        input_positions = FingerprintTemplate.get_positions(self._input_minutiaes)
+        same_type = self._input_minutiaes['point_type'][:, np.newaxis] == \
+            self._base_minutiaes['point_type'][np.newaxis, :]
+
+        align_values = np.asarray(align_values, dtype=int).reshape(-1, 4)
+
+        # (T, N_input, 2): position of every input minutia after each translation
+        map_input_positions = input_positions[np.newaxis, :, :] + align_values[:, np.newaxis, :2]
+
+        for position, base_core_position in enumerate(align_values[:, 2:4]):
+            # (N_base): tolerance of every base minutia for the base core of this translation
+            distance = np.sqrt((base_positions[:, 1] - base_core_position[1]) ** 2 +
+                               (base_positions[:, 0] - base_core_position[0]) ** 2)
+            tolerance = self.__compute_tolerance(distance)
+
+            # (t + 1, N_input, N_base): the greatest of the x and y differences must be inside the tolerance
+            difference = np.abs(base_positions[np.newaxis, np.newaxis, :, :] -
+                                map_input_positions[:position + 1, :, np.newaxis, :]).max(axis=3)
+            is_match = (difference <= tolerance) & same_type
+
+            yield int(np.count_nonzero(is_match.any(axis=2)))
+
     def __align_minutiaes(self, align_values):
-        map_input_minutiaes = []
-
-        for translation in align_values:
-            for input_minutiae in self._input_minutiaes:
-                pos_x = (input_minutiae.get_posx() + translation[0])
-                pos_y = (input_minutiae.get_posy() + translation[1])
-                c_type = input_minutiae.get_point_type()
-
-                map_input_minutiaes.append((pos_x, pos_y, c_type))
-
-            count = 0
-            for map_tuple in map_input_minutiaes:
-                for base_minutiae in self._base_minutiaes:
-                    pos_x = base_minutiae.get_posx()
-                    pos_y = base_minutiae.get_posy()
-                    c_type = base_minutiae.get_point_type()
-                    distance = self.__euclidean_distance(translation[3], translation[2], pos_y, pos_x)
-                    tolerance = self.__compute_tolerance(distance)
-                    if self.__check_match(map_tuple, base_minutiae, tolerance):
-                        count += 1
-                        break
-
-            # print(count)
-            if self.__are_match(count):
+        for score in self.__score_translations(align_values):
+            self._best_score = max(self._best_score, score)
+
+            if self.__are_match(score):
                 return self._MATCH_FINGERPRINT
 
         return self._DONT_MATCH_FINGERPRINT
 
+    def get_best_score(self):
+        """
+        Return the greatest score of the translations tried by the last matching (0 when the cores did not align)
+        """
+        return self._best_score
+
     def matching(self, base_fingerprint, input_fingerprint):
-        self._base_cores = base_fingerprint.get_core_point_list()
-        self._input_cores = input_fingerprint.get_core_point_list()
+        """
+        Match two fingerprints. Each of them can be a Fingerprint or a FingerprintTemplate; the templates are used
+        as they are, so matching against a stored template does not create any point object.
+        """
+        self._best_score = 0
+        base_template = FingerprintTemplate.from_fingerprint(base_fingerprint)
+        input_template = FingerprintTemplate.from_fingerprint(input_fingerprint)
+
+        self._base_cores = base_template.get_core_points()
+        self._input_cores = input_template.get_core_points()
         if (len(self._base_cores) < self._minimum_cores) or (len(self._input_cores) < self._minimum_cores):
             return self._DONT_MATCH_FINGERPRINT
 
@@ -138,8 +144,8 @@ class MatchingCore(ErrorMessage):
         if len(align_values) <= 0:
             return self._DONT_MATCH_FINGERPRINT
 
-        self._base_minutiaes = base_fingerprint.get_minutiae_list()
-        self._input_minutiaes = input_fingerprint.get_minutiae_list()
+        self._base_minutiaes = base_template.get_minutiae()
+        self._input_minutiaes = input_template.get_minutiae()
 
         result = self.__align_minutiaes(align_values)
 
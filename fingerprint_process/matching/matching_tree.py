@@ -1,23 +1,49 @@
 # -*- coding: utf-8 -*-
 
+from time import perf_counter
+
 import cv2 as cv
-from operator import attrgetter
+import numpy as np
 
 from fingerprint_process.description.edge import Edge
 from fingerprint_process.description.local_area import LocalArea
+from fingerprint_process.matching.local_structure import find_common_points
+from fingerprint_process.models.fingerprint_template import FingerprintTemplate
 from fingerprint_process.utils.error_message import ErrorMessage
 
 
 class MatchingTree(ErrorMessage):
+    """
+    The minutiae of both fingerprints are read from the arrays of their FingerprintTemplate: the lists and trees of
+    the search hold positions of the minutiae, and the local structure is kept as a descriptor matrix per
+    fingerprint, so no Minutiae object is created.
+    """
+
     def __init__(self, local_ratio_tolerance=.5, local_angle_tolerance=1.5,
                  matching_distance_tolerance=5, matching_angle_tolerance=1.5,
-                 matching_ratio_tolerance=.5, ) -> None:
+                 matching_ratio_tolerance=.5, max_explored_edges=None, time_budget=None) -> None:
+        """
+        :param max_explored_edges: (int) Edges that can be compared in one matching before the search stops with
+            the biggest tree found so far. None means no limit
+        :param time_budget: (float) Seconds that one matching can spend searching trees. None means no limit
+        """
         super().__init__()
         self._local_ratio_tolerance = local_ratio_tolerance
         self._local_angle_tolerance = local_angle_tolerance
         self._matching_distance_tolerance = matching_distance_tolerance
         self._matching_angle_tolerance = matching_angle_tolerance
         self._matching_ratio_tolerance = matching_ratio_tolerance
+        self._max_explored_edges = max_explored_edges
+        self._time_budget = time_budget
+
+        self._explored_edges = 0
+        self._deadline = None
+
+        # (posy, posx, point_type) of every minutia and the descriptor matrix of each fingerprint
+        self._base_points = []
+        self._input_points = []
+        self._base_descriptors = None
+        self._input_descriptors = None
 
         self._base_minutiaes = []
         self._input_minutiaes = []
@@ -26,95 +52,57 @@ class MatchingTree(ErrorMessage):
         self._possible_input_common_minutiaes = []
         self._possible_input_spurious_minutiaes = []
 
-    def __find_possible_minutia_parent(self, local_info_base_minutiae, local_info_input_minutia):
-        count = 0
-        for base_tuple in local_info_base_minutiae:
-            for input_tuple in local_info_input_minutia:
-                ratio_base = base_tuple.get_ratio()
-                ratio_input = input_tuple.get_ratio()
-                if (abs(ratio_base - ratio_input) <= self._local_ratio_tolerance):
-                    angle_base = base_tuple.get_angle()
-                    angle_input = input_tuple.get_angle()
-                    if (abs(angle_base - angle_input) <= self._local_angle_tolerance):
-                        origin_minutiae_base = base_tuple.get_origin_minutiae_type()
-                        origin_minutiae_input = input_tuple.get_origin_minutiae_type()
-                        destination_minutiae_base = base_tuple.get_destination_minutiae_type()
-                        destination_minutiae_input = input_tuple.get_destination_minutiae_type()
-                        if ((origin_minutiae_base == origin_minutiae_input) and (
-                                destination_minutiae_base == destination_minutiae_input)):
-                            count += 1
-                            break
-                        else:
-                            continue
-                    else:
-                        continue
-                else:
-                    continue
-
-            if count >= 2:
-                return True
-
-        if count < 2:
-            return False
-        else:
-            return True
-
     def __common_points(self):
-        input_minutiaes_to_compare = [{'minutiae': input_minutia, 'found': False} for input_minutia in
-                                      self._input_minutiaes]
-
-        for base_minutiae in self._base_minutiaes:
-            is_spurious = True
-            for input_minutia in input_minutiaes_to_compare:
-                if (input_minutia['found']):
-                    continue
-                else:
-                    local_base_minutiaes = base_minutiae.get_tuple_fingerprint_list()
-                    local_input_minutiaes = input_minutia['minutiae'].get_tuple_fingerprint_list()
-                    ###############Debug#################################
-                    # is_bifurcation = (base_minutiae.get_point_type() == 'b')
-                    # if is_bifurcation:
-                    #     print('b')
-
-                    is_parent = self.__find_possible_minutia_parent(local_info_base_minutiae=local_base_minutiaes,
-                                                                    local_info_input_minutia=local_input_minutiaes)
-
-                    if (is_parent):
-                        if (base_minutiae.get_point_type() == input_minutia['minutiae'].get_point_type()):
-                            input_minutia['found'] = True
-                            self._possible_base_common_minutiaes.append(base_minutiae)
-                            self._possible_input_common_minutiaes.append(input_minutia['minutiae'])
-                            is_spurious = False
-                            break
-                        else:
-                            continue
-                    else:
-                        continue
-
-            if is_spurious:
+        pairs = find_common_points(
+            self._base_descriptors[self._base_minutiaes],
+            self._input_descriptors[self._input_minutiaes],
+            np.array([self._base_points[position][2] for position in self._base_minutiaes], dtype=str),
+            np.array([self._input_points[position][2] for position in self._input_minutiaes], dtype=str),
+            self._local_ratio_tolerance,
+            self._local_angle_tolerance
+        )
+
+        for base_minutiae, input_position in zip(self._base_minutiaes, pairs):
+            if input_position is None:
                 self._possible_base_spurious_minutiaes.append(base_minutiae)
+            else:
+                self._possible_base_common_minutiaes.append(base_minutiae)
+                self._possible_input_common_minutiaes.append(self._input_minutiaes[input_position])
+
+        found_positions = set(pairs)
+        for input_position, input_minutia in enumerate(self._input_minutiaes):
+            if input_position not in found_positions:
+                self._possible_input_spurious_minutiaes.append(input_minutia)
 
-        for input_minutia in input_minutiaes_to_compare:
-            if not input_minutia['found']:
-                self._possible_input_spurious_minutiaes.append(input_minutia['minutiae'])
+    @staticmethod
+    def __get_points(minutiae):
+        return list(zip(minutiae['posy'].tolist(), minutiae['posx'].tolist(), minutiae['point_type'].tolist()))
 
     def __get_lists_of_characteristic_points(self, base_fingerprint, input_fingerprint):
-        self._base_minutiaes = base_fingerprint.get_minutiae_list()
-        self._input_minutiaes = input_fingerprint.get_minutiae_list()
+        base_template = FingerprintTemplate.from_fingerprint(base_fingerprint)
+        input_template = FingerprintTemplate.from_fingerprint(input_fingerprint)
+
+        self._base_points = self.__get_points(base_template.get_minutiae())
+        self._input_points = self.__get_points(input_template.get_minutiae())
+        self._base_descriptors = base_template.get_descriptor_matrix()
+        self._input_descriptors = input_template.get_descriptor_matrix()
+
+        self._base_minutiaes = list(range(len(self._base_points)))
+        self._input_minutiaes = list(range(len(self._input_points)))
 
     def __see_common_and_spurious_points(self):
         to_show = [
-            {'type': 'Common base', 'list': self._possible_base_common_minutiaes},
-            {'type': 'Spurious base', 'list': self._possible_base_spurious_minutiaes},
-            {'type': 'Common input', 'list': self._possible_input_common_minutiaes},
-            {'type': 'Spurious input', 'list': self._possible_input_spurious_minutiaes}
+            {'type': 'Common base', 'list': self._possible_base_common_minutiaes, 'points': self._base_points},
+            {'type': 'Spurious base', 'list': self._possible_base_spurious_minutiaes, 'points': self._base_points},
+            {'type': 'Common input', 'list': self._possible_input_common_minutiaes, 'points': self._input_points},
+            {'type': 'Spurious input', 'list': self._possible_input_spurious_minutiaes, 'points': self._input_points}
         ]
 
         for item in to_show:
             print('\n{} points: '.format(item['type']))
 
-            for point in item['list']:
-                print('\t', point.get_description())
+            for position in item['list']:
+                print('\t', item['points'][position])
 
             print('Possible {} points found: {}'.format(item['type'], len(item['list'])))
 
@@ -122,17 +110,15 @@ class MatchingTree(ErrorMessage):
         if (len(self._possible_base_common_minutiaes) <= 0) or (len(self._possible_input_common_minutiaes) <= 0):
             return self._DONT_MATCH_FINGERPRINT
 
-    def __mark_characteristic_point(self, fingerprint, list_minutiaes, name='fingerprint'):
+    def __mark_characteristic_point(self, fingerprint, list_minutiaes, points, name='fingerprint'):
         colors = {'e': (150, 0, 0), 'b': (0, 150, 0)}
 
         fingerprint_image = fingerprint.show_fingerprint()
 
         result = cv.cvtColor(fingerprint_image, cv.COLOR_GRAY2RGB)
 
-        for characteristic_point in list_minutiaes:
-            singularity = characteristic_point.get_point_type()
-            j = characteristic_point.get_posy()
-            i = characteristic_point.get_posx()
+        for position in list_minutiaes:
+            j, i, singularity = points[position]
 
             cv.circle(result, (i, j), radius=2, color=colors[singularity], thickness=2)
 
@@ -147,27 +133,31 @@ class MatchingTree(ErrorMessage):
         print('Possible trees found: ', len(all_possible_trees))
         count = 0
         for tree in all_possible_trees:
-            self.__mark_characteristic_point(base_fingerprint, tree['base'], 'base_tree_' + str(count))
-            self.__mark_characteristic_point(input_fingerprint, tree['input'], 'input_tree_' + str(count))
+            self.__mark_characteristic_point(base_fingerprint, tree['base'], self._base_points,
+                                             'base_tree_' + str(count))
+            self.__mark_characteristic_point(input_fingerprint, tree['input'], self._input_points,
+                                             'input_tree_' + str(count))
             count += 1
 
         cv.destroyAllWindows()
 
-    def __show_description_of_minutiae_from_list(self, list):
+    def __show_description_of_minutiae_from_list(self, list, points):
         print('Description of minutiaes from list:')
 
-        for characteristic_point in list:
-            print('\t', characteristic_point.get_description())
+        for position in list:
+            print('\t', points[position])
 
     def __sort_possible_common_points(self):
         sorted_possibble_common_base_minutiaes = sorted(self._possible_base_common_minutiaes,
-                                                        key=attrgetter('posy', 'posx'), reverse=True)
+                                                        key=lambda position: self._base_points[position][:2],
+                                                        reverse=True)
         sorted_possibble_common_input_minutiaes = sorted(self._possible_input_common_minutiaes,
-                                                         key=attrgetter('posy', 'posx'), reverse=True)
+                                                         key=lambda position: self._input_points[position][:2],
+                                                         reverse=True)
 
         ###############Debug#################################
-        # self.__show_description_of_minutiae_from_list(sorted_possibble_common_base_minutiaes)
-        # self.__show_description_of_minutiae_from_list(sorted_possibble_common_input_minutiaes)
+        # self.__show_description_of_minutiae_from_list(sorted_possibble_common_base_minutiaes, self._base_points)
+        # self.__show_description_of_minutiae_from_list(sorted_possibble_common_input_minutiaes, self._input_points)
 
         return (sorted_possibble_common_base_minutiaes, sorted_possibble_common_input_minutiaes)
 
@@ -188,7 +178,9 @@ class MatchingTree(ErrorMessage):
         is_found = False
 
         while not is_found:
-            input_edge = Edge(input_minutiaes[input_pos], input_minutiaes[input_pos + next_destination_pos])
+            input_edge = Edge(self._input_points[input_minutiaes[input_pos]],
+                              self._input_points[input_minutiaes[input_pos + next_destination_pos]])
+            self._explored_edges += 1
             if input_edge.get_length() > (base_edge.get_length() + self._matching_distance_tolerance):
                 is_found = False
                 break
@@ -211,7 +203,6 @@ class MatchingTree(ErrorMessage):
     def __search_start_of_tree(self, base_minutiaes, input_minutiaes):
         possible_base_minutiaes_tree = []
         possible_input_minutiaes_tree = []
-        all_posible_trees = []
 
         base_length = len(base_minutiaes)
         input_length = len(input_minutiaes)
@@ -219,7 +210,11 @@ class MatchingTree(ErrorMessage):
         is_found = False
 
         for base_pos in range(base_length - 1):
-            base_edge = Edge(base_minutiaes[base_pos], base_minutiaes[base_pos + 1])
+            base_edge = Edge(self._base_points[base_minutiaes[base_pos]],
+                             self._base_points[base_minutiaes[base_pos + 1]])
+
+            if self.__is_search_exhausted():
+                break
 
             for input_pos in range(input_length - 1):
                 is_found, possible_input_minutiaes_tree, pos_dest = self.__create_input_edge(input_minutiaes, input_pos,
@@ -245,10 +240,9 @@ class MatchingTree(ErrorMessage):
                 # print('\tPosible common input Minutiaes: ', len(possible_input_minutiaes_tree))
                 # print('\tPosible spurious input Minutiaes: ', len(possible_input_spurious))
 
-                all_posible_trees.append({'base': possible_base_minutiaes_tree, 'input': possible_input_minutiaes_tree,
-                                          'spu_b': base_minutiaes[:base_pos], 'spu_i': possible_input_spurious})
-
-        return all_posible_trees
+                # The trees are found one at a time, so the search can stop without looking for the next ones
+                yield {'base': possible_base_minutiaes_tree, 'input': possible_input_minutiaes_tree,
+                       'spu_b': base_minutiaes[:base_pos], 'spu_i': possible_input_spurious}
 
     def __set_full_edge(self, first_tree, pos, edge, type_edge):
         try:
@@ -263,17 +257,19 @@ class MatchingTree(ErrorMessage):
 
     def __create_edge(self, tree, first_tree, pos, ori_base, ori_input, dest_base, dest_input):
         try:
-            base_edge = Edge(tree['base'][ori_base], tree['base'][dest_base])
+            base_edge = Edge(self._base_points[tree['base'][ori_base]], self._base_points[tree['base'][dest_base]])
         except:
             raise IndexError
 
         try:
-            input_edge = Edge(tree['input'][ori_input], tree['input'][dest_input])
+            input_edge = Edge(self._input_points[tree['input'][ori_input]],
+                              self._input_points[tree['input'][dest_input]])
         except:
             raise IndexError
 
         base_edge = self.__set_full_edge(first_tree, pos, base_edge, 'edge_base')
         input_edge = self.__set_full_edge(first_tree, pos, input_edge, 'edge_input')
+        self._explored_edges += 1
 
         return (base_edge, input_edge)
 
@@ -341,14 +337,32 @@ class MatchingTree(ErrorMessage):
         return (step_ori_base, step_ori_input, step_dest_base + 1, step_dest_input + 1)
 
     def __obtain_first_trees(self, all_possible_trees):
-        first_tree = [{'base': [], 'input': [], 'spu_b': [], 'spu_i': [], 'edge_base': [], 'edge_input': []} for _ in
-                      range(len(all_possible_trees))]
+        """
+        Grow the trees found by __search_start_of_tree. A tree can not have more edges than minutiae - 1, so the
+        trees that can not beat the biggest one found so far are not grown; the base minutiae of the next trees are
+        always fewer, so the search ends when they can not beat it. The search also ends with the first tree that is
+        big enough to be a match or when the budget of edges or time is exhausted.
+        """
+        first_tree = []
+        best_length = -1
+        minimum_score = self.__minimum_score()
 
-        pos = 0
         for tree in all_possible_trees:
             base_length = len(tree['base'])
             input_length = len(tree['input'])
 
+            if (base_length - 1) <= best_length:
+                break
+
+            if (input_length - 1) <= best_length:
+                continue
+
+            if self.__is_search_exhausted():
+                break
+
+            first_tree.append({'base': [], 'input': [], 'spu_b': [], 'spu_i': [], 'edge_base': [], 'edge_input': []})
+            pos = len(first_tree) - 1
+
             base_edge, input_edge = self.__create_edge(tree, first_tree, pos, 0, 0, 1, 1)
             self.__set_edge_into_tree(tree, first_tree, pos, 0, 0, 1, 1, base_edge, input_edge, mode='initial')
 
@@ -367,7 +381,7 @@ class MatchingTree(ErrorMessage):
             step_dest_base = 2
             step_dest_input = 2
             while (step_dest_base <= base_length - 1):
-                if step_dest_input > input_length - 1:
+                if step_dest_input > input_length - 1 or self.__is_search_exhausted():
                     break
 
                 step_ori_base, step_ori_input, step_dest_base, step_dest_input = self.__compare_edges_tree(
@@ -395,7 +409,11 @@ class MatchingTree(ErrorMessage):
             # print('\tPosible common input Minutiaes: ', len(first_tree[pos]['input']))
             # print('\tPosible spurious input Minutiaes: ', len(first_tree[pos]['spu_i']))
 
-            pos += 1
+            best_length = max(best_length, len(first_tree[pos]['edge_base']))
+
+            # The trees have as many base as input minutiae, the first one that is big enough is a match
+            if len(first_tree[pos]['base']) >= minimum_score:
+                break
 
         return first_tree
 
@@ -418,14 +436,37 @@ class MatchingTree(ErrorMessage):
 
         return bigest_tree
 
-    def __set_new_local_description(self, common_minutiae, spurious_minutiae):
-        local_area = LocalArea()
-        process_message = local_area.get_new_neighborhood(common_minutiae, spurious_minutiae)
+    @staticmethod
+    def __replace_descriptors(descriptors, positions, new_descriptors):
+        """
+        Return a copy of the descriptor matrix where the rows of positions are the new ones, it is widened (with
+        NaN) when the new rows have more tuples
+        """
+        number_tuples = max(descriptors.shape[1], new_descriptors.shape[1])
+        result = np.full((len(descriptors), number_tuples, 4), np.nan)
+        result[:, :descriptors.shape[1]] = descriptors
+        result[positions] = np.nan
+        result[positions, :new_descriptors.shape[1]] = new_descriptors
+
+        return result
+
+    def __set_new_local_description(self, common_minutiae, spurious_minutiae, fingerprint='base'):
+        points = self._base_points if fingerprint == 'base' else self._input_points
 
-        if process_message == self._FINGERPRINT_OK:
-            return spurious_minutiae
+        local_area = LocalArea()
+        new_descriptors = local_area.get_new_descriptors([points[position] for position in common_minutiae],
+                                                         [points[position] for position in spurious_minutiae])
+        if new_descriptors is None:
+            raise Exception('Few common minutias')
+
+        if fingerprint == 'base':
+            self._base_descriptors = self.__replace_descriptors(self._base_descriptors, spurious_minutiae,
+                                                                new_descriptors)
+        else:
+            self._input_descriptors = self.__replace_descriptors(self._input_descriptors, spurious_minutiae,
+                                                                 new_descriptors)
 
-        raise Exception('Few common minutias')
+        return spurious_minutiae
 
     def __clear_all_lists(self):
         self._base_minutiaes.clear()
@@ -453,19 +494,21 @@ class MatchingTree(ErrorMessage):
 
         sorted_possibble_common_base_minutiaes, sorted_possibble_common_input_minutiaes = self.__sort_possible_common_points()
         ############################ Debug ######################################
-        # self.__mark_characteristic_point(base_fingerprint, sorted_possibble_common_base_minutiaes, 'base')
-        # self.__mark_characteristic_point(input_fingerprint, sorted_possibble_common_input_minutiaes, 'input')
+        # self.__mark_characteristic_point(base_fingerprint, sorted_possibble_common_base_minutiaes, self._base_points,
+        #                                  'base')
+        # self.__mark_characteristic_point(input_fingerprint, sorted_possibble_common_input_minutiaes,
+        #                                  self._input_points, 'input')
 
         all_possible_trees = self.__search_start_of_tree(sorted_possibble_common_base_minutiaes,
                                                          sorted_possibble_common_input_minutiaes)
 
-        if len(all_possible_trees) <= 0:
-            raise Exception('There are not possible trees')
-
         ############################ Debug ######################################
         # self.__show_all_possible_trees(all_possible_trees, base_fingerprint, input_fingerprint)
 
         first_trees = self.__obtain_first_trees(all_possible_trees)
+        if len(first_trees) <= 0:
+            raise Exception('There are not possible trees')
+
         bigest_tree = self.__obtain_bigest_tree(first_trees)
         first_trees.clear()
         bigest_tree['spu_b'] += self._possible_base_spurious_minutiaes
@@ -473,11 +516,23 @@ class MatchingTree(ErrorMessage):
 
         return bigest_tree
 
-    def __is_figerprint_match(self, bigest_tree):
+    def __is_search_exhausted(self):
+        if self._max_explored_edges is not None and self._explored_edges >= self._max_explored_edges:
+            return True
+
+        return self._deadline is not None and perf_counter() >= self._deadline
+
+    def get_explored_edges(self):
+        return self._explored_edges
+
+    def __minimum_score(self):
         num_base_minutiaes = len(self._base_minutiaes)
         num_input_minutiaes = len(self._input_minutiaes)
 
-        minimum_score = ((num_base_minutiaes + num_input_minutiaes) // 4) - 1
+        return ((num_base_minutiaes + num_input_minutiaes) // 4) - 1
+
+    def __is_figerprint_match(self, bigest_tree):
+        minimum_score = self.__minimum_score()
 
         if len(bigest_tree['base']) == len(bigest_tree['input']):
             if len(bigest_tree['base']) >= minimum_score:
@@ -489,6 +544,9 @@ class MatchingTree(ErrorMessage):
 
         global new_base_minutiaes, new_input_minutiaes
 
+        self._explored_edges = 0
+        self._deadline = None if self._time_budget is None else perf_counter() + self._time_budget
+
         self.__get_lists_of_characteristic_points(base_fingerprint=base_fingerprint,
                                                   input_fingerprint=input_fingerprint)
 
@@ -497,6 +555,10 @@ class MatchingTree(ErrorMessage):
         except:
             return self._DONT_MATCH_FINGERPRINT
 
+        # The second phase only looks for a bigger tree, it is not needed when the first one is already a match
+        if self.__is_figerprint_match(bigest_tree) == self._MATCH_FINGERPRINT:
+            return self._MATCH_FINGERPRINT
+
         ############################ Debug ######################################
         # print('\n\tBiggest tree')
         # print('Common base minutiaes: ', len(bigest_tree['base']))
@@ -509,9 +571,11 @@ class MatchingTree(ErrorMessage):
         is_tree_compleate = False
         try:
             new_base_minutiaes = self.__set_new_local_description(common_minutiae=bigest_tree['base'],
-                                                                  spurious_minutiae=bigest_tree['spu_b'])
+                                                                  spurious_minutiae=bigest_tree['spu_b'],
+                                                                  fingerprint='base')
             new_input_minutiaes = self.__set_new_local_description(common_minutiae=bigest_tree['input'],
-                                                                   spurious_minutiae=bigest_tree['spu_i'])
+                                                                   spurious_minutiae=bigest_tree['spu_i'],
+                                                                   fingerprint='input')
         except:
             is_tree_compleate = True
 
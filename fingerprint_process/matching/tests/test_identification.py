@@ -0,0 +1,73 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from fingerprint_process.matching.identification import IdentificationEngine, get_core_histogram
+from fingerprint_process.matching.matching_core import MatchingCore
+from fingerprint_process.models.fingerprint_template import FingerprintTemplate
+from fingerprint_process.utils.benchmark import synthetic_gallery
+
+
+def moved_template(template: FingerprintTemplate, shift: tuple) -> FingerprintTemplate:
+    minutiae = template.get_minutiae().copy()
+    core_points = template.get_core_points().copy()
+    for points in (minutiae, core_points):
+        points['posx'] += shift[0]
+        points['posy'] += shift[1]
+
+    return FingerprintTemplate(minutiae=minutiae, core_points=core_points)
+
+
+class TestIdentification(unittest.TestCase):
+
+    def setUp(self):
+        self.gallery = synthetic_gallery(200, seed=3)
+
+    def test_core_histogram(self):
+        histogram = get_core_histogram(self.gallery.get_template(0).get_core_points())
+
+        self.assertEqual(histogram.sum(), len(self.gallery.get_template(0).get_core_points()))
+
+    def test_enrolled_fingerprint_is_the_first(self):
+        probe = moved_template(self.gallery.get_template(120), (6, -4))
+
+        result = IdentificationEngine(self.gallery).identify(probe, top_k=3)
+
+        self.assertEqual(result[0][0], self.gallery.get_key(120))
+
+    def test_coarse_filter_keeps_every_match(self):
+        probe = moved_template(self.gallery.get_template(40), (-3, 5))
+        matching = MatchingCore()
+        expected = [position for position in range(self.gallery.get_size())
+                    if matching.matching(self.gallery.get_template(position), probe) == matching.MATCH_FINGERPRINT]
+
+        candidates = self.gallery.get_candidates(probe)
+
+        self.assertTrue(np.isin(expected, candidates).all())
+        self.assertLess(len(candidates), self.gallery.get_size())
+
+    def test_workers_give_the_same_result(self):
+        probe = moved_template(self.gallery.get_template(7), (2, 2))
+        expected = IdentificationEngine(self.gallery).identify(probe)
+
+        engine = IdentificationEngine(self.gallery, workers=2)
+        engine.start()
+        try:
+            self.assertEqual(engine.identify(probe), expected)
+        finally:
+            engine.shutdown()
+
+    def test_shutdown_waits_for_the_identifications(self):
+        probe = moved_template(self.gallery.get_template(7), (2, 2))
+        expected = IdentificationEngine(self.gallery).identify(probe)
+
+        engine = IdentificationEngine(self.gallery, workers=2)
+        engine.start()
+        with ThreadPoolExecutor(max_workers=1) as threads:
+            running = threads.submit(engine.identify, probe)
+            engine.shutdown()
+
+            self.assertEqual(running.result(), expected)
+
+        self.assertEqual(engine.identify(probe), expected)
@@ -0,0 +1,153 @@
+import random
+import unittest
+
+import numpy as np
+
+from fingerprint_process.description.fingerprint import Fingerprint
+from fingerprint_process.matching.matching_core import MatchingCore
+from fingerprint_process.models.core_point import CorePoint
+from fingerprint_process.models.minutia import Minutiae
+
+
+def reference_align_values(matching: MatchingCore, base_cores: list, input_cores: list) -> list:
+    # Dictionary of translations and loops over the CorePoint objects used before the template arrays
+    possibles_align_values = {}
+    for input_core in input_cores:
+        for base_core in base_cores:
+            if base_core.get_point_type() == input_core.get_point_type():
+                trans_x = base_core.get_posx() - input_core.get_posx()
+                trans_y = base_core.get_posy() - input_core.get_posy()
+                possibles_align_values.setdefault((trans_x, trans_y),
+                                                  (trans_x, trans_y, base_core.get_posx(), base_core.get_posy()))
+
+    align_values = []
+    for translation in possibles_align_values.values():
+        count = 0
+        for input_core in input_cores:
+            pos_x = input_core.get_posx() + translation[0]
+            pos_y = input_core.get_posy() + translation[1]
+            if any(base_core.get_posx() == pos_x and base_core.get_posy() == pos_y and
+                   base_core.get_point_type() == input_core.get_point_type() for base_core in base_cores):
+                count += 1
+
+        if count >= matching._minimum_cores:
+            align_values.append(translation)
+
+    return align_values
+
+
+def reference_scores(matching: MatchingCore, base_minutiae: list, input_minutiae: list, align_values: list) -> list:
+    # Nested loops used before the broadcasted kernel, the mapped minutiae are never cleared between translations
+    scores = []
+    map_input_minutiaes = []
+    for translation in align_values:
+        for input_minutia in input_minutiae:
+            map_input_minutiaes.append((input_minutia.get_posx() + translation[0],
+                                        input_minutia.get_posy() + translation[1],
+                                        input_minutia.get_point_type()))
+
+        count = 0
+        for map_x, map_y, map_type in map_input_minutiaes:
+            for base_minutia in base_minutiae:
+                pos_x = base_minutia.get_posx()
+                pos_y = base_minutia.get_posy()
+                distance = np.sqrt((pos_y - translation[3]) ** 2 + (pos_x - translation[2]) ** 2)
+                tolerance = ((distance // matching._neighborhood_area) + 1) * matching._distance_tolerance
+
+                if abs(pos_x - map_x) <= tolerance and abs(pos_y - map_y) <= tolerance and \
+                        base_minutia.get_point_type() == map_type:
+                    count += 1
+                    break
+
+        scores.append(count)
+
+    return scores
+
+
+def random_fingerprint(rng: random.Random, minutiae: list = None, shift: tuple = (0, 0)) -> Fingerprint:
+    if minutiae is None:
+        minutiae = [Minutiae(posy=rng.randrange(288), posx=rng.randrange(256), angle=0.0,
+                             point_type=rng.choice('eb')) for _ in range(rng.randrange(0, 60))]
+    else:
+        # Same fingerprint moved and with some noise in the positions
+        minutiae = [Minutiae(posy=m.get_posy() + shift[1] + rng.randint(-2, 2),
+                             posx=m.get_posx() + shift[0] + rng.randint(-2, 2), angle=0.0,
+                             point_type=m.get_point_type()) for m in minutiae if rng.random() > 0.2]
+
+    core_points = [CorePoint(posy=rng.randrange(288), posx=rng.randrange(256), angle=0.0,
+                             point_type=rng.choice('dlw')) for _ in range(rng.randrange(1, 5))]
+
+    fingerprint = Fingerprint(show_result=False, save_result=False)
+    fingerprint.set_minutiae_list(minutiae)
+    fingerprint.set_core_points_list(core_points)
+
+    return fingerprint
+
+
+class TestMatchingCore(unittest.TestCase):
+
+    def test_scores_match_nested_loops(self):
+        rng = random.Random(75)
+        for _ in range(200):
+            base_fingerprint = random_fingerprint(rng)
+            if rng.random() < 0.5:
+                shift = (rng.randint(-20, 20), rng.randint(-20, 20))
+                input_fingerprint = random_fingerprint(rng, base_fingerprint.get_minutiae_list(), shift)
+            else:
+                input_fingerprint = random_fingerprint(rng)
+
+            matching = MatchingCore()
+            matching._base_minutiaes = base_fingerprint.get_template().get_minutiae()
+            matching._input_minutiaes = input_fingerprint.get_template().get_minutiae()
+            align_values = [(rng.randint(-40, 40), rng.randint(-40, 40), rng.randrange(256), rng.randrange(288))
+                            for _ in range(rng.randrange(0, 6))]
+
+            self.assertEqual(
+                list(matching._MatchingCore__score_translations(align_values)),
+                reference_scores(matching, base_fingerprint.get_minutiae_list(),
+                                 input_fingerprint.get_minutiae_list(), align_values)
+            )
+
+    def test_result_matches_nested_loops(self):
+        rng = random.Random(11)
+        for _ in range(100):
+            base_fingerprint = random_fingerprint(rng)
+            shift = (rng.randint(-20, 20), rng.randint(-20, 20))
+            input_fingerprint = random_fingerprint(rng, base_fingerprint.get_minutiae_list(), shift)
+            input_fingerprint.set_core_points_list(
+                base_fingerprint.get_core_point_list() + input_fingerprint.get_core_point_list()
+            )
+
+            matching = MatchingCore()
+            result = matching.matching(base_fingerprint, input_fingerprint)
+
+            align_values = reference_align_values(matching, base_fingerprint.get_core_point_list(),
+                                                  input_fingerprint.get_core_point_list())
+            self.assertEqual(
+                [tuple(translation) for translation in matching._MatchingCore__align_cores(
+                    matching._MatchingCore__obtain_possible_align_value())],
+                align_values
+            )
+
+            scores = reference_scores(matching, base_fingerprint.get_minutiae_list(),
+                                      input_fingerprint.get_minutiae_list(), align_values)
+            minimum_score = max(len(base_fingerprint.get_minutiae_list()),
+                                len(input_fingerprint.get_minutiae_list())) // 2
+            is_match = any(score >= minimum_score for score in scores)
+            expected = matching.MATCH_FINGERPRINT if is_match else matching.DONT_MATCH_FINGERPRINT
+
+            self.assertEqual(result, expected)
+            self.assertEqual(
+                MatchingCore().matching(base_fingerprint.get_template(), input_fingerprint.get_template()),
+                expected
+            )
+
+    def test_same_fingerprint_matches(self):
+        rng = random.Random(7)
+        base_fingerprint = random_fingerprint(rng)
+        while len(base_fingerprint.get_minutiae_list()) < 10:
+            base_fingerprint = random_fingerprint(rng)
+
+        matching = MatchingCore()
+
+        self.assertEqual(matching.matching(base_fingerprint, base_fingerprint), matching.MATCH_FINGERPRINT)
@@ -0,0 +1,89 @@
+import contextlib
+import io
+import random
+import unittest
+
+from fingerprint_process.description.fingerprint import Fingerprint
+from fingerprint_process.description.local_area import LocalArea
+from fingerprint_process.matching.matching_process import MatchingProcess
+from fingerprint_process.models.core_point import CorePoint
+from fingerprint_process.models.minutia import Minutiae
+
+
+def reference_common_points(matching: MatchingProcess, base_minutiae: list, index_minutiae: list) -> list:
+    # Loops over the TupleFingerprint objects used before the descriptor matrix
+    def is_parent(base_tuples, index_tuples):
+        count = 0
+        for base_tuple in base_tuples:
+            for index_tuple in index_tuples:
+                if abs(base_tuple.get_ratio() - index_tuple.get_ratio()) <= matching._local_ratio_tolerance and \
+                        abs(base_tuple.get_angle() - index_tuple.get_angle()) <= matching._local_angle_tolerance and \
+                        base_tuple.get_origin_minutiae_type() == index_tuple.get_origin_minutiae_type() and \
+                        base_tuple.get_destination_minutiae_type() == index_tuple.get_destination_minutiae_type():
+                    count += 1
+                    break
+
+        return count >= 2
+
+    common_points = []
+    index_minutiae_to_compare = [[index_minutia, False] for index_minutia in index_minutiae]
+    for base_position, base_minutia in enumerate(base_minutiae):
+        for index_position, index_minutia in enumerate(index_minutiae_to_compare):
+            if index_minutia[1]:
+                continue
+
+            if is_parent(base_minutia.get_tuple_fingerprint_list(), index_minutia[0].get_tuple_fingerprint_list()) \
+                    and base_minutia.get_point_type() == index_minutia[0].get_point_type():
+                index_minutia[1] = True
+                common_points.append((index_position, base_position))
+                break
+
+    return common_points
+
+
+def described_fingerprint(minutiae: list) -> Fingerprint:
+    LocalArea().get_local_structure(minutiae)
+
+    fingerprint = Fingerprint(show_result=False, save_result=False)
+    fingerprint.set_minutiae_list(minutiae)
+    fingerprint.set_core_points_list([CorePoint(posy=140, posx=120, angle=0.0, point_type='l')])
+
+    return fingerprint
+
+
+def random_pair(rng: random.Random) -> tuple:
+    base_minutiae = [Minutiae(posy=rng.randrange(288), posx=rng.randrange(256), angle=0.0,
+                              point_type=rng.choice('eb')) for _ in range(rng.randrange(12, 50))]
+    # Same fingerprint with some noise in the positions and lost minutiae
+    index_minutiae = [Minutiae(posy=minutia.get_posy() + rng.randint(-2, 2),
+                               posx=minutia.get_posx() + rng.randint(-2, 2), angle=0.0,
+                               point_type=minutia.get_point_type())
+                      for minutia in base_minutiae if rng.random() > 0.3]
+
+    return described_fingerprint(base_minutiae), described_fingerprint(index_minutiae)
+
+
+class TestMatchingProcess(unittest.TestCase):
+
+    def test_common_points_match_nested_loops(self):
+        rng = random.Random(5)
+        for _ in range(30):
+            base_fingerprint, index_fingerprint = random_pair(rng)
+
+            matching = MatchingProcess()
+            matching._MatchingProcess__get_lists_of_characteristic_points(base_fingerprint, index_fingerprint)
+            matching._MatchingProcess__common_points()
+
+            expected = reference_common_points(matching, base_fingerprint.get_minutiae_list(),
+                                               index_fingerprint.get_minutiae_list())
+
+            self.assertEqual(matching._possible_common_minutias, expected)
+
+    def test_matching_is_quiet_by_default(self):
+        base_fingerprint, index_fingerprint = random_pair(random.Random(9))
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            MatchingProcess().matching(base_fingerprint, index_fingerprint)
+
+        self.assertEqual(output.getvalue(), '')
@@ -0,0 +1,57 @@
+import random
+import unittest
+
+import numpy as np
+
+from fingerprint_process.matching.match import match
+from fingerprint_process.matching.matching_tree import MatchingTree
+from fingerprint_process.matching.tests.test_matching_process import random_pair
+
+
+def new_matching(**kwargs) -> MatchingTree:
+    return MatchingTree(local_ratio_tolerance=.1, local_angle_tolerance=1, **kwargs)
+
+
+class TestMatchingTree(unittest.TestCase):
+
+    def setUp(self):
+        base_fingerprint, input_fingerprint = random_pair(random.Random(21))
+        # The templates give new lists of minutiae on every matching
+        self.base_template = base_fingerprint.get_template()
+        self.input_template = input_fingerprint.get_template()
+
+    def test_same_fingerprint_matches(self):
+        matching = new_matching()
+
+        self.assertEqual(matching.matching(self.base_template, self.base_template), matching.MATCH_FINGERPRINT)
+        self.assertGreater(matching.get_explored_edges(), 0)
+
+    def test_budget_not_reached_keeps_the_result(self):
+        exhaustive_matching = new_matching()
+        result = exhaustive_matching.matching(self.base_template, self.input_template)
+
+        matching = new_matching(max_explored_edges=exhaustive_matching.get_explored_edges() + 1, time_budget=60)
+
+        self.assertEqual(matching.matching(self.base_template, self.input_template), result)
+        self.assertEqual(matching.get_explored_edges(), exhaustive_matching.get_explored_edges())
+
+    def test_exhausted_budget_does_not_match(self):
+        for matching in (new_matching(max_explored_edges=0), new_matching(time_budget=0)):
+            self.assertEqual(matching.matching(self.base_template, self.base_template), matching.DONT_MATCH_FINGERPRINT)
+            self.assertEqual(matching.get_explored_edges(), 0)
+
+    def test_match_passes_the_budget_to_the_tree(self):
+        matching = new_matching()
+
+        self.assertEqual(match(self.base_template, self.base_template, mode='tree'), matching.MATCH_FINGERPRINT)
+        self.assertEqual(match(self.base_template, self.base_template, mode='tree', max_explored_edges=0),
+                         matching.DONT_MATCH_FINGERPRINT)
+
+    def test_fingerprints_are_not_modified(self):
+        # This pair reaches the second phase, where the local structure of the spurious minutiae is computed again
+        base_fingerprint, input_fingerprint = random_pair(random.Random(8))
+        expected = input_fingerprint.get_template().get_descriptor_matrix()
+
+        new_matching().matching(base_fingerprint, input_fingerprint)
+
+        np.testing.assert_array_equal(input_fingerprint.get_template().get_descriptor_matrix(), expected)
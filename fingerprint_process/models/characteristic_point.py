@@ -5,7 +5,8 @@ import uuid
 class CharacteristicPoint(object):
     def __init__(self, posy=0, posx=0, angle=0.0, point_type='n'):
         super().__init__()
-        self.uid_point = uuid.uuid4().hex
+        # The uuid is generated the first time it is needed
+        self._uid_point = None
         self.posy = posy
         self.posx = posx
         self.angle = angle
@@ -13,6 +14,17 @@ class CharacteristicPoint(object):
 
         # self.marked_image = []
 
+    @property
+    def uid_point(self):
+        if self._uid_point is None:
+            self._uid_point = uuid.uuid4().hex
+
+        return self._uid_point
+
+    @uid_point.setter
+    def uid_point(self, uid_point):
+        self._uid_point = uid_point
+
     def get_minutiae_id(self):
         return self.uid_point
 
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+import struct
+from typing import List, Optional
+
+import numpy as np
+from numpy import ndarray
+
+from fingerprint_process.models.core_point import CorePoint
+from fingerprint_process.models.minutia import Minutiae
+from fingerprint_process.models.tuple_fingerprint import TupleFingerprint
+
+POINT_DTYPE = np.dtype([
+    ('posy', np.int32),
+    ('posx', np.int32),
+    ('angle', np.float64),
+    ('point_type', 'U1')
+])
+
+DESCRIPTOR_DTYPE = np.dtype([
+    ('minutia', np.int32),
+    ('ratio', np.float64),
+    ('angle', np.float64),
+    ('origin_type', 'U1'),
+    ('destination_type', 'U1')
+])
+
+# Version of the encoding, number of minutiae, core points and descriptors, and length of the name
+# (see FingerprintTemplate.to_bytes)
+HEADER_FORMAT = '<BIIII'
+TEMPLATE_VERSION = 1
+
+
+class FingerprintTemplate(object):
+    """
+    Compact description of a fingerprint: minutiae and core points are kept as structured arrays (posy, posx, angle,
+    point_type) and the local structure of the minutiae as an optional descriptor array, where each row is one
+    tuple (ratio, angle and type of the two neighbours) of the minutia in column 'minutia'.
+
+    It offers the same get_minutiae_list / get_core_point_list interface as Fingerprint. The matchers read the arrays
+    directly, so the point objects are only created when those lists are requested.
+    """
+
+    def __init__(
+            self,
+            minutiae: Optional[ndarray] = None,
+            core_points: Optional[ndarray] = None,
+            descriptors: Optional[ndarray] = None,
+            name_fingerprint: str = 'fingerprint'
+    ):
+        super().__init__()
+        self._minutiae = np.zeros(0, dtype=POINT_DTYPE) if minutiae is None else np.asarray(minutiae, POINT_DTYPE)
+        self._core_points = np.zeros(0, dtype=POINT_DTYPE) if core_points is None else \
+            np.asarray(core_points, POINT_DTYPE)
+        self._descriptors = None if descriptors is None else np.asarray(descriptors, DESCRIPTOR_DTYPE)
+        self._name_fingerprint = name_fingerprint
+
+    @staticmethod
+    def __points_to_array(points: list) -> ndarray:
+        return np.array(
+            [(point.get_posy(), point.get_posx(), point.get_angle(), point.get_point_type()) for point in points],
+            dtype=POINT_DTYPE
+        )
+
+    @staticmethod
+    def __descriptors_to_array(minutiae: List[Minutiae]) -> Optional[ndarray]:
+        descriptors = [
+            (position, tuple_fingerprint.get_ratio(), tuple_fingerprint.get_angle(),
+             tuple_fingerprint.get_origin_minutiae_type(), tuple_fingerprint.get_destination_minutiae_type())
+            for position, minutia in enumerate(minutiae)
+            for tuple_fingerprint in minutia.get_tuple_fingerprint_list()
+        ]
+
+        if len(descriptors) == 0:
+            return None
+
+        return np.array(descriptors, dtype=DESCRIPTOR_DTYPE)
+
+    @classmethod
+    def from_points(
+            cls,
+            minutiae: List[Minutiae],
+            core_points: List[CorePoint],
+            name_fingerprint: str = 'fingerprint'
+    ) -> 'FingerprintTemplate':
+        return cls(
+            minutiae=cls.__points_to_array(minutiae),
+            core_points=cls.__points_to_array(core_points),
+            descriptors=cls.__descriptors_to_array(minutiae),
+            name_fingerprint=name_fingerprint
+        )
+
+    @classmethod
+    def from_fingerprint(cls, fingerprint) -> 'FingerprintTemplate':
+        """
+        Build the template of a Fingerprint object. A template is returned as it is.
+        """
+        if isinstance(fingerprint, FingerprintTemplate):
+            return fingerprint
+
+        return cls.from_points(
+            minutiae=fingerprint.get_minutiae_list(),
+            core_points=fingerprint.get_core_point_list(),
+            name_fingerprint=fingerprint.get_name_of_fingerprint()
+        )
+
+    def to_bytes(self) -> bytes:
+        """
+        Serialize the template as a header with the version of the encoding and the size of each part, followed by
+        the name (utf-8) and the raw bytes of the arrays. A template without descriptors is written with 0
+        descriptors.
+        """
+        name = self._name_fingerprint.encode('utf-8')
+        descriptors = np.zeros(0, dtype=DESCRIPTOR_DTYPE) if self._descriptors is None else self._descriptors
+        header = struct.pack(HEADER_FORMAT, TEMPLATE_VERSION, len(self._minutiae), len(self._core_points),
+                             len(descriptors), len(name))
+
+        return b''.join((header, name, self._minutiae.tobytes(), self._core_points.tobytes(), descriptors.tobytes()))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'FingerprintTemplate':
+        """
+        Build a template from the bytes given by to_bytes
+
+        :raise ValueError: When the bytes were written with another version of the encoding
+        """
+        version, number_minutiae, number_cores, number_descriptors, name_length = \
+            struct.unpack_from(HEADER_FORMAT, data)
+        if version != TEMPLATE_VERSION:
+            raise ValueError('Version {} of the template is not supported'.format(version))
+
+        offset = struct.calcsize(HEADER_FORMAT)
+
+        name = data[offset:offset + name_length].decode('utf-8')
+        offset += name_length
+
+        arrays = []
+        for dtype, count in ((POINT_DTYPE, number_minutiae), (POINT_DTYPE, number_cores),
+                             (DESCRIPTOR_DTYPE, number_descriptors)):
+            arrays.append(np.frombuffer(data, dtype=dtype, count=count, offset=offset).copy())
+            offset += dtype.itemsize * count
+
+        return cls(
+            minutiae=arrays[0],
+            core_points=arrays[1],
+            descriptors=arrays[2] if number_descriptors > 0 else None,
+            name_fingerprint=name
+        )
+
+    def get_name_of_fingerprint(self) -> str:
+        return self._name_fingerprint
+
+    def get_minutiae(self) -> ndarray:
+        return self._minutiae
+
+    def get_core_points(self) -> ndarray:
+        return self._core_points
+
+    def get_descriptors(self) -> Optional[ndarray]:
+        return self._descriptors
+
+    def get_descriptor_matrix(self) -> ndarray:
+        """
+        Pack the local structure as a float array (N, T, 4), where T is the greatest number of tuples of a minutia.
+        The columns are ratio, angle and the code points of the origin and destination types; the rows of a minutia
+        with fewer tuples are filled with NaN, so they never pass a tolerance test.
+        """
+        number_minutiae = len(self._minutiae)
+        if self._descriptors is None or len(self._descriptors) == 0:
+            return np.full((number_minutiae, 0, 4), np.nan)
+
+        owners = self._descriptors['minutia']
+        number_tuples = np.bincount(owners, minlength=number_minutiae)
+
+        # Position of every tuple inside the list of its minutia
+        first_tuple = np.concatenate(([0], np.cumsum(number_tuples)[:-1]))
+        order = np.argsort(owners, kind='stable')
+        positions = np.empty(len(owners), dtype=int)
+        positions[order] = np.arange(len(owners)) - first_tuple[owners[order]]
+
+        matrix = np.full((number_minutiae, number_tuples.max(), 4), np.nan)
+        matrix[owners, positions, 0] = self._descriptors['ratio']
+        matrix[owners, positions, 1] = self._descriptors['angle']
+        matrix[owners, positions, 2] = self._descriptors['origin_type'].view(np.int32)
+        matrix[owners, positions, 3] = self._descriptors['destination_type'].view(np.int32)
+
+        return matrix
+
+    @staticmethod
+    def get_positions(points: ndarray) -> ndarray:
+        """
+        Return the (N, 2) array of positions (x, y) of a structured array of points
+        """
+        return np.stack((points['posx'], points['posy']), axis=1)
+
+    def get_minutiae_list(self) -> List[Minutiae]:
+        """
+        Create the Minutiae objects of the template, with their local structure when the template has descriptors.
+        A new list is created on every call, so it can be modified without changing the template. The owner of each
+        TupleFingerprint is the position of its minutia in the template, so no uuid is generated.
+        """
+        minutiae = [Minutiae(posy=int(point['posy']), posx=int(point['posx']), angle=float(point['angle']),
+                             point_type=str(point['point_type'])) for point in self._minutiae]
+
+        if self._descriptors is not None:
+            tuple_fingerprint_lists = [[] for _ in minutiae]
+            for descriptor in self._descriptors:
+                tuple_fingerprint_lists[descriptor['minutia']].append(TupleFingerprint(
+                    int(descriptor['minutia']),
+                    float(descriptor['ratio']),
+                    float(descriptor['angle']),
+                    str(descriptor['origin_type']),
+                    str(descriptor['destination_type'])
+                ))
+
+            for minutia, tuple_fingerprint_list in zip(minutiae, tuple_fingerprint_lists):
+                minutia.set_tuple_fingerprint_list(tuple_fingerprint_list)
+
+        return minutiae
+
+    def get_core_point_list(self) -> List[CorePoint]:
+        return [CorePoint(posy=int(point['posy']), posx=int(point['posx']), angle=float(point['angle']),
+                          point_type=str(point['point_type'])) for point in self._core_points]
+
+    def show_characteristic_point_from_list(self, type_characteristic_point, mode='basic'):
+        if type_characteristic_point == 'core':
+            points = self._core_points
+        else:
+            points = self._minutiae
+
+        for position, point in enumerate(points):
+            print((int(point['posy']), int(point['posx']), float(point['angle']), str(point['point_type'])))
+
+            if mode != 'basic' and type_characteristic_point != 'core' and self._descriptors is not None:
+                for descriptor in self._descriptors[self._descriptors['minutia'] == position]:
+                    print("\t", descriptor)
+
+        print("Total {} points: {}".format(type_characteristic_point, len(points)))
+
+        print('\n*********************************************************************************************\n')
+
+    def get_size(self) -> int:
+        """
+        Return the memory used by the arrays of the template in bytes
+        """
+        size = self._minutiae.nbytes + self._core_points.nbytes
+
+        return size if self._descriptors is None else size + self._descriptors.nbytes
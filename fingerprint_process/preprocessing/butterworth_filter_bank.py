@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+import os.path
+from functools import lru_cache
+
+import numpy as np
+from numpy import ndarray
+
+MAX_CACHED_BANKS = 8
+
+
+def _distance_to_centre(rows: int, columns: int) -> ndarray:
+    k = np.arange(rows).reshape(-1, 1)
+    l = np.arange(columns).reshape(1, -1)
+
+    return np.sqrt(np.power(k - (rows / 2), 2) + np.power(l - (columns / 2), 2))
+
+
+def build_butterworth_filter_bank(rows: int, columns: int, number_filters: int) -> ndarray:
+    """
+    Build the ring filters used by the spectral quality index. Every ideal low pass filter H[nf] keeps the
+    frequencies whose distance to the centre of the spectrum is below 6 + 6*nf and each ring is the difference
+    between two consecutive low pass filters.
+
+    :param rows: (int) Rows of the (optimised) DFT image
+    :param columns: (int) Columns of the (optimised) DFT image
+    :param number_filters: (int) Number of low pass filters, the bank has number_filters - 1 rings
+
+    :return: An int8 array (number_filters - 1, rows, columns) whose values are 0 or 1
+    """
+    cut_off_frequency = 6 + 6 * np.arange(number_filters)
+
+    distance = _distance_to_centre(rows, columns)
+
+    low_pass = distance[np.newaxis, :, :] <= cut_off_frequency[:, np.newaxis, np.newaxis]
+
+    return np.diff(low_pass.astype(np.int8), axis=0)
+
+
+@lru_cache(maxsize=MAX_CACHED_BANKS)
+def load_butterworth_filter_bank(path_file: str, rows: int, columns: int, number_filters: int) -> ndarray:
+    """
+    Return the ring filter bank of the given size. The first call of the process memory-maps the .npy file at
+    path_file (it is built and saved when the file does not exist or was made for another size) and the following
+    calls reuse the same read-only array.
+
+    :param path_file: (str) Path of the .npy file that stores the bank
+    :param rows: (int) Rows of the (optimised) DFT image
+    :param columns: (int) Columns of the (optimised) DFT image
+    :param number_filters: (int) Number of low pass filters of the bank
+
+    :return: A read-only array (number_filters - 1, rows, columns)
+    """
+    shape = (number_filters - 1, rows, columns)
+
+    if os.path.isfile(path_file):
+        try:
+            bank = np.load(path_file, mmap_mode='r')
+        except (OSError, ValueError):
+            bank = None
+
+        if bank is not None and bank.shape == shape:
+            return bank
+
+    bank = build_butterworth_filter_bank(rows, columns, number_filters)
+    try:
+        np.save(path_file, bank)
+    except OSError:
+        # A read-only file system only loses the copy on disk
+        pass
+
+    bank.setflags(write=False)
+
+    return bank
+
+
+@lru_cache(maxsize=MAX_CACHED_BANKS)
+def get_ring_label_map(rows: int, columns: int, number_filters: int) -> ndarray:
+    """
+    Label every frequency of the spectrum with the ring of the bank that contains it, so the energy of all the
+    rings can be obtained with one np.bincount instead of one product per filter. The frequencies outside every
+    ring get the label number_filters - 1.
+
+    :param rows: (int) Rows of the (optimised) DFT image
+    :param columns: (int) Columns of the (optimised) DFT image
+    :param number_filters: (int) Number of low pass filters of the bank
+
+    :return: A read-only int array (rows, columns) with values between 0 and number_filters - 1
+    """
+    cut_off_frequency = 6 + 6 * np.arange(number_filters)
+
+    distance = _distance_to_centre(rows, columns)
+
+    # Ring i holds the distances in (cut_off_frequency[i], cut_off_frequency[i + 1]]
+    labels = np.searchsorted(cut_off_frequency, distance, side='left') - 1
+    labels[(labels < 0) | (labels >= number_filters - 1)] = number_filters - 1
+
+    labels.setflags(write=False)
+
+    return labels
+
+
+def clear_butterworth_filter_banks() -> None:
+    load_butterworth_filter_bank.cache_clear()
+    get_ring_label_map.cache_clear()
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+import tracemalloc
+from types import MappingProxyType
+from typing import Callable, List, Optional
+
+from numpy import ndarray
+
+from fingerprint_process.preprocessing.preprocessing_fingerprint import PreprocessingFingerprint
+
+
+def get_read_only(value):
+    """
+    Return a read-only view of an array, any other value is returned as it is
+    """
+    if isinstance(value, ndarray):
+        value = value.view()
+        value.setflags(write=False)
+
+    return value
+
+
+class StageResult(object):
+    """
+    Outputs of one stage of the enhancement with its time in milliseconds and, when the pipeline traces the memory,
+    the peak of memory in KiB allocated while it ran. The arrays are read-only views: the later stages create new
+    arrays instead of changing the ones of the previous stages.
+    """
+    __slots__ = ('_name', '_outputs', '_time', '_allocated')
+
+    def __init__(self, name: str, outputs: dict, time: float, allocated: Optional[float] = None):
+        super().__init__()
+        self._name = name
+        self._outputs = MappingProxyType({key: get_read_only(value) for key, value in outputs.items()})
+        self._time = time
+        self._allocated = allocated
+
+    def get_name(self) -> str:
+        return self._name
+
+    def get_outputs(self) -> MappingProxyType:
+        return self._outputs
+
+    def get_output(self, key: str):
+        return self._outputs[key]
+
+    def get_time(self) -> float:
+        return self._time
+
+    def get_allocated(self) -> Optional[float]:
+        return self._allocated
+
+
+def poor_spatial_quality(minimum_score: float) -> Callable[[StageResult], bool]:
+    """
+    Build a stop condition that ends the pipeline after ridge_segment when the quality average (the spatial index
+    of the image) is lower than minimum_score
+    """
+    def stop_condition(result: StageResult) -> bool:
+        return result.get_name() == 'ridge_segment' and result.get_output('quality_avr') < minimum_score
+
+    return stop_condition
+
+
+class EnhancementPipeline(object):
+    """
+    The stages of PreprocessingFingerprint.enhance run one by one. Every stage gives a StageResult that is sent to
+    the metrics hook, and the stop condition is checked after each of them, so the expensive stages (e.g. the Gabor
+    filtering) are skipped for an image that is going to be rejected. A stopped pipeline can be resumed from the
+    next stage.
+    """
+
+    def __init__(
+            self,
+            preprocessing_fp: Optional[PreprocessingFingerprint] = None,
+            metrics_hook: Optional[Callable[[StageResult], None]] = None,
+            trace_memory: bool = False
+    ):
+        super().__init__()
+        self._preprocessing_fp = preprocessing_fp if preprocessing_fp is not None else PreprocessingFingerprint()
+        self._metrics_hook = metrics_hook
+        self._trace_memory = trace_memory
+
+        self._img: Optional[ndarray] = None
+        self._results: List[StageResult] = []
+
+    def run(self, img: ndarray, resize: bool = False,
+            stop_condition: Optional[Callable[[StageResult], bool]] = None, last_stage: Optional[str] = None) -> bool:
+        """
+        Run the stages over a new image
+
+        :param stop_condition: Function that receives the result of each stage, the pipeline stops when it is True
+        :param last_stage: (str) Name of the last stage to run, all of them are run when it is None
+        :return: (bool) True when every stage has been run
+        """
+        self._img = self._preprocessing_fp.prepare_image(img, resize)
+        self._results = []
+
+        return self.resume(stop_condition, last_stage)
+
+    def resume(self, stop_condition: Optional[Callable[[StageResult], bool]] = None,
+               last_stage: Optional[str] = None) -> bool:
+        """
+        Run the stages that follow the last one that was run, with the same parameters as run
+        """
+        if self._img is None:
+            raise ValueError('The pipeline has not been run')
+
+        if last_stage is not None and last_stage not in PreprocessingFingerprint.STAGES:
+            raise ValueError('Unknown stage {}'.format(last_stage))
+
+        for name in PreprocessingFingerprint.STAGES[len(self._results):]:
+            result = self.__run_stage(name)
+            self._results.append(result)
+
+            if self._metrics_hook is not None:
+                self._metrics_hook(result)
+
+            if name == last_stage or (stop_condition is not None and stop_condition(result)):
+                break
+
+        return self.is_complete()
+
+    def __run_stage(self, name: str) -> StageResult:
+        img = self._img if name == 'ridge_segment' else None
+        if not self._trace_memory:
+            return self.__new_result(name, self._preprocessing_fp.run_stage(name, img))
+
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        time = self._preprocessing_fp.run_stage(name, img)
+        _, peak = tracemalloc.get_traced_memory()
+
+        if not was_tracing:
+            tracemalloc.stop()
+
+        return self.__new_result(name, time, (peak - current) / 1024)
+
+    def __new_result(self, name: str, time: float, allocated: Optional[float] = None) -> StageResult:
+        return StageResult(name, self._preprocessing_fp.get_stage_outputs(name), time, allocated)
+
+    def is_complete(self) -> bool:
+        return len(self._results) == len(PreprocessingFingerprint.STAGES)
+
+    def get_preprocessing(self) -> PreprocessingFingerprint:
+        return self._preprocessing_fp
+
+    def get_results(self) -> List[StageResult]:
+        return list(self._results)
+
+    def get_result(self, name: str) -> Optional[StageResult]:
+        for result in self._results:
+            if result.get_name() == name:
+                return result
+
+        return None
+
+    def get_stage_times(self) -> dict:
+        """
+        Return the time in milliseconds of every stage run over the current image, in the order they were run
+        """
+        return {result.get_name(): result.get_time() for result in self._results}
+
+    def get_enhanced_fingerprint(self, ridge_color='white', return_as_image=True, show_fingerprints=False,
+                                 save_fingerprints=False) -> tuple:
+        """
+        Return the result of PreprocessingFingerprint.enhance once every stage has been run
+        """
+        if not self.is_complete():
+            raise ValueError('The pipeline has not run every stage')
+
+        return self._preprocessing_fp.get_enhanced_fingerprint(ridge_color, return_as_image, show_fingerprints,
+                                                               save_fingerprints)
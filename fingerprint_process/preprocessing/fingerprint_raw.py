@@ -18,11 +18,11 @@ class FingerprintRaw(object):
 
         self.default_response = (False,)
 
-    def get_fingerprint_raw(self, data: Union[str, list] = None):
+    def get_fingerprint_raw(self, data: Union[str, list, bytes] = None):
         """
         Convert an IntArray to fingerprint raw data
 
-        :param data: An Int array (len = width*height/2) or a string encoded in base64
+        :param data: An Int array (len = width*height/2), the raw bytes or a string encoded in base64
             which contain the data of a fingerprint
 
         :return: A fingerprint raw data object (len = width*height)
@@ -30,19 +30,41 @@ class FingerprintRaw(object):
         if data is None:
             data = []
 
-        self.data_fingerprint_raw = np.zeros(self.fingerprint_length, 'uint8')
-        data_bytes = cast_base64_to_bytes(data) if isinstance(data, str) else data.copy()
+        data_bytes = self.__get_bytes(data)
 
         if len(data_bytes) == self.read_length_fingerprint:
-            count = 0
-            for nibble in data_bytes:
-                # byte = nibble.to_bytes(1, 'big')
-                byte = np.uint8(nibble)
-                self.data_fingerprint_raw[count] = ((byte >> 4) * 17)
-                count += 1
-                self.data_fingerprint_raw[count] = ((byte & self.mask) * 17)
-                count += 1
+            # Every byte holds two pixels of 4 bits, they are scaled to 8 bits (0xF * 17 = 0xFF)
+            self.data_fingerprint_raw = np.empty(self.fingerprint_length, 'uint8')
+            self.data_fingerprint_raw[0::2] = data_bytes >> 4
+            self.data_fingerprint_raw[1::2] = data_bytes & self.mask
+            self.data_fingerprint_raw *= 17
         else:
             return self.default_response
 
         return self.data_fingerprint_raw
+
+    def get_fingerprint_image(self, data: Union[str, list, bytes] = None):
+        """
+        Convert an IntArray or a base64 string to the fingerprint image
+
+        :param data: An Int array (len = width*height/2), the raw bytes or a string encoded in base64
+            which contain the data of a fingerprint
+
+        :return: An uint8 array (height, width) or (False,) when data has not the expected length
+        """
+        data_fingerprint_raw = self.get_fingerprint_raw(data)
+        if isinstance(data_fingerprint_raw, tuple):
+            return data_fingerprint_raw
+
+        return data_fingerprint_raw.reshape(self.height, self.width)
+
+    @staticmethod
+    def __get_bytes(data: Union[str, list, bytes]) -> np.ndarray:
+        if isinstance(data, str):
+            data = cast_base64_to_bytes(data)
+
+        if isinstance(data, (bytes, bytearray)):
+            # View over the decoded payload, the bytes are not copied
+            return np.frombuffer(data, dtype='uint8')
+
+        return np.asarray(data).astype('uint8')
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+from functools import lru_cache
+from math import ceil, floor
+from typing import Tuple
+
+import numpy as np
+from numpy import ndarray
+from scipy import ndimage
+
+MAX_CACHED_BANKS = 32
+
+
+@lru_cache(maxsize=MAX_CACHED_BANKS)
+def get_gabor_filter_bank(frequency: float, kx: float, ky: float, angle_inc: float) -> Tuple[ndarray, int]:
+    """
+    Build the bank of rotated Gabor filters used by RIDGEFILTER. The bank only depends on its arguments, so it is
+    kept in a process-wide LRU cache and every request with the same quantised frequency reuses it.
+
+    :param frequency: (float) Ridge frequency rounded to the nearest 0.01
+    :param kx: (float) Scale factor of the filter sigma along the ridges
+    :param ky: (float) Scale factor of the filter sigma across the ridges
+    :param angle_inc: (float) Increment in degrees between two filters of the bank
+
+    :return: A tuple with the read-only bank (180/angle_inc, 2*sze+1, 2*sze+1) and the half size of the filters
+    """
+    sigmax = 1 / frequency * kx
+    sigmay = 1 / frequency * ky
+
+    sze = int(np.round(3 * np.max([sigmax, sigmay])))
+
+    x, y = np.meshgrid(np.linspace(-sze, sze, (2 * sze + 1)), np.linspace(-sze, sze, (2 * sze + 1)))
+
+    reffilter = np.exp(-(((np.power(x, 2)) / (sigmax * sigmax) + (np.power(y, 2)) / (sigmay * sigmay)))) * np.cos(
+        2 * np.pi * frequency * x)  # this is the original gabor filter
+
+    filt_rows, filt_cols = reffilter.shape
+
+    angle_range = int(180 / angle_inc)
+
+    gabor_filter = np.zeros((angle_range, filt_rows, filt_cols))
+
+    for o in range(0, angle_range):
+        # Generate rotated versions of the filter.  Note orientation
+        # image provides orientation *along* the ridges, hence +90
+        # degrees, and imrotate requires angles +ve anticlockwise, hence
+        # the minus sign.
+        gabor_filter[o] = ndimage.rotate(reffilter, -(o * angle_inc + 90), reshape=False)
+
+    # The same array is shared by every caller
+    gabor_filter.setflags(write=False)
+
+    return gabor_filter, sze
+
+
+def precompute_gabor_filter_banks(
+        kx: float = 0.65,
+        ky: float = 0.65,
+        angle_inc: float = 3.0,
+        min_wave_length: int = 5,
+        max_wave_length: int = 15
+) -> int:
+    """
+    Fill the cache with every bank that RIDGEFILTER can request. The mean ridge frequency is always between
+    1/max_wave_length and 1/min_wave_length and it is rounded to 0.01, so the set of possible banks is small.
+
+    :return: (int) The number of banks available in the cache
+    """
+    first = ceil(100 / max_wave_length)
+    last = floor(100 / min_wave_length)
+
+    for step in range(first, last + 1):
+        get_gabor_filter_bank(step / 100, kx, ky, angle_inc)
+
+    return get_gabor_filter_bank.cache_info().currsize
+
+
+def get_gabor_filter_bank_info() -> dict:
+    """
+    Return the hit/miss counters of the filter bank cache of this process
+    """
+    info = get_gabor_filter_bank.cache_info()
+
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'max_size': info.maxsize,
+        'current_size': info.currsize
+    }
+
+
+def clear_gabor_filter_banks() -> None:
+    get_gabor_filter_bank.cache_clear()
@@ -6,10 +6,92 @@ from numpy import ndarray
 from scipy import signal
 from scipy import ndimage
 import math
+from functools import lru_cache, partial
+from time import perf_counter
 from skimage.morphology import skeletonize as skelt
 
+from fingerprint_process.preprocessing.gabor_filter_bank import get_gabor_filter_bank
+
+
+def get_window_sums(image: ndarray, height: int, width: int) -> ndarray:
+    """
+    Sum every height x width window of the image with an integral image
+
+    :return: (ndarray) Array (rows - height + 1, columns - width + 1) where [i, j] is the sum of the window whose
+        top left pixel is [i, j]
+    """
+    integral = np.zeros((image.shape[0] + 1, image.shape[1] + 1), dtype=np.result_type(image, np.int64))
+    integral[1:, 1:] = np.cumsum(np.cumsum(image, axis=0), axis=1)
+
+    return integral[height:, width:] - integral[:-height, width:] - integral[height:, :-width] + \
+        integral[:-height, :-width]
+
+
+def get_block_statistics(image: ndarray, block_size: int) -> tuple:
+    """
+    Compute the mean and the standard deviation of every block_size x block_size block of the image from the
+    integral images of the image and of its square. The image is padded with zeros up to a multiple of block_size,
+    as the segmentation by blocks does.
+
+    :return: (tuple) Two arrays (ceil(rows / block_size), ceil(columns / block_size)) with the mean and the
+        standard deviation of each block
+    """
+    rows, cols = image.shape
+    padded_img = np.zeros((-(-rows // block_size) * block_size, -(-cols // block_size) * block_size))
+    padded_img[:rows, :cols] = image
+
+    number_pixels = block_size * block_size
+    block_mean = get_window_sums(padded_img, block_size, block_size)[::block_size, ::block_size] / number_pixels
+    block_square = get_window_sums(padded_img ** 2, block_size, block_size)[::block_size, ::block_size] / number_pixels
+
+    return block_mean, np.sqrt(np.maximum(block_square - block_mean ** 2, 0))
+
+
+@lru_cache(maxsize=16)
+def get_gaussian_kernel(sigma: float, odd_size: bool = True) -> tuple:
+    """
+    Build the 1-D Gaussian kernel of RIDGEORIENT for sigma and its gradient, both as read-only float32 columns.
+    The size of the kernel is fix(6 * sigma), plus one when odd_size is True and the size is even.
+
+    :return: (tuple) The kernel and the gradient of the kernel
+    """
+    sze = int(np.fix(6 * sigma))
+    if odd_size and sze % 2 == 0:
+        sze = sze + 1
+
+    gauss = cv.getGaussianKernel(sze, sigma)
+    kernels = (gauss.astype(np.float32), np.gradient(gauss, axis=0).astype(np.float32))
+    for kernel in kernels:
+        kernel.setflags(write=False)
+
+    return kernels
+
+
+def smooth_image(image: ndarray, sigma: float, odd_size: bool = True) -> ndarray:
+    """
+    Convolve the image with the 2-D Gaussian kernel gauss * gauss.T of RIDGEORIENT as two 1-D passes. The borders
+    are reflected and an even kernel is centred as ndimage.convolve does.
+    """
+    gauss, _ = get_gaussian_kernel(sigma, odd_size)
+    anchor = (len(gauss) - 1) // 2
+
+    return cv.sepFilter2D(image, -1, gauss, gauss, anchor=(anchor, anchor), borderType=cv.BORDER_REFLECT)
+
 
 class PreprocessingFingerprint(object):
+    # Stages of enhance in the order they are run and the attributes (without the underscore) each one sets
+    STAGES = ('ridge_segment', 'ridge_orient', 'ridge_freq', 'ridge_filter', 'skeletonize', 'prune_skeleton',
+              'morphology_mask')
+    STAGE_OUTPUTS = {
+        'ridge_segment': ('normim', 'mask', 'stddevim', 'quality_avr'),
+        'ridge_orient': ('orientim',),
+        'ridge_freq': ('freq', 'mean_freq', 'median_freq'),
+        'ridge_filter': ('binim',),
+        'skeletonize': ('skeleton',),
+        'prune_skeleton': ('skeleton',),
+        'morphology_mask': ('morphology_mask',)
+    }
+
     def __init__(
             self,
             name_fingerprint='figerprint',
@@ -26,7 +108,10 @@ class PreprocessingFingerprint(object):
             kx=0.65,
             ky=0.65,
             angleInc=3.0,
-            ridge_filter_thresh=-3
+            ridge_filter_thresh=-3,
+            ridge_filter_engine='vectorized',
+            ridge_freq_engine='vectorized',
+            ridge_orient_engine='opencv'
     ):
         super().__init__()
         self._name_fingerprint = name_fingerprint
@@ -44,6 +129,9 @@ class PreprocessingFingerprint(object):
         self._ky = ky
         self._angleInc = angleInc
         self._ridge_filter_thresh = ridge_filter_thresh
+        self._ridge_filter_engine = ridge_filter_engine
+        self._ridge_freq_engine = ridge_freq_engine
+        self._ridge_orient_engine = ridge_orient_engine
 
         self._quality_avr = 0.0
 
@@ -58,6 +146,7 @@ class PreprocessingFingerprint(object):
         self._binim = []
         self._skeleton = []
         self._morphology_mask = []
+        self._stage_times = {}
 
     def __normalise(self, img):
         normed = (img - np.mean(img)) / (np.std(img))
@@ -111,30 +200,24 @@ class PreprocessingFingerprint(object):
         http://www.csse.uwa.edu.au/~pk
         """
 
-        rows, cols = img.shape
         im = self.__normalise(img)  # normalise to get zero mean and unit standard deviation
 
-        new_rows = np.int(
-            self._ridge_segment_blksze * np.ceil((np.float(rows)) / (np.float(self._ridge_segment_blksze))))
-        new_cols = np.int(
-            self._ridge_segment_blksze * np.ceil((np.float(cols)) / (np.float(self._ridge_segment_blksze))))
-
-        padded_img = np.zeros((new_rows, new_cols))
-        self._stddevim = np.zeros((new_rows, new_cols))
-        padded_img[0:rows][:, 0:cols] = im
-        for i in range(0, new_rows, self._ridge_segment_blksze):
-            for j in range(0, new_cols, self._ridge_segment_blksze):
-                box = [i, j, min(i + self._ridge_segment_blksze, new_rows),
-                       min(j + self._ridge_segment_blksze, new_cols)]
-                block = padded_img[box[0]:box[2]][:, box[1]:box[3]]
-                self._stddevim[box[0]:box[2]][:, box[1]:box[3]] = np.std(block)
-
-        self._stddevim = self._stddevim[0:rows][:, 0:cols]
+        self.__block_deviation(im)
         self._mask = self._stddevim > self._ridge_segment_thresh
         mean_val = np.mean(im[self._mask])
         std_val = np.std(im[self._mask])
         self._normim = (im - mean_val) / (std_val)
 
+    def __block_deviation(self, im):
+        """
+        Set _stddevim, the standard deviation of the block of ridge_segment_blksze pixels that holds each pixel
+        """
+        rows, cols = im.shape
+        _, block_std = get_block_statistics(im, self._ridge_segment_blksze)
+
+        self._stddevim = np.repeat(np.repeat(block_std, self._ridge_segment_blksze, axis=0),
+                                   self._ridge_segment_blksze, axis=1)[:rows, :cols]
+
     def __ridge_orient(self):
         """
         RIDGEORIENT - Estimates the local orientation of ridges in a fingerprint
@@ -184,6 +267,10 @@ class PreprocessingFingerprint(object):
         http://www.csse.uwa.edu.au/~pk
         """
 
+        if self._ridge_orient_engine != 'scipy':
+            self.__ridge_orient_opencv()
+            return
+
         rows, cols = self._normim.shape
         # Calculate image gradients.
         sze = np.fix(6 * self._gradient_sigma)
@@ -229,6 +316,34 @@ class PreprocessingFingerprint(object):
 
         self._orientim = np.pi / 2 + np.arctan2(sin2theta, cos2theta) / 2
 
+    def __ridge_orient_opencv(self):
+        """
+        RIDGEORIENT with the separable Gaussian kernels applied by OpenCV in float32. The convolutions match the
+        ones of the scipy engine: zero borders for the gradients and reflected borders for the smoothing.
+        """
+        im = self._normim.astype(np.float32)
+
+        # Gradient of Gaussian, the kernels are flipped because sepFilter2D computes a correlation
+        gauss, gradient = get_gaussian_kernel(self._gradient_sigma)
+        Gx = cv.sepFilter2D(im, -1, gradient[::-1], gauss, borderType=cv.BORDER_CONSTANT)
+        Gy = cv.sepFilter2D(im, -1, gauss, gradient[::-1], borderType=cv.BORDER_CONSTANT)
+
+        # Weighted summation of the covariance data
+        Gxx = smooth_image(Gx * Gx, self._block_sigma, odd_size=False)
+        Gyy = smooth_image(Gy * Gy, self._block_sigma, odd_size=False)
+        Gxy = 2 * smooth_image(Gx * Gy, self._block_sigma, odd_size=False)
+
+        denom = np.sqrt(np.power(Gxy, 2) + np.power((Gxx - Gyy), 2)) + np.finfo(float).eps
+
+        sin2theta = Gxy / denom
+        cos2theta = (Gxx - Gyy) / denom
+
+        if self._orient_smooth_sigma:
+            cos2theta = smooth_image(cos2theta, self._orient_smooth_sigma)
+            sin2theta = smooth_image(sin2theta, self._orient_smooth_sigma)
+
+        self._orientim = np.pi / 2 + np.arctan2(sin2theta, cos2theta).astype(float) / 2
+
     def __ridge_freq(self):
         """
         RIDGEFREQ - Calculates a ridge frequency image
@@ -281,6 +396,10 @@ class PreprocessingFingerprint(object):
         http://www.csse.uwa.edu.au/~pk
         """
 
+        if self._ridge_freq_engine != 'loop':
+            self.__ridge_freq_vectorized()
+            return
+
         rows, cols = self._normim.shape
         freq = np.zeros((rows, cols))
 
@@ -305,6 +424,74 @@ class PreprocessingFingerprint(object):
 
         self._freq = self._mean_freq * self._mask
 
+    def __ridge_freq_vectorized(self, padding=10):
+        """
+        Same estimation as the block loop of __ridge_freq (FREQEST on every block and the mean over the ridge region)
+        for all the blocks at once. Only the blocks that intersect the mask are estimated, since the others do not
+        take part in the mean.
+
+        The blocks are placed side by side in one mosaic, each one surrounded by padding pixels of its own edge, so
+        a single cubic spline prefilter and a single map_coordinates call give the rotated crop of every block; the
+        crop never reaches the padding and the spline of a block does not see its neighbours. The peaks of the
+        projections are found with one grey dilation over all the blocks.
+        """
+        rows, cols = self._normim.shape
+        blksze = self._ridge_freq_blksze
+        block_rows = len(range(0, rows - blksze, blksze))
+        block_cols = len(range(0, cols - blksze, blksze))
+
+        def split_blocks(image):
+            image = image[:block_rows * blksze, :block_cols * blksze]
+            return image.reshape(block_rows, blksze, block_cols, blksze).swapaxes(1, 2).reshape(-1, blksze, blksze)
+
+        weights = split_blocks(self._mask).sum(axis=(1, 2))
+        in_mask = weights > 0
+        blocks = split_blocks(self._normim)[in_mask]
+        orients = split_blocks(self._orientim)[in_mask]
+        weights = weights[in_mask]
+        number_blocks = len(blocks)
+
+        # Dominant orientation of every block, the rotation of FREQEST makes the ridges vertical
+        orient = np.arctan2(np.mean(np.sin(2 * orients), axis=(1, 2)), np.mean(np.cos(2 * orients), axis=(1, 2))) / 2
+        theta = -np.deg2rad(orient / np.pi * 180 + 90)
+
+        side = blksze + 2 * padding
+        mosaic = np.pad(blocks, ((0, 0), (padding, padding), (padding, padding)), mode='edge')
+        mosaic = mosaic.transpose(1, 0, 2).reshape(side, number_blocks * side)
+        coefficients = ndimage.spline_filter(mosaic, order=3, mode='nearest')
+
+        cropsze = int(np.fix(blksze / np.sqrt(2)))
+        offset = int(np.fix((blksze - cropsze) / 2))
+        center = (blksze - 1) / 2
+        y, x = np.mgrid[offset:offset + cropsze, offset:offset + cropsze].astype(float)
+        cos_theta = np.cos(theta)[:, np.newaxis, np.newaxis]
+        sin_theta = np.sin(theta)[:, np.newaxis, np.newaxis]
+        rows_in = cos_theta * (y - center) - sin_theta * (x - center) + center + padding
+        cols_in = sin_theta * (y - center) + cos_theta * (x - center) + center + padding + \
+            (np.arange(number_blocks) * side)[:, np.newaxis, np.newaxis]
+
+        rotim = ndimage.map_coordinates(coefficients, [rows_in, cols_in], order=3, mode='nearest', prefilter=False)
+        proj = np.sum(rotim, axis=1)
+
+        windsze = self._ridge_freq_windsze
+        dilation = ndimage.grey_dilation(proj, size=(1, windsze), structure=np.ones((1, windsze)))
+        peak_thresh = 2
+        maxpts = (np.abs(dilation - proj) < peak_thresh) & (proj > np.mean(proj, axis=1, keepdims=True))
+
+        number_peaks = np.count_nonzero(maxpts, axis=1)
+        first_peak = np.argmax(maxpts, axis=1)
+        last_peak = cropsze - 1 - np.argmax(maxpts[:, ::-1], axis=1)
+        wave_length = (last_peak - first_peak) / np.maximum(number_peaks - 1, 1)
+
+        valid = (number_peaks >= 2) & (wave_length >= self._min_wave_length) & \
+                (wave_length <= self._max_wave_length)
+
+        # Each block counts as many times as its pixels inside the mask, like the pixels of the freq image
+        block_freq = 1 / np.double(wave_length[valid])
+        self._mean_freq = np.sum(block_freq * weights[valid]) / np.sum(weights[valid]) if np.any(valid) else np.nan
+        self._median_freq = np.median(np.repeat(block_freq, weights[valid])) if np.any(valid) else np.nan
+        self._freq = self._mean_freq * self._mask
+
     def __frequest(self, blkim, blkor):
         """
         FREQEST - Estimate fingerprint ridge frequency within image block
@@ -461,33 +648,10 @@ class PreprocessingFingerprint(object):
 
         unfreq = np.unique(non_zero_elems_in_freq)
 
-        # Generate filters corresponding to these distinct frequencies and
-        # orientations in 'angleInc' increments.
-
-        sigmax = 1 / unfreq[0] * self._kx
-        sigmay = 1 / unfreq[0] * self._ky
-
-        sze = np.int(np.round(3 * np.max([sigmax, sigmay])))
-
-        x, y = np.meshgrid(np.linspace(-sze, sze, (2 * sze + 1)), np.linspace(-sze, sze, (2 * sze + 1)))
+        # Get the filters corresponding to these distinct frequencies and
+        # orientations in 'angleInc' increments from the process-wide bank.
 
-        reffilter = np.exp(-(((np.power(x, 2)) / (sigmax * sigmax) + (np.power(y, 2)) / (sigmay * sigmay)))) * np.cos(
-            2 * np.pi * unfreq[0] * x)  # this is the original gabor filter
-
-        filt_rows, filt_cols = reffilter.shape
-
-        angleRange = np.int(180 / self._angleInc)
-
-        gabor_filter = np.array(np.zeros((angleRange, filt_rows, filt_cols)))
-
-        for o in range(0, angleRange):
-            # Generate rotated versions of the filter.  Note orientation
-            # image provides orientation *along* the ridges, hence +90
-            # degrees, and imrotate requires angles +ve anticlockwise, hence
-            # the minus sign.
-
-            rot_filt = ndimage.rotate(reffilter, -(o * self._angleInc + 90), reshape=False)
-            gabor_filter[o] = rot_filt
+        gabor_filter, sze = get_gabor_filter_bank(float(unfreq[0]), self._kx, self._ky, self._angleInc)
 
         # Find indices of matrix points greater than maxsze from the image
         # boundary
@@ -512,25 +676,73 @@ class PreprocessingFingerprint(object):
         maxorientindex = np.round(180 / self._angleInc)
         orientindex = np.round(self._orientim / np.pi * 180 / self._angleInc)
 
+        orientindex[orientindex < 1] += maxorientindex
+        orientindex[orientindex > maxorientindex] -= maxorientindex
+
         # do the filtering
-        for i in range(0, rows):
-            for j in range(0, cols):
-                if (orientindex[i][j] < 1):
-                    orientindex[i][j] = orientindex[i][j] + maxorientindex
-                if (orientindex[i][j] > maxorientindex):
-                    orientindex[i][j] = orientindex[i][j] - maxorientindex
-        finalind_rows, finalind_cols = np.shape(finalind)
         sze = int(sze)
-        for k in range(0, finalind_cols):
-            r = validr[finalind[0][k]]
-            c = validc[finalind[0][k]]
+        validr = validr[finalind[0]]
+        validc = validc[finalind[0]]
+        if self._ridge_filter_engine == 'loop':
+            for k in range(0, len(validr)):
+                r = validr[k]
+                c = validc[k]
 
-            img_block = im[r - sze:r + sze + 1][:, c - sze:c + sze + 1]
+                img_block = im[r - sze:r + sze + 1][:, c - sze:c + sze + 1]
 
-            newim[r][c] = np.sum(img_block * gabor_filter[int(orientindex[r][c]) - 1])
+                newim[r][c] = np.sum(img_block * gabor_filter[int(orientindex[r][c]) - 1])
+        else:
+            newim = self.__oriented_filtering(im, gabor_filter, orientindex, validr, validc)
 
         self._binim = newim < self._ridge_filter_thresh
 
+    def __oriented_filtering(self, im, gabor_filter, orientindex, validr, validc):
+        """
+        Oriented filtering - apply the Gabor filter bank grouping pixels by orientation
+
+        Instead of convolving every valid pixel on its own, the valid pixels are grouped by the index of the
+        filter they need and each group is solved with a single whole-image correlation (cv.filter2D switches to
+        a DFT based implementation for kernels of this size). Only the pixels of the group are kept from every
+        response, so the result is the same that the per-pixel loop gives up to the floating point summation
+        order (differences below 1e-9 on normalised images, far from the ridge_filter_thresh decision boundary).
+
+        Usage:
+         newim = oriented_filtering(im, gabor_filter, orientindex, validr, validc)
+
+        Arguments:
+                im           - Normalised image to be filtered.
+                gabor_filter - Bank of rotated Gabor filters, one per orientation index.
+                orientindex  - Orientation index image with values in [1, 180/angleInc].
+                validr       - Rows of the pixels to be filtered.
+                validc       - Columns of the pixels to be filtered.
+
+        Output:
+                newim    - Filtered image, zero outside the valid pixels.
+
+        See also: RIDGEFILTER
+        """
+        newim = np.zeros(im.shape)
+        sze = gabor_filter.shape[1] // 2
+        filter_index = orientindex[validr, validc].astype(int) - 1
+
+        for index in np.unique(filter_index):
+            selected = filter_index == index
+            rows_selected = validr[selected]
+            cols_selected = validc[selected]
+
+            # Valid pixels are farther than sze from the image border, so the bounding box of the group grown
+            # by sze always fits inside the image and contains every neighbourhood the filter needs.
+            top = rows_selected.min() - sze
+            left = cols_selected.min() - sze
+            bottom = rows_selected.max() + sze + 1
+            right = cols_selected.max() + sze + 1
+
+            response = cv.filter2D(im[top:bottom, left:right], cv.CV_64F, gabor_filter[index],
+                                   borderType=cv.BORDER_CONSTANT)
+            newim[rows_selected, cols_selected] = response[rows_selected - top, cols_selected - left]
+
+        return newim
+
     def __skeletonize(self):
         """
         Skeletonize - reduce binary objects to 1 pixel wide representations
@@ -558,30 +770,36 @@ class PreprocessingFingerprint(object):
         https://medium.com/@cuevas1208/fingerprint-algorithm-recognition-fd2ac0c6f5fc
         """
 
-        filter_size = 6
-        self._skeleton = np.zeros_like(self._binim)
         self._skeleton = skelt(self._binim)
 
+    def __prune_skeleton(self, filter_size=6):
+        """
+        Remove the small islands and spurs of the skeleton: every filter_size x filter_size window (starting at
+        row < rows - filter_size and column < columns - filter_size) whose four borders are empty in the skeleton is
+        cleared. The borders of all the windows are summed at once with integral images, and every window is tested
+        against the skeleton before any window is cleared.
+        """
         rows, columns = self._skeleton.shape
-        template_new = np.zeros(shape=(rows, columns), dtype=np.uint8)
-        template_new[0:rows][:, 0:columns] = self._skeleton
-
-        for i in range(rows - filter_size):
-            for j in range(columns - filter_size):
-
-                layer_filter = template_new[i:i + filter_size, j:j + filter_size]
-
-                flag = 0
-                if sum(layer_filter[:, 0]) == 0:
-                    flag += 1
-                if sum(layer_filter[:, filter_size - 1]) == 0:
-                    flag += 1
-                if sum(layer_filter[0, :]) == 0:
-                    flag += 1
-                if sum(layer_filter[filter_size - 1, :]) == 0:
-                    flag += 1
-                if flag > 3:
-                    self._skeleton[i: i + filter_size, j: j + filter_size] = np.zeros((filter_size, filter_size))
+        skeleton = self._skeleton.astype(np.int32)
+
+        # Sum of filter_size pixels down (columns of the window) and right (rows of the window) from every pixel
+        vertical_sums = get_window_sums(skeleton, filter_size, 1)
+        horizontal_sums = get_window_sums(skeleton, 1, filter_size)
+
+        last = filter_size - 1
+        window_rows, window_columns = rows - filter_size, columns - filter_size
+        empty_windows = (vertical_sums[:window_rows, :window_columns] == 0) & \
+                        (vertical_sums[:window_rows, last:last + window_columns] == 0) & \
+                        (horizontal_sums[:window_rows, :window_columns] == 0) & \
+                        (horizontal_sums[last:last + window_rows, :window_columns] == 0)
+
+        # A pixel is cleared when it is inside at least one empty window
+        padded_windows = np.zeros((rows + last, columns + last), dtype=np.int32)
+        padded_windows[last:last + window_rows, last:last + window_columns] = empty_windows
+        cleared = get_window_sums(padded_windows, filter_size, filter_size) > 0
+
+        self._skeleton = self._skeleton.copy()
+        self._skeleton[cleared] = 0
 
     def __get_morphology_Mask(self):
         """
@@ -709,6 +927,24 @@ class PreprocessingFingerprint(object):
         # main function to enhance the image.
         # calls all other subroutines
 
+        img = self.prepare_image(img, resize)
+
+        self._stage_times = {}
+        self.run_stage('ridge_segment', img)  # normalise the image and find a ROI
+        self.run_stage('ridge_orient')  # compute orientation image
+        self.run_stage('ridge_freq')  # compute major frequency of ridges
+        self.run_stage('ridge_filter')  # filter the image using oriented gabor filter
+        self.run_stage('skeletonize')  # skeletonize image using Zha84
+        self.run_stage('prune_skeleton')  # remove islands and spurs of the skeleton
+        self.run_stage('morphology_mask')
+
+        return self.get_enhanced_fingerprint(ridge_color, return_as_image, show_fingerprints, save_fingerprints)
+
+    def prepare_image(self, img, resize=False):
+        """
+        Convert the image into gray when it has colour channels and, when resize is True, resize it to 350 rows
+        keeping its aspect ratio
+        """
         if (len(img.shape) > 2):  # convert image into gray if necessary
             img = cv.cvtColor(img, cv.COLOR_BGR2GRAY)
         if (resize):
@@ -720,14 +956,48 @@ class PreprocessingFingerprint(object):
 
             img = cv.resize(img, (np.int(new_cols), np.int(new_rows)))
 
-        self.__ridge_segment(img)  # normalise the image and find a ROI
-        self.__ridge_orient()  # compute orientation image
-        self.__ridge_freq()  # compute major frequency of ridges
-        self.__ridge_filter()  # filter the image using oriented gabor filter
-        self.__skeletonize()  # skeletonize image using Zha84
-        self.__get_morphology_Mask()
-        self.__quality_average()
+        return img
+
+    def run_stage(self, name, img=None) -> float:
+        """
+        Run one of the STAGES over the attributes set by the previous ones. ridge_segment receives the gray image
+        and also computes the quality average, so a poor image can be rejected before the other stages.
 
+        :return: (float) The time of the stage in milliseconds, it is also kept for get_stage_times
+        """
+        if name == 'ridge_segment':
+            stages = (partial(self.__ridge_segment, img), self.__quality_average)
+        else:
+            stages = {
+                'ridge_orient': (self.__ridge_orient,),
+                'ridge_freq': (self.__ridge_freq,),
+                'ridge_filter': (self.__ridge_filter,),
+                'skeletonize': (self.__skeletonize,),
+                'prune_skeleton': (self.__prune_skeleton,),
+                'morphology_mask': (self.__get_morphology_Mask,)
+            }.get(name)
+
+        if stages is None:
+            raise ValueError('Unknown stage {}'.format(name))
+
+        start = perf_counter()
+        for stage in stages:
+            stage()
+        self._stage_times[name] = (perf_counter() - start) * 1000
+
+        return self._stage_times[name]
+
+    def get_stage_outputs(self, name) -> dict:
+        """
+        Return the attributes set by the stage, by their name in STAGE_OUTPUTS
+        """
+        return {output: getattr(self, '_' + output) for output in self.STAGE_OUTPUTS[name]}
+
+    def get_enhanced_fingerprint(self, ridge_color='white', return_as_image=True, show_fingerprints=False,
+                                 save_fingerprints=False):
+        """
+        Return the result of enhance from the attributes set by all the stages
+        """
         if (ridge_color == 'white'):
             roi_image = self.__white_ridges(self._morphology_mask)
             binary_image = self.__white_ridges(self._binim)
@@ -749,8 +1019,18 @@ class PreprocessingFingerprint(object):
         else:
             return (self._skeleton, self._morphology_mask, self._orientim, self._stddevim, self._quality_avr)
 
+    def get_stage_times(self) -> dict:
+        """
+        Return the time in milliseconds of every stage run since the last enhance, in the order they were run
+        """
+        return dict(self._stage_times)
+
     def get_spatial_index(self, img: ndarray) -> float:
-        self.__ridge_segment(img)
+        """
+        Return the mean of the block deviations of the normalised image (the _quality_avr of enhance). Only the
+        deviations are computed, the mask and the normalised ridge image are not built.
+        """
+        self.__block_deviation(self.__normalise(img))
         self.__quality_average()
 
         return self._quality_avr
@@ -4,6 +4,9 @@ import numpy as np
 import cv2 as cv
 from matplotlib import pyplot as plt
 
+from fingerprint_process.preprocessing.butterworth_filter_bank import get_ring_label_map, \
+    load_butterworth_filter_bank
+
 
 class QualityFingerprint(object):
     def __init__(
@@ -11,10 +14,11 @@ class QualityFingerprint(object):
             number_filters=16,
             columns_image=256,
             rows_image=288,
-            data_filters='data.txt',
+            data_filters='data.npy',
             address_output='./fingerprint_process/data/',
             show_graphs=False,
-            name_fingerprint='fingerprint'
+            name_fingerprint='fingerprint',
+            energy_mode='rings'
     ):
         super().__init__()
         self._numberFilters = number_filters
@@ -24,15 +28,17 @@ class QualityFingerprint(object):
         self._address_output = address_output
         self._showGraphs = show_graphs
         self._name_fingerprint = name_fingerprint
+        # 'rings' gets every ring energy with one bincount, 'filters' multiplies the spectrum by each filter
+        self._energy_mode = energy_mode
 
         self._qualityFingerprint = 0
-        self._fileExist = False
 
         self._optimizeImage = []
         self._dftImage = []
         self._magnitude = []
         self._powerImage = []
         self._R = []
+        self._labels = []
         self._normalizeEnergy = []
 
     def __optimizeDFT(self, img):
@@ -49,82 +55,29 @@ class QualityFingerprint(object):
         self._magnitude = cv.magnitude(self._dftImage[:, :, 0], self._dftImage[:, :, 1])
         self._powerImage = self._magnitude ** 2
 
-    def __bankButterworkFilter(self):
-        t = [i for i in range(self._numberFilters)]
-
-        cutOffFrequency = np.zeros((1, self._numberFilters))
-        for i in range(self._numberFilters):
-            cutOffFrequency[0][i] = (6 + (6 * t[i]))
-
-        H = np.zeros((self._numberFilters, self._rowsImage, self._columnsImage))
-        for nf in range(self._numberFilters):
-            for k in range(self._rowsImage):
-                for l in range(self._columnsImage):
-                    distance = np.sqrt(
-                        np.power(k - (self._rowsImage / 2), 2) + np.power(l - (self._columnsImage / 2), 2))
-                    if distance <= cutOffFrequency[0][nf]:
-                        H[nf][k][l] = 1
-                    else:
-                        H[nf][k][l] = 0
-
-        self._R = np.zeros(((self._numberFilters - 1), self._rowsImage, self._columnsImage))
-        for i in range((self._numberFilters - 1)):
-            self._R[i][:][:] = (H[(i + 1)][:][:] - H[i][:][:])
-
     def __loadFilters(self):
-        try:
-            file = open((self._address_output + self._dataFilters), 'r')
-            self._fileExist = True
-        except:
-            self._fileExist = False
-
-        if self._fileExist:
-            self.__obtainBankFilters(file)
-            file.close()
-            self._fileExist = False
+        if self._energy_mode == 'filters':
+            self._R = load_butterworth_filter_bank(
+                self._address_output + self._dataFilters,
+                self._rowsImage,
+                self._columnsImage,
+                self._numberFilters
+            )
         else:
-            self.__bankButterworkFilter()
-            self.__saveBankFilters()
-
-    def __saveBankFilters(self):
-        with open((self._address_output + self._dataFilters), 'w') as f:
-            for nf in range(self._numberFilters - 1):
-                for r in range(self._rowsImage):
-                    for c in range(self._columnsImage):
-                        if (c == self._columnsImage - 1):
-                            f.write(str(int(self._R[nf][r][c])) + '\n')
-                        else:
-                            f.write(str(int(self._R[nf][r][c])) + ',')
-                    if (r == self._rowsImage - 1):
-                        f.write('#\n')
-
-    def __obtainBankFilters(self, file):
-        self._R = np.zeros(((self._numberFilters - 1), self._rowsImage, self._columnsImage))
-        nf = 0
-        m = 0
-        n = 0
-        while True:
-            character = file.read(1)
-            if nf >= (self._numberFilters - 1):
-                break
-
-            if character == '#':
-                nf += 1
-                m = (-1)
-            elif character == '\n':
-                m += 1
-                n = 0
-            elif (character == ',') or (character == ''):
-                continue
-            else:
-                self._R[nf][m][n] = (int(character))
-                n += 1
+            self._labels = get_ring_label_map(self._rowsImage, self._columnsImage, self._numberFilters)
 
     def __getEnergyImage(self):
-        E = np.zeros((self._numberFilters - 1))
+        if self._energy_mode == 'filters':
+            E = np.zeros((self._numberFilters - 1))
 
-        for i in range(self._numberFilters - 1):
-            E[i] = np.sum(self._powerImage * self._R[i][:][:])
+            for i in range(self._numberFilters - 1):
+                E[i] = np.sum(self._powerImage * self._R[i], dtype=np.float64)
+        else:
+            E = np.bincount(
+                self._labels.ravel(),
+                weights=self._powerImage.ravel(),
+                minlength=self._numberFilters
+            )[:(self._numberFilters - 1)]
 
         totalEnergy = np.sum(E)
 
@@ -178,3 +131,41 @@ class QualityFingerprint(object):
             self.__printEntropyImage(img, save_graphs)
 
         return self._qualityFingerprint
+
+    def getQualityFingerprints(self, imgs):
+        """
+        Score several frames of the same size at once. With energy_mode 'rings' the ring energies of every frame
+        are obtained with a single np.bincount over the stacked power spectra.
+
+        :param imgs: Iterable of fingerprint images
+        :return: (list) The spectral quality of each image, in the same order
+        """
+        if self._energy_mode == 'filters':
+            return [self.getQualityFingerprint(img) for img in imgs]
+
+        power_images = []
+        for img in imgs:
+            self.__optimizeDFT(np.asarray(img))
+            self.__DFT2D()
+            self.__powerSpectrum()
+            power_images.append(self._powerImage)
+
+        if len(power_images) == 0:
+            return []
+
+        self.__loadFilters()
+        number_images = len(power_images)
+
+        # Every frame gets its own range of labels so one bincount returns the energies of all of them
+        labels = self._labels[np.newaxis, :, :] + \
+            (self._numberFilters * np.arange(number_images)).reshape(-1, 1, 1)
+        E = np.bincount(
+            labels.ravel(),
+            weights=np.stack(power_images).ravel(),
+            minlength=(number_images * self._numberFilters)
+        ).reshape(number_images, self._numberFilters)[:, :(self._numberFilters - 1)]
+
+        normalize_energy = E / np.sum(E, axis=1, keepdims=True)
+        entropy = np.sum(normalize_energy * np.log(np.where(normalize_energy != 0, normalize_energy, 1)), axis=1)
+
+        return list(np.log(self._numberFilters - 1) + entropy)
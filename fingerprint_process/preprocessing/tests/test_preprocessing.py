@@ -0,0 +1,296 @@
+import json
+import os.path
+import tempfile
+import unittest
+
+import numpy as np
+from skimage.morphology import skeletonize
+
+from core.utils import cast_bytes_to_base64
+from fingerprint_process.preprocessing.butterworth_filter_bank import build_butterworth_filter_bank, \
+    clear_butterworth_filter_banks, load_butterworth_filter_bank
+from fingerprint_process.preprocessing.enhancement_pipeline import EnhancementPipeline, poor_spatial_quality
+from fingerprint_process.preprocessing.fingerprint_raw import FingerprintRaw
+from fingerprint_process.preprocessing.gabor_filter_bank import clear_gabor_filter_banks, get_gabor_filter_bank, \
+    get_gabor_filter_bank_info, precompute_gabor_filter_banks
+from fingerprint_process.preprocessing.preprocessing_fingerprint import PreprocessingFingerprint, get_block_statistics
+from fingerprint_process.preprocessing.quality_image import QualityFingerprint
+from fingerprint_process.utils.benchmark import decode_fingerprint_by_pixel, load_sample_fingerprint
+
+
+def reference_pruned_skeleton(binary_image: np.ndarray, filter_size: int = 6) -> np.ndarray:
+    # Window by window pruning used before the integral images
+    skeleton = skeletonize(binary_image)
+    template = skeleton.astype(np.uint8)
+    rows, columns = skeleton.shape
+    for i in range(rows - filter_size):
+        for j in range(columns - filter_size):
+            layer_filter = template[i:i + filter_size, j:j + filter_size]
+            if sum(layer_filter[:, 0]) == 0 and sum(layer_filter[:, filter_size - 1]) == 0 and \
+                    sum(layer_filter[0, :]) == 0 and sum(layer_filter[filter_size - 1, :]) == 0:
+                skeleton[i:i + filter_size, j:j + filter_size] = 0
+
+    return skeleton
+
+
+def enhance_sample(**kwargs) -> tuple:
+    preprocessing_fp = PreprocessingFingerprint(ridge_segment_thresh=0.25, **kwargs)
+    return preprocessing_fp.enhance(
+        img=load_sample_fingerprint(),
+        return_as_image=False,
+        show_fingerprints=False,
+        save_fingerprints=False
+    ), preprocessing_fp
+
+
+class TestFingerprintRaw(unittest.TestCase):
+
+    def setUp(self):
+        with open('./fingerprint_process/data/fingerprintRawData.json', 'r', encoding='utf-8') as file:
+            self.data_fingerprint = json.load(file)['fingerprint']
+
+    def test_image_matches_pixel_decoding(self):
+        image = FingerprintRaw().get_fingerprint_image(self.data_fingerprint)
+
+        self.assertEqual(image.dtype, np.uint8)
+        self.assertEqual(image.shape, (288, 256))
+        np.testing.assert_array_equal(image, decode_fingerprint_by_pixel(self.data_fingerprint))
+        np.testing.assert_array_equal(load_sample_fingerprint(), image)
+
+        base64_data = cast_bytes_to_base64(bytes(self.data_fingerprint))
+        np.testing.assert_array_equal(FingerprintRaw().get_fingerprint_image(base64_data), image)
+
+    def test_int_list_and_base64_give_same_raw_data(self):
+        fingerprint_raw = FingerprintRaw(width=4, height=2)
+
+        raw_data = fingerprint_raw.get_fingerprint_raw([0x0F, 0xF0, 0x12, 0xAB])
+
+        np.testing.assert_array_equal(raw_data, [0, 255, 255, 0, 17, 34, 170, 187])
+        np.testing.assert_array_equal(fingerprint_raw.get_fingerprint_raw('D/ASqw=='), raw_data)
+
+    def test_wrong_length_is_rejected(self):
+        self.assertEqual(FingerprintRaw().get_fingerprint_image([1, 2, 3]), (False,))
+
+
+class TestRidgeSegment(unittest.TestCase):
+
+    def test_block_statistics_match_block_loop(self):
+        image = np.random.default_rng(8).normal(size=(70, 45))
+        padded_img = np.zeros((80, 48))
+        padded_img[:70, :45] = image
+
+        block_mean, block_std = get_block_statistics(image, 16)
+
+        self.assertEqual(block_std.shape, (5, 3))
+        for i in range(5):
+            for j in range(3):
+                block = padded_img[i * 16:(i + 1) * 16, j * 16:(j + 1) * 16]
+                self.assertAlmostEqual(block_mean[i, j], np.mean(block))
+                self.assertAlmostEqual(block_std[i, j], np.std(block))
+
+    def test_spatial_index_is_the_quality_of_enhance(self):
+        enhanced, _ = enhance_sample()
+        preprocessing_fp = PreprocessingFingerprint(ridge_segment_thresh=0.25)
+
+        self.assertAlmostEqual(preprocessing_fp.get_spatial_index(load_sample_fingerprint()), enhanced[4])
+        self.assertEqual(len(preprocessing_fp._normim), 0)
+
+
+class TestRidgeFilter(unittest.TestCase):
+
+    def test_vectorized_engine_matches_loop(self):
+        _, loop_fp = enhance_sample(ridge_filter_engine='loop')
+        _, vectorized_fp = enhance_sample(ridge_filter_engine='vectorized')
+
+        self.assertTrue(
+            np.array_equal(loop_fp._binim, vectorized_fp._binim),
+            'Binary image of the vectorized engine is different'
+        )
+
+
+class TestRidgeOrientation(unittest.TestCase):
+
+    def test_opencv_engine_matches_scipy(self):
+        _, scipy_fp = enhance_sample(ridge_orient_engine='scipy')
+        _, opencv_fp = enhance_sample(ridge_orient_engine='opencv')
+
+        # Orientations are angles modulo pi, only the ridge region is compared since the background has no ridges
+        difference = np.abs(np.angle(np.exp(2j * (scipy_fp._orientim - opencv_fp._orientim)))) / 2
+        self.assertLess(difference[scipy_fp._mask].max(), 1e-4)
+        np.testing.assert_array_equal(scipy_fp._skeleton, opencv_fp._skeleton)
+
+
+class TestRidgeFrequency(unittest.TestCase):
+
+    def test_vectorized_engine_matches_loop(self):
+        _, loop_fp = enhance_sample(ridge_freq_engine='loop')
+        _, vectorized_fp = enhance_sample(ridge_freq_engine='vectorized')
+
+        self.assertAlmostEqual(loop_fp._mean_freq, vectorized_fp._mean_freq)
+        self.assertAlmostEqual(loop_fp._median_freq, vectorized_fp._median_freq)
+        np.testing.assert_array_equal(loop_fp._skeleton, vectorized_fp._skeleton)
+
+    def test_empty_mask_has_no_frequency(self):
+        preprocessing_fp = PreprocessingFingerprint()
+        preprocessing_fp._normim = np.random.default_rng(2).random((64, 48))
+        preprocessing_fp._orientim = np.zeros((64, 48))
+        preprocessing_fp._mask = np.zeros((64, 48), dtype=bool)
+        preprocessing_fp._PreprocessingFingerprint__ridge_freq()
+
+        self.assertTrue(np.isnan(preprocessing_fp._mean_freq))
+
+
+class TestSkeletonPruning(unittest.TestCase):
+
+    def test_pruning_matches_window_loop(self):
+        rng = np.random.default_rng(5)
+        preprocessing_fp = PreprocessingFingerprint()
+        for density in (0.05, 0.1, 0.2):
+            preprocessing_fp._binim = rng.random((64, 48)) < density
+            preprocessing_fp._PreprocessingFingerprint__skeletonize()
+            preprocessing_fp._PreprocessingFingerprint__prune_skeleton()
+
+            expected = reference_pruned_skeleton(preprocessing_fp._binim)
+
+            np.testing.assert_array_equal(preprocessing_fp._skeleton, expected)
+
+    def test_pruning_is_a_timed_stage(self):
+        _, preprocessing_fp = enhance_sample()
+
+        self.assertIn('prune_skeleton', preprocessing_fp.get_stage_times())
+
+
+class TestEnhancementPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.results = []
+        self.pipeline = EnhancementPipeline(PreprocessingFingerprint(ridge_segment_thresh=0.25),
+                                            metrics_hook=self.results.append, trace_memory=True)
+
+    def test_pipeline_matches_enhance(self):
+        enhanced, _ = enhance_sample()
+
+        self.assertTrue(self.pipeline.run(load_sample_fingerprint()))
+
+        self.assertEqual(tuple(result.get_name() for result in self.results), PreprocessingFingerprint.STAGES)
+        self.assertTrue(all(result.get_allocated() is not None for result in self.results))
+        np.testing.assert_array_equal(self.pipeline.get_enhanced_fingerprint(return_as_image=False)[0], enhanced[0])
+
+    def test_poor_image_stops_after_segmentation(self):
+        enhanced, _ = enhance_sample()
+
+        is_complete = self.pipeline.run(load_sample_fingerprint(), stop_condition=poor_spatial_quality(1.0))
+
+        self.assertFalse(is_complete)
+        self.assertEqual(list(self.pipeline.get_stage_times()), ['ridge_segment'])
+        self.assertRaises(ValueError, self.pipeline.get_enhanced_fingerprint)
+        self.assertAlmostEqual(self.results[0].get_output('quality_avr'), enhanced[4])
+
+        self.assertTrue(self.pipeline.resume())
+        np.testing.assert_array_equal(self.pipeline.get_result('prune_skeleton').get_output('skeleton'), enhanced[0])
+
+    def test_stage_results_are_read_only(self):
+        self.pipeline.run(load_sample_fingerprint(), last_stage='ridge_orient')
+
+        orientation = self.pipeline.get_result('ridge_orient').get_output('orientim')
+
+        self.assertEqual(len(self.results), 2)
+        with self.assertRaises(ValueError):
+            orientation[0, 0] = 0
+
+
+class TestGaborFilterBank(unittest.TestCase):
+
+    def setUp(self):
+        clear_gabor_filter_banks()
+
+    def test_bank_is_reused_between_requests(self):
+        enhance_sample()
+        enhance_sample()
+
+        info = get_gabor_filter_bank_info()
+        self.assertEqual(1, info['misses'], 'Filter bank should be generated only once')
+        self.assertEqual(1, info['hits'], 'Second request should reuse the filter bank')
+
+    def test_precompute_covers_all_frequencies(self):
+        self.assertEqual(14, precompute_gabor_filter_banks())
+
+        enhance_sample()
+
+        self.assertEqual(14, get_gabor_filter_bank_info()['misses'], 'Enhance should not build a new bank')
+
+    def test_bank_is_read_only(self):
+        gabor_filter, _ = get_gabor_filter_bank(0.1, 0.65, 0.65, 3.0)
+
+        with self.assertRaises(ValueError):
+            gabor_filter[0][0][0] = 1
+
+
+class TestButterworthFilterBank(unittest.TestCase):
+
+    def setUp(self):
+        clear_butterworth_filter_banks()
+
+    def tearDown(self):
+        clear_butterworth_filter_banks()
+
+    def test_bank_matches_pixel_loop(self):
+        rows, columns, number_filters = 40, 32, 5
+        low_pass = np.zeros((number_filters, rows, columns))
+        for nf in range(number_filters):
+            for k in range(rows):
+                for l in range(columns):
+                    distance = np.sqrt(np.power(k - (rows / 2), 2) + np.power(l - (columns / 2), 2))
+                    low_pass[nf][k][l] = 1 if distance <= 6 + 6 * nf else 0
+
+        bank = build_butterworth_filter_bank(rows, columns, number_filters)
+
+        np.testing.assert_array_equal(bank, low_pass[1:] - low_pass[:-1])
+
+    def test_bank_is_saved_and_memory_mapped(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path_file = os.path.join(directory, 'bank.npy')
+            built = load_butterworth_filter_bank(path_file, 40, 32, 5)
+            self.assertTrue(os.path.isfile(path_file))
+            self.assertIs(built, load_butterworth_filter_bank(path_file, 40, 32, 5))
+
+            clear_butterworth_filter_banks()
+            loaded = load_butterworth_filter_bank(path_file, 40, 32, 5)
+            self.assertIsInstance(loaded, np.memmap)
+            np.testing.assert_array_equal(loaded, built)
+
+    def test_bank_of_another_size_is_rebuilt(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path_file = os.path.join(directory, 'bank.npy')
+            load_butterworth_filter_bank(path_file, 40, 32, 5)
+            clear_butterworth_filter_banks()
+
+            bank = load_butterworth_filter_bank(path_file, 48, 32, 5)
+
+            self.assertEqual(bank.shape, (4, 48, 32))
+            self.assertEqual(np.load(path_file).shape, (4, 48, 32))
+
+
+class TestQualityFingerprint(unittest.TestCase):
+
+    def setUp(self):
+        self.img = load_sample_fingerprint()
+
+    def test_ring_energies_match_filter_products(self):
+        by_filters = QualityFingerprint(data_filters='dataFilter.npy', energy_mode='filters')
+        by_rings = QualityFingerprint(data_filters='dataFilter.npy', energy_mode='rings')
+
+        self.assertAlmostEqual(
+            by_filters.getQualityFingerprint(self.img),
+            by_rings.getQualityFingerprint(self.img),
+            places=10
+        )
+
+    def test_batch_matches_single_frames(self):
+        samples = [self.img, self.img[::-1], self.img * 0.5]
+        quality_image = QualityFingerprint(data_filters='dataFilter.npy')
+
+        expected = [QualityFingerprint(data_filters='dataFilter.npy').getQualityFingerprint(img) for img in samples]
+
+        np.testing.assert_allclose(quality_image.getQualityFingerprints(samples), expected, rtol=1e-12)
+        self.assertEqual(quality_image.getQualityFingerprints([]), [])
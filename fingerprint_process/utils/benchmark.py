@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+import json
+import pickle
+import tracemalloc
+from time import perf_counter
+from typing import Callable, Union
+
+import numpy as np
+
+from core.utils import cast_base64_to_bytes, cast_bytes_to_base64
+from fingerprint_process.description.fingerprint import Fingerprint
+from fingerprint_process.matching.identification import FingerprintGallery, IdentificationEngine
+from fingerprint_process.matching.matching_core import MatchingCore
+from fingerprint_process.models.fingerprint_template import FingerprintTemplate, POINT_DTYPE
+from fingerprint_process.preprocessing.enhancement_pipeline import EnhancementPipeline
+from fingerprint_process.preprocessing.fingerprint_raw import FingerprintRaw
+from fingerprint_process.preprocessing.preprocessing_fingerprint import PreprocessingFingerprint
+from fingerprint_process.preprocessing.quality_image import QualityFingerprint
+
+
+def load_sample_fingerprint(path_json: str = './fingerprint_process/data/fingerprintRawData.json') -> np.ndarray:
+    """
+    Read the raw sample saved by the sensor and rebuild it as a 288x256 image
+
+    :param path_json: (str) Path of the JSON file created with save_fingerprint_into_json
+    :return: (ndarray) The fingerprint image
+    """
+    with open(path_json, 'r', encoding='utf-8') as file:
+        data_fingerprint = json.load(file)['fingerprint']
+
+    raw_data = FingerprintRaw().get_fingerprint_raw(data_fingerprint)
+    fingerprint = Fingerprint(show_result=False, save_result=False)
+
+    return fingerprint.reconstruction_fingerprint(raw_data)
+
+
+def time_function(func: Callable, repeat: int = 5) -> float:
+    """
+    Run a function several times and return the best wall time in milliseconds
+    """
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        times.append(perf_counter() - start)
+
+    return min(times) * 1000
+
+
+def decode_fingerprint_by_pixel(data_fingerprint: Union[str, list], width: int = 256, height: int = 288) -> np.ndarray:
+    """
+    Previous decoder of the API samples, kept as baseline: every nibble is expanded in a Python loop and the
+    pixels are copied one by one into the image.
+    """
+    data_bytes = cast_base64_to_bytes(data_fingerprint) if isinstance(data_fingerprint, str) else data_fingerprint
+
+    data_fingerprint_raw = np.zeros(width * height, 'uint8')
+    count = 0
+    for nibble in data_bytes:
+        byte = np.uint8(nibble)
+        data_fingerprint_raw[count] = ((byte >> 4) * 17)
+        count += 1
+        data_fingerprint_raw[count] = ((byte & 0b00001111) * 17)
+        count += 1
+
+    raw_image = np.zeros((height, width))
+    x = 0
+    y = 0
+    for pixel in data_fingerprint_raw:
+        raw_image[y][x] = pixel
+        if x == (width - 1):
+            y += 1
+            x = 0
+        else:
+            x += 1
+
+    return raw_image
+
+
+def benchmark_fingerprint_decoding(
+        path_json: str = './fingerprint_process/data/fingerprintRawData.json',
+        repeat: int = 5
+) -> dict:
+    """
+    Compare the per-pixel decoding of the sample, sent as an int list and as base64, against
+    FingerprintRaw.get_fingerprint_image and against the full reconstruction used by Fingerprint
+    """
+    with open(path_json, 'r', encoding='utf-8') as file:
+        data_fingerprint = json.load(file)['fingerprint']
+
+    fingerprint = Fingerprint(show_result=False, save_result=False)
+    results = {}
+
+    for data_format, data in (('list', data_fingerprint), ('base64', cast_bytes_to_base64(bytes(data_fingerprint)))):
+        results[f'loop ({data_format})'] = time_function(lambda: decode_fingerprint_by_pixel(data), repeat=repeat)
+        results[f'image ({data_format})'] = time_function(
+            lambda: FingerprintRaw().get_fingerprint_image(data),
+            repeat=repeat
+        )
+        results[f'reconstruction ({data_format})'] = time_function(
+            lambda: fingerprint.reconstruction_fingerprint(FingerprintRaw().get_fingerprint_raw(data)),
+            repeat=repeat
+        )
+
+    return results
+
+
+def benchmark_ridge_filter(repeat: int = 5) -> dict:
+    """
+    Compare the per-pixel Gabor filtering against the vectorized engine. Enhance is run once to populate the
+    intermediate images and then only the ridge filter stage is timed.
+    """
+    img = load_sample_fingerprint()
+    results = {}
+
+    for engine in ('loop', 'vectorized'):
+        preprocessing_fp = PreprocessingFingerprint(ridge_segment_thresh=0.25, ridge_filter_engine=engine)
+        preprocessing_fp.enhance(img, return_as_image=False)
+        results[engine] = time_function(preprocessing_fp._PreprocessingFingerprint__ridge_filter, repeat=repeat)
+
+    return results
+
+
+def benchmark_ridge_orient(repeat: int = 5) -> dict:
+    """
+    Compare the dense scipy convolutions of the orientation field against the separable OpenCV engine, only the
+    ridge orientation stage is timed.
+    """
+    img = load_sample_fingerprint()
+    results = {}
+
+    for engine in ('scipy', 'opencv'):
+        preprocessing_fp = PreprocessingFingerprint(ridge_segment_thresh=0.25, ridge_orient_engine=engine)
+        preprocessing_fp.enhance(img, return_as_image=False)
+        results[engine] = time_function(preprocessing_fp._PreprocessingFingerprint__ridge_orient, repeat=repeat)
+
+    return results
+
+
+def benchmark_ridge_freq(repeat: int = 5) -> dict:
+    """
+    Compare the block by block ridge frequency estimation against the vectorized engine, only the ridge frequency
+    stage is timed.
+    """
+    img = load_sample_fingerprint()
+    results = {}
+
+    for engine in ('loop', 'vectorized'):
+        preprocessing_fp = PreprocessingFingerprint(ridge_segment_thresh=0.25, ridge_freq_engine=engine)
+        preprocessing_fp.enhance(img, return_as_image=False)
+        results[engine] = time_function(preprocessing_fp._PreprocessingFingerprint__ridge_freq, repeat=repeat)
+
+    return results
+
+
+def benchmark_enhancement_stages(repeat: int = 5) -> dict:
+    """
+    Mean time of every stage of the enhancement of the sample, reported by the metrics hook of the pipeline
+    """
+    img = load_sample_fingerprint()
+    results = []
+    pipeline = EnhancementPipeline(PreprocessingFingerprint(ridge_segment_thresh=0.25), metrics_hook=results.append)
+
+    for _ in range(repeat):
+        pipeline.run(img)
+
+    return {name: np.mean([result.get_time() for result in results if result.get_name() == name])
+            for name in PreprocessingFingerprint.STAGES}
+
+
+def benchmark_quality_energy(number_samples: int = 4, repeat: int = 5) -> dict:
+    """
+    Compare the spectral quality scoring with one product per ring filter, one bincount per frame and one bincount
+    for a batch of frames. The filter bank and the label map are loaded before timing.
+    """
+    img = load_sample_fingerprint()
+    samples = [img] * number_samples
+    results = {}
+
+    for energy_mode in ('filters', 'rings'):
+        quality_image = QualityFingerprint(data_filters='dataFilter.npy', energy_mode=energy_mode)
+        quality_image.getQualityFingerprint(img)
+        results[energy_mode] = time_function(
+            lambda: [quality_image.getQualityFingerprint(sample) for sample in samples],
+            repeat=repeat
+        )
+
+    quality_image = QualityFingerprint(data_filters='dataFilter.npy', energy_mode='rings')
+    results['rings (batch)'] = time_function(lambda: quality_image.getQualityFingerprints(samples), repeat=repeat)
+
+    return results
+
+
+def describe_sample_fingerprint() -> Fingerprint:
+    fingerprint = Fingerprint(show_result=False, save_result=False)
+    fingerprint.describe_fingerprint(load_sample_fingerprint())
+
+    return fingerprint
+
+
+def allocated_memory(func: Callable) -> float:
+    """
+    Return the memory in KiB that is still allocated by the value returned by func
+    """
+    tracemalloc.start()
+    value = func()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del value
+
+    return size / 1024
+
+
+def benchmark_template(repeat: int = 5) -> tuple:
+    """
+    Compare the lists of Minutiae and CorePoint objects of the described sample with its FingerprintTemplate: the
+    memory of a stored gallery entry (loaded from its pickle) and the time of MatchingCore against itself
+    """
+    fingerprint = describe_sample_fingerprint()
+    template = fingerprint.get_template()
+
+    points = pickle.dumps((fingerprint.get_minutiae_list(), fingerprint.get_core_point_list()))
+    memory = {
+        'objects': allocated_memory(lambda: pickle.loads(points)),
+        'template': allocated_memory(lambda: pickle.loads(pickle.dumps(template)))
+    }
+
+    matching = MatchingCore()
+    times = {
+        'objects': time_function(lambda: matching.matching(fingerprint, fingerprint), repeat=repeat),
+        'template': time_function(lambda: matching.matching(template, template), repeat=repeat)
+    }
+
+    return memory, times
+
+
+def synthetic_template(rng: np.random.Generator, number_minutiae: int = 40, number_cores: int = 2) -> FingerprintTemplate:
+    """
+    Template with random minutiae (e, b) and core points (l, d, w) inside a 288x256 image
+    """
+    def random_points(number: int, types: str) -> np.ndarray:
+        points = np.zeros(number, dtype=POINT_DTYPE)
+        points['posy'] = rng.integers(0, 288, number)
+        points['posx'] = rng.integers(0, 256, number)
+        points['angle'] = rng.uniform(0, 360, number)
+        points['point_type'] = rng.choice(list(types), number)
+
+        return points
+
+    return FingerprintTemplate(minutiae=random_points(number_minutiae, 'eb'),
+                               core_points=random_points(number_cores, 'ldw'))
+
+
+def synthetic_gallery(size: int, seed: int = 0) -> FingerprintGallery:
+    rng = np.random.default_rng(seed)
+    gallery = FingerprintGallery()
+    for position in range(size):
+        gallery.add_template(f'CLI-{position}', synthetic_template(rng, number_minutiae=int(rng.integers(25, 60)),
+                                                                  number_cores=int(rng.integers(1, 4))))
+
+    return gallery
+
+
+def benchmark_identification(sizes: tuple = (10000, 100000), workers: int = 4, repeat: int = 3) -> dict:
+    """
+    Identify an enrolled template in synthetic galleries: full MatchingCore pass over every entry that shares a
+    core type with the probe against the coarse filter limited to 2000 candidates, spread over the workers
+    """
+    results = {}
+    for size in sizes:
+        gallery = synthetic_gallery(size)
+        probe = gallery.get_template(size // 2)
+
+        for name, max_candidates, number_workers in (('all candidates', None, 1), ('2000 candidates', 2000, 1),
+                                                     (f'2000 candidates, {workers} workers', 2000, workers)):
+            engine = IdentificationEngine(gallery, workers=number_workers, max_candidates=max_candidates)
+            engine.start()
+            results[f'{size} ({name})'] = time_function(lambda: engine.identify(probe), repeat=repeat)
+            engine.shutdown()
+
+    return results
+
+
+def show_results(title: str, results: dict, unit: str = 'ms'):
+    print(title)
+    for key, value in results.items():
+        print('\t{}: {:.2f} {}'.format(key, value, unit))
+
+
+if __name__ == '__main__':
+    show_results('Decoding of the raw sample', benchmark_fingerprint_decoding())
+    show_results('Ridge filter stage (288x256 sample)', benchmark_ridge_filter())
+    show_results('Ridge orientation stage (288x256 sample)', benchmark_ridge_orient())
+    show_results('Ridge frequency stage (288x256 sample)', benchmark_ridge_freq())
+    show_results('Enhancement stages (288x256 sample)', benchmark_enhancement_stages())
+    show_results('Spectral quality of 4 samples', benchmark_quality_energy())
+    memory_template, time_template = benchmark_template()
+    show_results('Memory of the described sample', memory_template, unit='KiB')
+    show_results('MatchingCore of the described sample against itself', time_template)
+    show_results('Identification in synthetic galleries', benchmark_identification())
@@ -237,7 +237,9 @@ def match_index_and_base_fingerprints(
         mode: str,
         source: str,
         base_fingerprint: Optional[Fingerprint] = None,
-        input_fingerprint: Optional[Fingerprint] = None
+        input_fingerprint: Optional[Fingerprint] = None,
+        max_explored_edges: Optional[int] = None,
+        time_budget: Optional[float] = None
 ):
 
     if source.lower() == 'sensor':
@@ -252,7 +254,7 @@ def match_index_and_base_fingerprints(
     else:
         return ErrorMessage.NOT_OPTION_FOUND
 
-    return match(base_fingerprint, input_fingerprint, mode)
+    return match(base_fingerprint, input_fingerprint, mode, max_explored_edges, time_budget)
 
 
 def save_fingerprint_into_json(
@@ -488,7 +490,7 @@ def get_quality_image(
     img = cv.imread(base_path + img_name, 0)
 
     quality_image = QualityFingerprint(
-        data_filters='dataFilter.txt',
+        data_filters='dataFilter.npy',
         address_output='./fingerprint_process/data/',
         show_graphs=show_result,
         name_fingerprint=name_fingerprint
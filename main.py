@@ -7,9 +7,12 @@ from starlette.middleware.cors import CORSMiddleware
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 
-from core.config import charge_settings, ON_CLOUD
+from controller.identification_controller import stop_fingerprint_identification
+from core.config import charge_settings, ON_CLOUD, PRECOMPUTE_FILTER_BANKS
+from core.process_pool import fingerprint_pool
 from core.router_manager import add_main_routers, add_test_routers
 from db.orm.exceptions_orm import DBException, NotFoundException
+from fingerprint_process.preprocessing.gabor_filter_bank import precompute_gabor_filter_banks
 from routers import icon
 
 app = FastAPI(
@@ -29,6 +32,19 @@ async def startup_event():
     if not settings.is_on_cloud():
         app.include_router(router=icon.router)
 
+    # Build the Gabor filter banks before the first fingerprint arrives
+    if PRECOMPUTE_FILTER_BANKS:
+        precompute_gabor_filter_banks()
+
+    # Fingerprints are described by worker processes instead of the event loop
+    fingerprint_pool.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    fingerprint_pool.shutdown()
+    await stop_fingerprint_identification(wait=True)
+
 
 @app.exception_handler(DBException)
 @app.exception_handler(NotFoundException)
@@ -1,4 +1,5 @@
-from typing import Union
+from datetime import datetime
+from typing import Union, Optional
 
 from fastapi import APIRouter, Path, Depends, Query, Body, HTTPException
 from pydantic import ValidationError
@@ -45,13 +46,17 @@ router = APIRouter(
 async def get_description_of_credit(
         id_credit: int = Path(..., gt=0),
         secure: bool = Query(True),
+        limit: Optional[int] = Query(None, gt=0),
+        after_time: Optional[datetime] = Query(None),
+        after_movement: Optional[int] = Query(None, gt=0),
         db: Session = Depends(get_db),
         current_token: TokenSummary = Depends(get_current_token)
 ):
     if not check_owner_credit(db, id_credit, current_token.type_user, current_token.id_type):
         raise not_authorized_exception
 
-    movements_of_credit = await get_all_movements_of_credit(db, id_credit)
+    # The next page starts after the created_time and id_movement of the last movement returned
+    movements_of_credit = await get_all_movements_of_credit(db, id_credit, after_time, after_movement, limit)
     response = await get_credit_description(db, id_credit, current_token.type_user, movements_of_credit)
 
     if secure:
@@ -199,7 +204,7 @@ async def validate_by_fingerprint(
     auth_fingerprint = await set_minutiae_and_core_points_to_a_fingerprint(minutiae, core_points)
 
     # Generate fingerprint object using data of client from DB
-    client_fingerprint = await get_client_fingerprint(db, id_client)
+    client_fingerprint = await get_client_fingerprint(db, id_client, r)
 
     # Auth credit using fingerprints
     result = await validate_operation_by_fingerprints(auth_fingerprint, client_fingerprint, id_order, 'CRT', r)
@@ -1,15 +1,21 @@
 from typing import Union
 
-from fastapi import APIRouter, Path, Query, Depends
+from fastapi import APIRouter, Path, Query, Depends, Body
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 from starlette import status
 
-from controller.fingerprint_controller import check_if_user_have_fingerprint_registered
-from controller.login_controller import get_current_token
-from controller.secure_controller import cipher_response_message
+from controller.fingerprint_controller import check_if_user_have_fingerprint_registered, \
+    describe_fingerprint_from_sample
+from controller.identification_controller import identify_client_by_fingerprint
+from controller.login_controller import get_current_token, check_type_user
+from controller.secure_controller import cipher_response_message, get_data_from_secure
+from core.config import IDENTIFICATION_TOP_K
 from db.database import get_db
-from db.orm.exceptions_orm import not_authorized_exception
+from db.orm.exceptions_orm import not_authorized_exception, validation_request_exception
 from schemas.basic_response import BasicResponse
+from schemas.fingerprint_base import IdentificationDisplay, IdentifiedClient
+from schemas.fingerprint_model import FingerprintB64
 from schemas.secure_base import SecureBase
 from schemas.token_base import TokenSummary
 
@@ -43,3 +49,39 @@ async def have_user_had_a_fingerprint_registered(
         return secure_response
 
     return response
+
+
+@router.post(
+    path='/fingerprint/identify',
+    response_model=Union[SecureBase, IdentificationDisplay],
+    status_code=status.HTTP_200_OK
+)
+async def identify_client_using_fingerprint(
+        request: Union[SecureBase, FingerprintB64] = Body(...),
+        top_k: int = Query(IDENTIFICATION_TOP_K, ge=1, le=20),
+        secure: bool = Query(True),
+        db: Session = Depends(get_db),
+        current_token: TokenSummary = Depends(get_current_token)
+):
+    # A market identifies the client at its counter when the client does not give a card
+    if not (check_type_user(current_token, is_a='market') or check_type_user(current_token, is_a='admin')):
+        raise not_authorized_exception
+
+    data_request = get_data_from_secure(request) if secure else request
+    try:
+        fingerprint_request = FingerprintB64.parse_obj(data_request) if isinstance(data_request, dict) else data_request
+    except ValidationError:
+        raise validation_request_exception
+
+    auth_fingerprint = await describe_fingerprint_from_sample(fingerprint_request.fingerprint)
+    clients = await identify_client_by_fingerprint(db, auth_fingerprint, top_k)
+
+    response = IdentificationDisplay(
+        clients=[IdentifiedClient(id_client=id_client, score=score) for id_client, score in clients]
+    )
+
+    if secure:
+        secure_response = cipher_response_message(db=db, id_user=current_token.id_user, response=response)
+        return secure_response
+
+    return response
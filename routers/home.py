@@ -4,6 +4,8 @@ from fastapi.templating import Jinja2Templates
 from starlette import status
 
 from core.config import charge_settings
+from core.process_pool import fingerprint_pool
+from fingerprint_process.preprocessing.gabor_filter_bank import get_gabor_filter_bank_info
 
 router = APIRouter(
     tags=['main']
@@ -31,10 +33,19 @@ async def home(
     status_code=status.HTTP_200_OK,
     include_in_schema=False
 )
-def warmup(request: Request):
+async def warmup(request: Request):
     settings = charge_settings()
 
-    return {"Warmup": "OK"}
+    # The fingerprints are described in the workers of the pool, so their caches are the ones that are used
+    workers_info = await fingerprint_pool.run_in_workers(get_gabor_filter_bank_info)
+    gabor_filter_bank = {
+        'workers': len(workers_info),
+        'hits': sum(info['hits'] for info in workers_info.values()),
+        'misses': sum(info['misses'] for info in workers_info.values()),
+        'current_size': sum(info['current_size'] for info in workers_info.values())
+    }
+
+    return {"Warmup": "OK", "gabor_filter_bank": gabor_filter_bank}
 
 
 @router.get(
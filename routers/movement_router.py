@@ -1,4 +1,5 @@
-from typing import Union
+from datetime import datetime
+from typing import Union, Optional
 
 from fastapi import APIRouter, Depends, Path, Query, Body, HTTPException
 from pydantic import ValidationError
@@ -18,14 +19,16 @@ from controller.movement_controller import get_payments_of_client, get_payments_
     make_movement_based_on_type, finish_movement_unsuccessfully, save_movement_fingerprint, \
     save_type_authentication_in_cache, get_id_requester_from_movement, save_authentication_movement_result_in_cache, \
     get_movement_using_its_id, check_if_time_of_movement_is_valid, execute_movement_from_controller, \
-    get_email_of_requester_movement, check_authentication_movement_result_in_cache, save_paypal_order_into_sub_movement
+    get_email_of_requester_movement, check_authentication_movement_result_in_cache, save_paypal_order_into_sub_movement, \
+    stream_payments_of_user
 from controller.paypal_controller import get_paypal_order_object_from_cache, generate_paypal_order, \
     save_paypal_order_in_cache, capture_paypal_order_from_movement, delete_paypal_order_in_cache
-from controller.secure_controller import cipher_response_message, get_data_from_secure
+from controller.secure_controller import cipher_response_message, get_data_from_secure, cipher_response_in_batches
 from core.app_email import send_new_movement_email, send_cancel_movement_email
 from core.logs import show_error_message
 from db.cache.cache import get_cache_client
 from db.database import get_db
+from db.orm.movements_orm import STREAM_BATCH_SIZE
 from db.orm.exceptions_orm import not_authorized_exception, type_of_value_not_compatible, \
     validation_request_exception, cache_exception, compile_exception, not_longer_available_exception, \
     type_of_authorization_not_compatible_exception, movement_finish_exception, operation_need_authorization_exception, \
@@ -41,6 +44,7 @@ from schemas.token_base import TokenSummary
 from schemas.type_auth_movement import TypeAuthMovement, TypeAuthFrom
 from schemas.type_movement import TypeMovement
 from schemas.type_user import TypeUser
+from web_utils.web_functions import get_ndjson_response
 
 router = APIRouter(
     tags=['movement']
@@ -238,7 +242,7 @@ async def authorize_movement_using_fingerprint(
     auth_fingerprint = set_minutiae_and_core_points_to_a_fingerprint(minutiae, core_points)
 
     # Generate fingerprint object using data of client from DB
-    client_fingerprint = get_client_fingerprint(db, r_id_client)
+    client_fingerprint = get_client_fingerprint(db, r_id_client, r)
 
     # Auth movement using fingerprints
     r_auth_fingerprint = await auth_fingerprint
@@ -496,16 +500,33 @@ async def cancel_movement(
 async def get_payments_of_user(
         id_user: int = Path(..., gt=0),
         secure: bool = Query(True),
+        limit: Optional[int] = Query(None, gt=0),
+        after_time: Optional[datetime] = Query(None),
+        after_movement: Optional[int] = Query(None, gt=0),
+        stream: bool = Query(False),
         db: Session = Depends(get_db),
         current_token: TokenSummary = Depends(get_current_token)
 ):
     if current_token.id_user != id_user:
         raise not_authorized_exception
 
+    # The next page starts after the created_time and id_movement of the last payment returned
+    if stream:
+        # NDJSON: a payment per line or, when secure, a ciphered PaymentComplexList per batch of payments
+        payments = stream_payments_of_user(
+            db, current_token.type_user, current_token.id_type, after_time, after_movement, limit
+        )
+        if secure:
+            payments = cipher_response_in_batches(
+                payments, lambda batch: PaymentComplexList(payments=batch), db, id_user, STREAM_BATCH_SIZE
+            )
+
+        return get_ndjson_response(payments)
+
     if current_token.type_user == TypeUser.client.value:
-        response = get_payments_of_client(db, current_token.id_type)
+        response = get_payments_of_client(db, current_token.id_type, after_time, after_movement, limit)
     elif current_token.type_user == TypeUser.market.value or current_token.type_user == TypeUser.system.value:
-        response = get_payments_of_market(db, current_token.id_type)
+        response = get_payments_of_market(db, current_token.id_type, after_time, after_movement, limit)
     else:
         raise type_of_value_not_compatible
 
@@ -10,7 +10,8 @@ from starlette import status
 from starlette.background import BackgroundTasks
 
 from controller.fingerprint_controller import register_fingerprint, does_client_have_fingerprints_samples_registered, \
-    preregister_fingerprint, check_fingerprint_request
+    preregister_fingerprint, check_fingerprint_request, describe_best_sample, get_preregistered_fingerprint, \
+    delete_preregistered_fingerprint
 from controller.password_recovery_controller import generate_new_code_to_recover_password, check_code, change_password
 from controller.secure_controller import get_data_from_secure, get_data_from_rsa_message, cipher_response_message
 from controller import login_controller as c_login
@@ -108,7 +109,8 @@ async def preregister_fingerprint_of_client(
 
     is_good, data = await check_quality_of_fingerprints(fps_request.samples)
     if is_good:
-        ticket = preregister_fingerprint(id_client, data, fps_request, r, 'CLI')
+        described_fingerprint = await describe_best_sample(fps_request.samples, data)
+        ticket = preregister_fingerprint(id_client, data, fps_request, r, 'CLI', described_fingerprint)
     else:
         raise bad_quality_fingerprint_exception
 
@@ -156,8 +158,10 @@ async def register_fingerprint_of_client(
         gcs=gcs,
         fingerprint_request=fingerprint_request.fingerprint_full_request,
         id_client=id_client,
-        data_summary=fingerprint_request.summary
+        data_summary=fingerprint_request.summary,
+        described_fingerprint=get_preregistered_fingerprint(id_client, fingerprint_request, r, 'CLI')
     )
+    delete_preregistered_fingerprint(id_client, r, 'CLI')
 
     if secure:
         public_pem = item_get(r, f'PEM-CLI-{id_client}')
@@ -1,10 +1,12 @@
 from typing import List
 
 from fastapi import APIRouter, Body, Depends, Path
+from redis.client import Redis
 from sqlalchemy.orm import Session
 from starlette import status
 
 from controller.login_controller import get_current_token, check_type_user
+from db.cache.cache import get_cache_client
 from db.database import get_db
 from db.orm import cores_orm
 from db.orm.exceptions_orm import wrong_data_sent_exception, credentials_exception
@@ -27,6 +29,7 @@ router = APIRouter(
 async def create_core_point(
         request: CoreRequest = Body(...),
         db: Session = Depends(get_db),
+        r: Redis = Depends(get_cache_client),
         current_token: TokenSummary = Depends(get_current_token)
 ):
     if not check_type_user(current_token, is_a='admin'):
@@ -39,7 +42,7 @@ async def create_core_point(
         point_type=request.type_core.value
     )
 
-    result = cores_orm.create_core_point(db, new_core, request.id_fingerprint)
+    result = cores_orm.create_core_point(db, new_core, request.id_fingerprint, r=r)
 
     return BasicResponse(
         operation="Create",
@@ -73,12 +76,13 @@ async def get_core_point(
 async def delete_core_point(
         id_core: str = Path(..., min_length=12, max_length=40),
         db: Session = Depends(get_db),
+        r: Redis = Depends(get_cache_client),
         current_token: TokenSummary = Depends(get_current_token)
 ):
     if not check_type_user(current_token, is_a='admin'):
         raise credentials_exception
 
-    response = cores_orm.delete_core_point(db=db, id_core=id_core)
+    response = cores_orm.delete_core_point(db=db, id_core=id_core, r=r)
 
     return response
 
@@ -92,6 +96,7 @@ async def create_all_core_points_of_a_fingerprint(
         id_fingerprint: str = Path(..., min_length=12, max_length=40),
         request: List[CoreRequest] = Body(...),
         db: Session = Depends(get_db),
+        r: Redis = Depends(get_cache_client),
         current_token: TokenSummary = Depends(get_current_token)
 ):
     if not check_type_user(current_token, is_a='admin'):
@@ -115,7 +120,7 @@ async def create_all_core_points_of_a_fingerprint(
     if id_fingerprint_of_request != id_fingerprint:
         raise wrong_data_sent_exception
 
-    result = cores_orm.insert_list_of_core_points(db, new_cores, id_fingerprint)
+    result = cores_orm.insert_list_of_core_points(db, new_cores, id_fingerprint, r=r)
 
     return BasicResponse(
         operation="Create",
@@ -1,10 +1,13 @@
 from typing import Union, List, Optional
 
 from fastapi import APIRouter, Depends, Body, Path, Query
+from redis.client import Redis
 from sqlalchemy.orm import Session
 from starlette import status
 
+from controller.identification_controller import stop_fingerprint_identification
 from controller.login_controller import get_current_token, check_type_user
+from db.cache.cache import get_cache_client
 from db.database import get_db
 from db.orm import fingerprints_orm
 from db.orm.exceptions_orm import credentials_exception
@@ -26,12 +29,14 @@ router = APIRouter(
 async def create_fingerprint(
         request: FingerprintRequest = Body(...),
         db: Session = Depends(get_db),
+        r: Redis = Depends(get_cache_client),
         current_token: TokenSummary = Depends(get_current_token)
 ):
     if not check_type_user(current_token, is_a='admin'):
         raise credentials_exception
 
-    response = fingerprints_orm.create_fingerprint(db, request)
+    response = fingerprints_orm.create_fingerprint(db, request, r=r)
+    await stop_fingerprint_identification()
 
     return response
 
@@ -63,6 +68,7 @@ async def light_update(
         id_fingerprint: str = Path(..., min_length=12, max_length=49),
         request: FingerprintUpdateRequest = Body(...),
         db: Session = Depends(get_db),
+        r: Redis = Depends(get_cache_client),
         current_token: TokenSummary = Depends(get_current_token)
 ):
     if not check_type_user(current_token, is_a='admin'):
@@ -72,8 +78,11 @@ async def light_update(
         result = fingerprints_orm.change_main_fingerprint(
             db=db,
             change_main_to=request.main_fingerprint,
-            id_new_main_fingerprint=id_fingerprint
+            id_new_main_fingerprint=id_fingerprint,
+            r=r
         )
+        await stop_fingerprint_identification()
+
         return BasicResponse(
             operation="Change main fingerprint",
             successful=result
@@ -106,12 +115,14 @@ async def light_update(
 async def delete_fingerprint(
         id_fingerprint: str = Path(..., min_length=12, max_length=49),
         db: Session = Depends(get_db),
+        r: Redis = Depends(get_cache_client),
         current_token: TokenSummary = Depends(get_current_token)
 ):
     if not check_type_user(current_token, is_a='admin'):
         raise credentials_exception
 
-    response = fingerprints_orm.delete_fingerprint(db, id_fingerprint)
+    response = fingerprints_orm.delete_fingerprint(db, id_fingerprint, r=r)
+    await stop_fingerprint_identification()
 
     return response
 
@@ -150,11 +161,13 @@ async def get_fingerprints_of_user(
 async def delete_fingerprints_of_client(
         id_client: str = Path(..., min_length=12, max_length=49),
         db: Session = Depends(get_db),
+        r: Redis = Depends(get_cache_client),
         current_token: TokenSummary = Depends(get_current_token)
 ):
     if not check_type_user(current_token, is_a='admin'):
         raise credentials_exception
 
-    response = fingerprints_orm.delete_fingerprints_by_id_client(db, id_client)
+    response = fingerprints_orm.delete_fingerprints_by_id_client(db, id_client, r=r)
+    await stop_fingerprint_identification()
 
     return response
@@ -1,10 +1,12 @@
 from typing import List
 
 from fastapi import APIRouter, Body, Depends, Path
+from redis.client import Redis
 from sqlalchemy.orm import Session
 from starlette import status
 
 from controller.login_controller import get_current_token, check_type_user
+from db.cache.cache import get_cache_client
 from db.database import get_db
 from db.orm import minutiae_orm
 from db.orm.exceptions_orm import wrong_data_sent_exception, credentials_exception
@@ -27,6 +29,7 @@ router = APIRouter(
 async def create_minutia(
         request: MinutiaRequest = Body(...),
         db: Session = Depends(get_db),
+        r: Redis = Depends(get_cache_client),
         current_token: TokenSummary = Depends(get_current_token)
 ):
     if not check_type_user(current_token, is_a='admin'):
@@ -39,7 +42,7 @@ async def create_minutia(
         point_type=request.type_minutia.value
     )
 
-    result = minutiae_orm.create_minutia(db, new_minutia, request.id_fingerprint)
+    result = minutiae_orm.create_minutia(db, new_minutia, request.id_fingerprint, r=r)
 
     return BasicResponse(
         operation="Create",
@@ -73,12 +76,13 @@ async def get_minutia(
 async def delete_minutia(
         id_minutia: str = Path(..., min_length=12, max_length=40),
         db: Session = Depends(get_db),
+        r: Redis = Depends(get_cache_client),
         current_token: TokenSummary = Depends(get_current_token)
 ):
     if not check_type_user(current_token, is_a='admin'):
         raise credentials_exception
 
-    response = minutiae_orm.delete_minutia(db=db, id_minutia=id_minutia)
+    response = minutiae_orm.delete_minutia(db=db, id_minutia=id_minutia, r=r)
 
     return response
 
@@ -92,6 +96,7 @@ async def create_all_minutiae_of_a_fingerprint(
         id_fingerprint: str = Path(..., min_length=12, max_length=40),
         request: List[MinutiaRequest] = Body(...),
         db: Session = Depends(get_db),
+        r: Redis = Depends(get_cache_client),
         current_token: TokenSummary = Depends(get_current_token)
 ):
     if not check_type_user(current_token, is_a='admin'):
@@ -115,7 +120,7 @@ async def create_all_minutiae_of_a_fingerprint(
     if id_fingerprint_of_request != id_fingerprint:
         raise wrong_data_sent_exception
 
-    result = minutiae_orm.insert_list_of_minutiae(db, new_minutiae, id_fingerprint)
+    result = minutiae_orm.insert_list_of_minutiae(db, new_minutiae, id_fingerprint, r=r)
 
     return BasicResponse(
         operation="Create",
@@ -1,3 +1,4 @@
+from datetime import datetime
 from random import getrandbits
 from typing import Optional, List
 
@@ -11,6 +12,7 @@ from db.orm import movements_orm
 from db.orm.exceptions_orm import credentials_exception
 from schemas.movement_base import MovementRequest, MovementDisplay
 from schemas.token_base import TokenSummary
+from web_utils.web_functions import get_ndjson_response
 
 router = APIRouter(
     prefix='/test/movement',
@@ -79,13 +81,19 @@ async def get_movements_by_credit(
 )
 async def get_movements_by_performer(
         id_user: int = Path(..., gt=0),
+        limit: Optional[int] = Query(None, gt=0),
+        after_time: Optional[datetime] = Query(None),
+        after_movement: Optional[int] = Query(None, gt=0),
+        stream: bool = Query(False),
         db: Session = Depends(get_db),
         current_token: TokenSummary = Depends(get_current_token)
 ):
     if not check_type_user(current_token, is_a='admin'):
         raise credentials_exception
 
-    response = movements_orm.get_movements_by_id_performer(db, id_user)
+    response = movements_orm.get_movements_by_id_performer(db, id_user, after_time, after_movement, limit, stream)
+    if stream:
+        return get_ndjson_response(MovementDisplay.from_orm(movement) for movement in response)
 
     return response
 
@@ -97,13 +105,19 @@ async def get_movements_by_performer(
 )
 async def get_movements_by_id_requester(
         id_client: str = Path(..., min_length=12, max_length=40),
+        limit: Optional[int] = Query(None, gt=0),
+        after_time: Optional[datetime] = Query(None),
+        after_movement: Optional[int] = Query(None, gt=0),
+        stream: bool = Query(False),
         db: Session = Depends(get_db),
         current_token: TokenSummary = Depends(get_current_token)
 ):
     if not check_type_user(current_token, is_a='admin'):
         raise credentials_exception
 
-    response = movements_orm.get_movements_by_id_requester(db, id_client)
+    response = movements_orm.get_movements_by_id_requester(db, id_client, after_time, after_movement, limit, stream)
+    if stream:
+        return get_ndjson_response(MovementDisplay.from_orm(movement) for movement in response)
 
     return response
 
@@ -109,3 +109,12 @@ class FingerprintDisplay(FingerprintBasicDisplay):
 
     class Config:
         orm_mode = True
+
+
+class IdentifiedClient(BaseModel):
+    id_client: str = Field(...)
+    score: float = Field(..., ge=0)
+
+
+class IdentificationDisplay(BaseModel):
+    clients: List[IdentifiedClient] = Field(...)
@@ -3,6 +3,7 @@ import io
 import json
 from typing import List, Union
 
+import numpy as np
 from numpy import ndarray
 
 from PIL import Image
@@ -55,6 +56,17 @@ def save_fingerprint_in_memory(
         raise option_not_found_exception
 
 
+def get_image_from_base64(image_b64: Union[str, bytes]) -> ndarray:
+    """
+    Inverse of save_fingerprint_in_memory with return_format 'base64'
+
+    :param image_b64: (str, bytes) - Image encoded in base64
+    :return: The image as a grayscale uint8 array
+    """
+    with Image.open(io.BytesIO(base64.b64decode(image_b64))) as fingerprint_image:
+        return np.asarray(fingerprint_image.convert("L"))
+
+
 def open_fingerprint_data_from_json(
         path: str = './fingerprint_process/data/',
         json_name: str = 'fingerprintRawData.json'
@@ -2,8 +2,9 @@ import json
 from datetime import datetime, timedelta
 from math import floor
 import random
-from typing import Union, List
+from typing import Union, List, Iterable
 
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from core.config import settings
@@ -47,3 +48,10 @@ def serialize_base_model_object_to_json_str(my_object: Union[List[BaseModel], Ba
         return my_object.json()
     else:
         raise TypeError
+
+
+def get_ndjson_response(items: Iterable[BaseModel]) -> StreamingResponse:
+    """
+    Stream the items as NDJSON (one JSON object per line) while they are produced
+    """
+    return StreamingResponse((item.json() + '\n' for item in items), media_type='application/x-ndjson')